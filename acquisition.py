@@ -0,0 +1,227 @@
+"""
+EEG acquisition from Lab Streaming Layer into a preallocated ring buffer.
+
+LslAcquisition resolves an EEG stream and runs a reader thread that pulls
+chunks without blocking (pull_chunk with timeout 0). float32 streams are
+pulled straight into the free slots of a p300.RingBuffer (dest_obj), other
+formats are converted. Timestamps are moved to the local clock with the
+stream's time_correction() offset (refreshed every few seconds) and then to
+the `clock` used for stimulus markers (perf_counter by default), so
+consumers can cut epochs from buffer.window() views directly.
+
+Sustained sample rate and samples dropped (gaps in the timestamps larger
+than 1.5 sample periods) are counted for the debug overlay.
+
+SyntheticOutlet publishes a local synthetic EEG stream (synthetic.SyntheticEEG)
+as a stand-in for the headset:
+
+    python acquisition.py outlet --rate 250 --channels 8
+    python acquisition.py monitor --type EEG
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+from p300 import RingBuffer
+from synthetic import SyntheticEEG
+
+try:
+    import pylsl
+except Exception:
+    pylsl = None
+
+
+def _require_pylsl():
+    if pylsl is None:
+        raise RuntimeError("'pylsl' module not installed. Use: pip install pylsl")
+
+
+def resolve_eeg(stream_type="EEG", name=None, timeout=5.0):
+    """First LSL stream of stream_type (and name, if given), or None"""
+    _require_pylsl()
+    prop, value = ("name", name) if name else ("type", stream_type)
+    if hasattr(pylsl, "resolve_byprop"):
+        streams = pylsl.resolve_byprop(prop, value, timeout=timeout)
+    else:
+        streams = pylsl.resolve_stream(prop, value)
+    return streams[0] if streams else None
+
+
+class LslAcquisition:
+    def __init__(self, stream_type="EEG", name=None, buffer_seconds=10, clock=time.perf_counter,
+                 poll_s=0.005, offset_every_s=5.0, resolve_timeout=5.0):
+        self.stream_type = stream_type
+        self.name = name
+        self.buffer_seconds = buffer_seconds
+        self.clock = clock
+        self.poll_s = poll_s
+        self.offset_every_s = offset_every_s
+        self.resolve_timeout = resolve_timeout
+        self.buffer = None
+        self.fs = 0.0
+        self.channels = 0
+        self.offset = 0.0        # LSL time_correction(): stream clock -> local LSL clock
+        self.clock_offset = 0.0  # local LSL clock -> self.clock
+        self.received = 0
+        self.dropped = 0
+        self.pulls = 0
+        self.started_at = None
+        self._inlet = None
+        self._direct = False
+        self._last_stamp = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Resolves the stream and starts the reader thread; raises RuntimeError if no stream is found"""
+        info = resolve_eeg(self.stream_type, self.name, self.resolve_timeout)
+        if info is None:
+            raise RuntimeError(f"No LSL stream of type {self.stream_type!r} found")
+        self._inlet = pylsl.StreamInlet(info, max_buflen=max(1, int(self.buffer_seconds)))
+        self.fs = info.nominal_srate() or 250.0
+        self.channels = info.channel_count()
+        self._direct = info.channel_format() == pylsl.cf_float32
+        self.buffer = RingBuffer(self.channels, int(self.buffer_seconds * self.fs))
+        self._update_offsets()
+        self.started_at = self.clock()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lsl-acquisition", daemon=True)
+        self._thread.start()
+        print(f"✓ EEG stream {info.name()!r}: {self.channels} channels at {self.fs:g} Hz")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+        if self._inlet is not None:
+            self._inlet.close_stream()
+            self._inlet = None
+
+    def _update_offsets(self):
+        self.offset = self._inlet.time_correction()
+        self.clock_offset = self.clock() - pylsl.local_clock()
+
+    def _run(self):
+        next_offset = self.clock() + self.offset_every_s
+        while not self._stop.is_set():
+            try:
+                n = self.pull()
+                if self.clock() >= next_offset:
+                    self._update_offsets()
+                    next_offset = self.clock() + self.offset_every_s
+            except Exception as e:
+                print(f"❌ EEG acquisition error: {e}")
+                n = 0
+            if not n:
+                self._stop.wait(self.poll_s)
+
+    def pull(self):
+        """Moves every sample the inlet has into the ring buffer; returns how many"""
+        slots = self.buffer.free()
+        if self._direct:
+            _, stamps = self._inlet.pull_chunk(timeout=0.0, max_samples=len(slots), dest_obj=slots)
+        else:
+            samples, stamps = self._inlet.pull_chunk(timeout=0.0, max_samples=len(slots))
+            if stamps:
+                slots[:len(stamps)] = np.asarray(samples, dtype=slots.dtype)
+        self.pulls += 1
+        n = len(stamps)
+        if not n:
+            return 0
+        stamps = np.asarray(stamps) + self.offset + self.clock_offset
+        previous = stamps[0] - 1.0 / self.fs if self._last_stamp is None else self._last_stamp
+        gaps = np.diff(stamps, prepend=previous) * self.fs
+        self.dropped += int(np.maximum(np.rint(gaps[gaps > 1.5]) - 1, 0).sum())
+        self._last_stamp = stamps[-1]
+        self.buffer.commit(n, stamps)
+        self.received += n
+        return n
+
+    def rate(self):
+        """Sustained samples per second since start"""
+        if not self.started_at:
+            return 0.0
+        return self.received / max(1e-9, self.clock() - self.started_at)
+
+    def format_stats(self):
+        if self.buffer is None:
+            return "EEG: not connected"
+        return (f"EEG: {self.rate():.1f} Hz of {self.fs:g}, {self.dropped} dropped, "
+                f"offset {self.offset * 1000:.1f} ms")
+
+
+class SyntheticOutlet:
+    """Local LSL EEG outlet pushing synthetic EEG chunks in real time"""
+
+    def __init__(self, rate=250, channels=8, name="SyntheticEEG", chunk_s=0.02, seed=None):
+        _require_pylsl()
+        self.rate = rate
+        self.channels = channels
+        self.chunk_s = chunk_s
+        self.sent = 0
+        self.eeg = SyntheticEEG(rate, channels, seed=seed)
+        info = pylsl.StreamInfo(name, "EEG", channels, rate, pylsl.cf_float32, f"{name}-{rate}-{channels}")
+        self._outlet = pylsl.StreamOutlet(info)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="lsl-synthetic", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    def _run(self):
+        start = pylsl.local_clock()
+        while not self._stop.is_set():
+            due = int((pylsl.local_clock() - start) * self.rate) - self.sent
+            if due > 0:
+                self._outlet.push_chunk(self.eeg.block(due))
+                self.sent += due
+            self._stop.wait(self.chunk_s)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic LSL EEG outlet and stream monitor")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("outlet", help="publish a synthetic EEG stream")
+    p.add_argument("--rate", type=int, default=250)
+    p.add_argument("--channels", type=int, default=8)
+    p.add_argument("--name", default="SyntheticEEG")
+
+    p = sub.add_parser("monitor", help="acquire a stream and print rate and drops")
+    p.add_argument("--type", default="EEG")
+    p.add_argument("--name")
+
+    args = parser.parse_args()
+    try:
+        if args.command == "outlet":
+            outlet = SyntheticOutlet(args.rate, args.channels, args.name).start()
+            print(f"Publishing {args.channels} channels at {args.rate} Hz as {args.name!r} (Ctrl+C to stop)")
+            stopper = outlet
+        else:
+            acquisition = LslAcquisition(args.type, args.name).start()
+            stopper = acquisition
+        while True:
+            time.sleep(1.0)
+            if args.command == "monitor":
+                print(acquisition.format_stats())
+    except RuntimeError as e:
+        raise SystemExit(str(e))
+    except KeyboardInterrupt:
+        stopper.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Benchmark: LSL EEG acquisition throughput, drops and sample age.
+
+Publishes a local SyntheticOutlet (--rate Hz x --channels) and acquires it
+with LslAcquisition for --seconds. Every --probe-ms the consumer side takes
+a one-second buffer.window() like an epoch cut would.
+
+Reports the sustained sample rate against the nominal one, samples dropped,
+pull calls per second, the age of the newest sample when a window is taken
+(acquisition latency) and the window cost (a view, no copy). Needs pylsl.
+
+Usage:
+    python benchmarks/bench_acquisition.py [--seconds S] [--rate HZ] [--channels N]
+"""
+import argparse
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from acquisition import LslAcquisition, SyntheticOutlet, pylsl
+from latency import percentile
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--rate", type=int, default=250)
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--probe-ms", type=int, default=50)
+    args = parser.parse_args()
+
+    if pylsl is None:
+        print("pylsl is not installed (pip install pylsl); this benchmark needs a local LSL outlet")
+        return
+
+    name = f"BenchEEG-{time.time_ns()}"
+    outlet = SyntheticOutlet(args.rate, args.channels, name=name).start()
+    acquisition = LslAcquisition(name=name).start()
+    ages, costs = [], []
+    end = time.perf_counter() + args.seconds
+    try:
+        while time.perf_counter() < end:
+            time.sleep(args.probe_ms / 1000)
+            buffer = acquisition.buffer
+            count = buffer.count
+            if count < args.rate:
+                continue
+            start = time.perf_counter()
+            window = buffer.window(count - args.rate, args.rate)
+            window.mean()
+            costs.append((time.perf_counter() - start) * 1e6)
+            ages.append((time.perf_counter() - buffer.stamp(count - 1)) * 1000)
+    finally:
+        acquisition.stop()
+        outlet.stop()
+
+    ages.sort()
+    costs.sort()
+    print(f"{args.channels} channels at {args.rate} Hz for {args.seconds:g} s")
+    print(f"received {acquisition.received} of {outlet.sent} sent, sustained {acquisition.rate():.1f} Hz, "
+          f"{acquisition.dropped} dropped, {acquisition.pulls / args.seconds:.0f} pulls/s")
+    print(f"newest sample age: p50 {percentile(ages, 50):.1f} ms, p95 {percentile(ages, 95):.1f} ms")
+    print(f"1 s window + mean: p50 {percentile(costs, 50):.1f} µs, p95 {percentile(costs, 95):.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Benchmark: P300 calibration, training, model save/load and what it buys.
+
+A copy-spelling calibration (--targets targets x --repetitions rounds over
+six words) is streamed from SyntheticEEG through P300Engine like the
+"Calibrate P300" button does, then:
+
+    train      P300Engine.train(): shrinkage LDA + leave-one-trial-out accuracy
+    save/load  P300 model file written and loaded into a fresh engine
+    online     selection accuracy on new trials, template vs calibrated
+
+The load time is what start_interface pays instead of retraining.
+
+Usage:
+    python benchmarks/bench_calibration.py [--targets N] [--repetitions R] [--snr A] [--trials T]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from p300 import Calibration, P300Engine
+from synthetic import SyntheticEEG
+
+WORDS = ["WATER", "PAIN", "YES", "NO", "HELP", "MUSIC"]
+
+
+def stream_rounds(engine, eeg, rng, rounds, attended, label=None, isi_ms=250, chunk=25):
+    """Flashes WORDS for `rounds` shuffled rounds with a P300 on attended, until every epoch is scored"""
+    fs = engine.fs
+    step = int(round(isi_ms / 1000 * fs))
+    flashes = []
+    for r in range(rounds):
+        for word in rng.permutation(WORDS):
+            flashes.append((str(word), eeg.index + fs // 4 + len(flashes) * step))
+    last = flashes[-1][1] + fs
+    while flashes or eeg.index < last + engine.length + 2 * engine.half:
+        end = eeg.index + chunk
+        while flashes and flashes[0][1] < end:
+            word, index = flashes.pop(0)
+            engine.mark(word, index / fs, label)
+            if word == attended:
+                eeg.erp(index)
+        engine.push(eeg.block(chunk), (eeg.index - 1) / fs)
+        engine.process()
+
+
+def online_accuracy(engine, eeg, rng, trials, repetitions):
+    correct = 0
+    for _ in range(trials):
+        attended = str(rng.choice(WORDS))
+        engine.reset()
+        stream_rounds(engine, eeg, rng, repetitions, attended)
+        scores = engine.scores()
+        correct += max(scores, key=scores.get) == attended
+    return correct / trials
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--targets", type=int, default=10)
+    parser.add_argument("--repetitions", type=int, default=10, help="calibration rounds per target")
+    parser.add_argument("--snr", type=float, default=0.5)
+    parser.add_argument("--trials", type=int, default=40, help="online trials per classifier")
+    parser.add_argument("--online-repetitions", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    eeg = SyntheticEEG(snr=args.snr, seed=args.seed)
+    engine = P300Engine()
+
+    calibration = Calibration(WORDS, args.targets, args.repetitions, seed=args.seed)
+    start = time.perf_counter()
+    while not calibration.done:
+        stream_rounds(engine, eeg, rng, args.repetitions, calibration.target, calibration.label())
+        calibration.position += 1
+    streamed = time.perf_counter() - start
+    epochs = len(engine.labeled()[1])
+    print(f"calibration: {args.targets} targets x {args.repetitions} rounds = {epochs} epochs "
+          f"({epochs * 0.25:.0f} s of flashing, simulated in {streamed:.1f} s), SNR {args.snr}")
+
+    start = time.perf_counter()
+    classifier, accuracy = engine.train()
+    print(f"train:  {(time.perf_counter() - start) * 1000:8.1f} ms, held-out selection accuracy {accuracy:.0%}")
+
+    template = online_accuracy(P300Engine(), eeg, rng, args.trials, args.online_repetitions)
+    engine.classifier = classifier
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "p300_model.p3m")
+        start = time.perf_counter()
+        engine.save(path, epochs, accuracy)
+        saved = (time.perf_counter() - start) * 1000
+        fresh = P300Engine()
+        start = time.perf_counter()
+        fresh.load(path)
+        loaded = (time.perf_counter() - start) * 1000
+        print(f"save:   {saved:8.2f} ms, {os.path.getsize(path):,} bytes")
+        print(f"load:   {loaded:8.2f} ms")
+    calibrated = online_accuracy(fresh, eeg, rng, args.trials, args.online_repetitions)
+    print(f"online accuracy ({args.online_repetitions} rounds, {args.trials} trials): "
+          f"template {template:.0%}, calibrated {calibrated:.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+"""
+Benchmark: chat request size and time-to-first-token over a long session.
+
+Simulates --turns question/answer turns. For each request the prompt size is
+taken from the messages that would be sent and time-to-first-token is modeled
+as --base-ms + prompt tokens / --prefill tokens per second (the endpoint's
+prompt processing). The summarizer stand-in takes --summary-ms on a
+background thread, like the real API call.
+
+    legacy    the whole conversation_history list on every call
+    budgeted  ConversationContext: summary + newest turns within --budget tokens
+
+Prints prompt tokens and modeled TTFT every --every turns, ASCII graphs of
+both over the session, and optionally writes every turn to --csv.
+
+Usage:
+    python benchmarks/bench_chat_context.py [--turns N] [--budget T] [--csv FILE]
+"""
+import argparse
+import csv
+import random
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from chatcontext import MESSAGE_OVERHEAD, ConversationContext, estimate_tokens
+
+WORDS = ("brain computer interface signal speller letter question answer patient "
+         "doctor water please thanks help today tomorrow because should would").split()
+
+
+def sentence(rng, words):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_summarizer(delay):
+    def summarize(previous, messages):
+        time.sleep(delay)
+        heads = [m["content"].split(".")[0] for m in messages if m["role"] == "user"]
+        return (previous + " Asked about: " + "; ".join(heads)).strip()
+    return summarize
+
+
+def run(turns, budget, base_ms, prefill, summary_ms, seed):
+    rng = random.Random(seed)
+    history = []
+    context = ConversationContext(make_summarizer(summary_ms / 1000.0), budget=budget)
+    rows = []
+    for turn in range(turns):
+        prompt = sentence(rng, rng.randint(6, 14)) + " Instruction: Respond briefly and in the language of the prompt."
+        answer = " ".join(sentence(rng, rng.randint(8, 20)) for _ in range(rng.randint(3, 8)))
+
+        history.append({"role": "user", "content": prompt})
+        start = time.perf_counter()
+        legacy_tokens = sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in history)
+        legacy_build = (time.perf_counter() - start) * 1000
+
+        context.append("user", prompt)
+        start = time.perf_counter()
+        context.messages()
+        budget_tokens = context.prompt_tokens()
+        budget_build = (time.perf_counter() - start) * 1000
+
+        rows.append({
+            "turn": turn + 1,
+            "legacy_tokens": legacy_tokens,
+            "legacy_ttft_ms": base_ms + legacy_tokens / prefill * 1000 + legacy_build,
+            "budgeted_tokens": budget_tokens,
+            "budgeted_ttft_ms": base_ms + budget_tokens / prefill * 1000 + budget_build,
+        })
+        history.append({"role": "assistant", "content": answer})
+        context.append("assistant", answer)
+        # Time for the user to read the answer and spell the next question
+        time.sleep(summary_ms / 1000.0 / 4)
+    return rows, context
+
+
+def graph(rows, key, top, width=60, height=8):
+    """ASCII graph of one column up to `top`, one character per bucket of turns"""
+    bucket = max(1, len(rows) // width)
+    values = [max(r[key] for r in rows[i:i + bucket]) for i in range(0, len(rows), bucket)]
+    lines = []
+    for level in range(height, 0, -1):
+        threshold = top * (level - 0.5) / height
+        label = f"{int(top * level / height):>7} |" if level in (height, 1) else "        |"
+        lines.append(label + "".join("#" if v >= threshold else " " for v in values))
+    lines.append("        +" + "-" * len(values))
+    return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--budget", type=int, default=3000, help="context tokens for recent turns")
+    parser.add_argument("--base-ms", type=float, default=150.0, help="modeled TTFT with an empty prompt")
+    parser.add_argument("--prefill", type=float, default=8000.0, help="modeled prompt tokens per second")
+    parser.add_argument("--summary-ms", type=float, default=40.0, help="summarizer call duration")
+    parser.add_argument("--every", type=int, default=30)
+    parser.add_argument("--csv", help="write per-turn rows to this file")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rows, context = run(args.turns, args.budget, args.base_ms, args.prefill, args.summary_ms, args.seed)
+
+    print(f"{args.turns} turns, budget {args.budget} tokens, TTFT = {args.base_ms:g} ms + tokens / {args.prefill:g}/s")
+    print(f"{'turn':>5} {'legacy tok':>11} {'legacy ms':>10} {'budget tok':>11} {'budget ms':>10}")
+    for row in rows:
+        if row["turn"] % args.every == 0 or row["turn"] == len(rows):
+            print(f"{row['turn']:>5} {row['legacy_tokens']:>11,} {row['legacy_ttft_ms']:>10.0f} "
+                  f"{row['budgeted_tokens']:>11,} {row['budgeted_ttft_ms']:>10.0f}")
+    print(f"summaries: {context.summaries}, dropped: {context.dropped}, held messages: {len(context)}")
+    for unit, suffix in (("prompt tokens", "tokens"), ("modeled TTFT ms", "ttft_ms")):
+        top = max(max(r["legacy_" + suffix] for r in rows), 1)
+        for name in ("legacy", "budgeted"):
+            print(f"\n{unit}, {name}")
+            print(graph(rows, f"{name}_{suffix}", top))
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"\nWrote {len(rows)} rows to {args.csv}")
+
+
+if __name__ == "__main__":
+    main()
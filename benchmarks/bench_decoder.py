@@ -0,0 +1,137 @@
+"""
+Benchmark: Intendix BoardItem decoding, legacy heuristic scan vs single-pass record walker.
+
+Usage:
+    python benchmarks/bench_decoder.py [packet files...] [--repeat N] [--shared-strings]
+
+Each packet file is a capture (see capture.py) or holds one raw datagram. Without files, packets are synthesized
+with intendix.encode_board_item for every character of the speller alphabet. Synthesized packets write every
+string out, so the two decoders are compared on packets both can read (the legacy scan cannot follow the
+MemberReference records the speller uses for repeated strings); --shared-strings synthesizes those instead.
+Packets the decoders read differently are listed: the legacy scan reads a string record's id bytes as a
+string, which cuts multi-byte UTF-8 characters (accents, ñ, ¿, ¡) in half.
+"""
+import argparse
+import time
+import tracemalloc
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from capture import is_capture_file, read_capture
+from intendix import (ALLOWED_CHARS, clean_character, deserialize_board_item,
+                      encode_board_item, make_board_item, read_uleb128)
+
+
+# ----------------- Legacy decoder (as shipped before the record walker) -----------------
+def legacy_parse_dotnet_string(data, offset):
+    if offset >= len(data):
+        return None, offset
+    if data[offset] == 0x06:
+        offset += 1
+        if offset >= len(data):
+            return None, offset
+        try:
+            length, offset = read_uleb128(data, offset)
+        except ValueError:
+            return None, offset
+        if offset + length > len(data):
+            return None, offset
+        string_bytes = data[offset:offset + length]
+        offset += length
+        try:
+            return string_bytes.decode('utf-8'), offset
+        except UnicodeDecodeError:
+            return None, offset
+    return None, offset
+
+
+def legacy_deserialize(data):
+    strings_found = []
+    for i in range(len(data) - 50):
+        if data[i] == 0x06:
+            string_val, _ = legacy_parse_dotnet_string(data, i)
+            if string_val is not None:
+                strings_found.append(string_val)
+    if len(strings_found) >= 3:
+        return clean_character(strings_found[2])
+    return None
+
+
+def legacy_listener_path(data):
+    # The listener ran the scan once in deserialize_board_item and again on the backup path
+    char = legacy_deserialize(data)
+    if char is None:
+        char = legacy_deserialize(data)
+    return char
+
+
+def walker_listener_path(data):
+    item = deserialize_board_item(data)
+    return item.output_text if item else None
+
+
+# ----------------- Measurement -----------------
+def throughput(decode, packets, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for p in packets:
+            decode(p)
+    elapsed = time.perf_counter() - start
+    return repeat * len(packets) / elapsed
+
+
+def peak_allocation(decode, packets):
+    """Average peak bytes allocated while decoding one packet (tracemalloc)"""
+    tracemalloc.start()
+    peak_total = 0
+    for p in packets:
+        tracemalloc.reset_peak()
+        base = tracemalloc.get_traced_memory()[0]
+        decode(p)
+        peak_total += tracemalloc.get_traced_memory()[1] - base
+    tracemalloc.stop()
+    return peak_total / len(packets)
+
+
+def load_packets(paths, share_strings=False):
+    if paths:
+        packets = []
+        for path in paths:
+            if is_capture_file(path):
+                packets.extend(data for _, _, data in read_capture(path))
+            else:
+                with open(path, 'rb') as f:
+                    packets.append(f.read())
+        return packets
+    chars = sorted(c for c in ALLOWED_CHARS)
+    return [encode_board_item(make_board_item(c), share_strings) for c in chars]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("packets", nargs="*", help="capture files or raw datagram files")
+    parser.add_argument("--repeat", type=int, default=200)
+    parser.add_argument("--shared-strings", action="store_true",
+                        help="synthesize packets with repeated strings as references (walker only)")
+    args = parser.parse_args()
+
+    packets = load_packets(args.packets, args.shared_strings)
+    sizes = [len(p) for p in packets]
+    print(f"{len(packets)} packets, {min(sizes)}-{max(sizes)} bytes")
+
+    results = [(legacy_listener_path(p), walker_listener_path(p)) for p in packets]
+    decoded = sum(1 for _, walker in results if walker)
+    differ = [(legacy, walker) for legacy, walker in results if legacy != walker]
+    print(f"walker decoded {decoded}/{len(packets)}, legacy agrees on {len(packets) - len(differ)}/{len(packets)}")
+    if differ:
+        print("differ (legacy/walker): " + " ".join(f"{legacy!r}/{walker!r}" for legacy, walker in differ[:20]))
+    print()
+
+    print(f"{'decoder':<10} {'packets/s':>12} {'peak B/pkt':>12}")
+    for name, decode in (("legacy", legacy_listener_path), ("walker", walker_listener_path)):
+        rate = throughput(decode, packets, args.repeat)
+        peak = peak_allocation(decode, packets)
+        print(f"{name:<10} {rate:>12,.0f} {peak:>12,.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,224 @@
+"""
+Benchmark: end to end, from a spelled phrase to the streamed answer on screen.
+
+mockllm.py runs in a child process (--ttft-ms, --token-ms, --tokens,
+--error-rate, --rpm) and a service.SpellerService with one session per user
+talks to it through a single llmclient.LLMClient (--limit requests in
+flight). Every user, on a thread of its own, spells a phrase to its
+session's UDP port (one selection per --char-ms), ends it with '!', waits
+for the question menu, reads it for --read-ms, spells the digit of one of
+the first questions, waits for the whole answer on screen and starts over,
+for --rounds rounds.
+
+Reports, per number of users, percentiles of
+
+    menu     '!' sent -> question menu shown
+    ttft     digit sent -> first answer text on screen
+    answer   digit sent -> whole answer on screen
+    lag      how late a 10 ms heartbeat on the sessions' event loop runs (UI lag)
+
+and the client's retries and the server's 429s and errors. --prefetch is
+the number of menu answers fetched ahead (config.ini [questions] prefetch).
+Console output of the sessions is discarded.
+
+Usage:
+    python benchmarks/bench_e2e.py [--users 1 4 16] [--rounds N] [--prefetch N] [--error-rate F] [--rpm N]
+"""
+import argparse
+import asyncio
+import contextlib
+import os
+import random
+import socket
+import tempfile
+import threading
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+import core
+import mockllm
+from core import ConsoleView
+from intendix import encode_board_item, make_board_item
+from latency import percentile
+from llmclient import LLMClient
+from service import SpellerService
+
+WORDS = ["WATER", "PAIN", "MUSIC", "FAMILY", "SLEEP", "DOCTOR", "WEATHER", "FOOD"]
+VIEWS = {}
+
+
+class BenchStream:
+    """Answer renderer stand-in: stamps the first piece and the end as the loop shows them"""
+
+    def __init__(self, view, after):
+        self.view = view
+        self.after = after
+        self.cancelled = False
+
+    def feed(self, text):
+        if text and not self.cancelled:
+            self.after(0, self._show)
+
+    def _show(self):
+        if not self.cancelled and self.view.first_at is None:
+            self.view.first_at = time.perf_counter()
+
+    def close(self, on_done=None):
+        def done():
+            if on_done is not None:
+                on_done()
+            self.view.done_at = time.perf_counter()
+            self.view.answered.set()
+        if not self.cancelled:
+            self.after(0, done)
+
+    def cancel(self):
+        self.cancelled = True
+
+
+class BenchView(ConsoleView):
+    def __init__(self, name=None):
+        super().__init__(name)
+        VIEWS[name] = self
+        self.menu_shown = threading.Event()
+        self.answered = threading.Event()
+        self.menu_at = self.first_at = self.done_at = None
+
+    def expect(self):
+        self.menu_shown.clear()
+        self.answered.clear()
+        self.menu_at = self.first_at = self.done_at = None
+
+    def status(self, text):
+        pass
+
+    def chat(self, text, tag):
+        if "GENERATED QUESTIONS" in text and self.menu_at is None:
+            self.menu_at = time.perf_counter()
+            self.menu_shown.set()
+
+    def answer_stream(self, after):
+        return BenchStream(self, after)
+
+
+def phrase_for(user, round_no):
+    """A new topic every round (no digits: they would select from the menu)"""
+    n = user * 100 + round_no
+    tag = chr(65 + n // 26 % 26) + chr(65 + n % 26)
+    return f"{WORDS[(user + round_no) % len(WORDS)]} {tag}"
+
+
+def user_thread(name, port, args, seed, results):
+    rng = random.Random(seed)
+    view = VIEWS[name]
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    time.sleep(rng.uniform(0, args.char_ms / 1000 * 4))  # users don't start in lockstep
+
+    def spell(char):
+        sock.sendto(encode_board_item(make_board_item(char)), ("127.0.0.1", port))
+        return time.perf_counter()
+
+    for round_no in range(args.rounds):
+        view.expect()
+        for char in phrase_for(seed, round_no):
+            spell(char)
+            time.sleep(args.char_ms / 1000)
+        sent = spell("!")
+        if not view.menu_shown.wait(args.wait):
+            results["lost"].append(round_no)
+            continue
+        results["menu"].append((view.menu_at - sent) * 1000)
+        time.sleep(args.read_ms / 1000)
+        digit = str(min(6, 1 + int(rng.expovariate(0.8))))  # mostly one of the first questions
+        sent = spell(digit)
+        if not view.answered.wait(args.wait):
+            results["lost"].append(round_no)
+            continue
+        if view.first_at is not None:
+            results["ttft"].append((view.first_at - sent) * 1000)
+        results["answer"].append((view.done_at - sent) * 1000)
+        time.sleep(args.char_ms / 1000)
+    sock.close()
+
+
+async def run(users, args, base_url):
+    VIEWS.clear()
+    client = LLMClient("mock-api-key-0123", base_url=base_url, max_concurrency=args.limit, timeout=30)
+    service = SpellerService([(f"u{i}", 0) for i in range(users)], host="127.0.0.1", workers=args.workers,
+                             view=BenchView, client=client)
+    await service.start()
+    loop = asyncio.get_running_loop()
+    lags = []
+    stopping = asyncio.Event()
+
+    async def heartbeat():
+        while not stopping.is_set():
+            planned = loop.time() + 0.01
+            await asyncio.sleep(0.01)
+            lags.append(max(0.0, loop.time() - planned) * 1000)
+
+    beat = asyncio.ensure_future(heartbeat())
+    results = {"menu": [], "ttft": [], "answer": [], "lost": []}
+    threads = [threading.Thread(target=user_thread, args=(name, service.ports[name], args, i, results))
+               for i, name in enumerate(service.sessions)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        await loop.run_in_executor(None, t.join)
+    stopping.set()
+    await beat
+    retries = client.retries
+    service.close()
+    return results, sorted(lags), retries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, nargs="*", default=[1, 4, 16])
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--char-ms", type=int, default=200, help="time per speller selection")
+    parser.add_argument("--read-ms", type=int, default=1000, help="time to read the menu before spelling the digit")
+    parser.add_argument("--prefetch", type=int, default=core.PREFETCH_TOP_K if core.PREFETCH_TOP_K is not None else 9)
+    parser.add_argument("--limit", type=int, default=8, help="API requests in flight (client)")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--ttft-ms", type=int, default=300)
+    parser.add_argument("--ttft-jitter-ms", type=int, default=100)
+    parser.add_argument("--token-ms", type=int, default=20)
+    parser.add_argument("--tokens", type=int, default=60)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--rpm", type=int, default=0, help="server rate limit, requests per minute (0 = none)")
+    parser.add_argument("--wait", type=float, default=30, help="seconds before a menu or answer counts as lost")
+    args = parser.parse_args()
+
+    core.PREFETCH_TOP_K = args.prefetch
+    server, base_url = mockllm.start_process(ttft_ms=args.ttft_ms, ttft_jitter_ms=args.ttft_jitter_ms,
+                                             token_ms=args.token_ms, tokens=args.tokens,
+                                             error_rate=args.error_rate, rpm=args.rpm)
+    print(f"mock API: ttft {args.ttft_ms}±{args.ttft_jitter_ms} ms, {args.tokens} x {args.token_ms} ms, "
+          f"{args.error_rate:.0%} 5xx" + (f", {args.rpm} rpm" if args.rpm else "")
+          + f" | {args.rounds} rounds/user, {args.char_ms} ms/char, prefetch {args.prefetch}, limit {args.limit}")
+    print(f"{'users':>5} {'menu p50':>9} {'p95':>6} {'ttft p50':>9} {'p95':>6} {'p99':>6} {'answer p50':>11} "
+          f"{'p95':>6} {'lag p50':>8} {'p99':>6} {'max':>6} {'retries':>8} {'429s':>5} {'5xx':>5} {'lost':>5}")
+    cwd = os.getcwd()
+    for users in args.users:
+        before = mockllm.fetch_stats(base_url)
+        # Fresh question cache and predictive text files per run, outside the repo
+        with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            os.chdir(tmp)
+            try:
+                results, lags, retries = asyncio.run(run(users, args, base_url))
+            finally:
+                os.chdir(cwd)
+        after = mockllm.fetch_stats(base_url)
+        menu, ttft, answer = (sorted(results[k]) for k in ("menu", "ttft", "answer"))
+        print(f"{users:>5} {percentile(menu, 50):>9.0f} {percentile(menu, 95):>6.0f} "
+              f"{percentile(ttft, 50):>9.0f} {percentile(ttft, 95):>6.0f} {percentile(ttft, 99):>6.0f} "
+              f"{percentile(answer, 50):>11.0f} {percentile(answer, 95):>6.0f} "
+              f"{percentile(lags, 50):>8.1f} {percentile(lags, 99):>6.1f} {lags[-1] if lags else 0:>6.1f} "
+              f"{retries:>8} {after['rate_limited'] - before['rate_limited']:>5} "
+              f"{after['errors'] - before['errors']:>5} {len(results['lost']):>5}")
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""
+Benchmark: UDP ingest under a synthetic flood from a local sender process.
+
+Compares the legacy blocking recvfrom loop with ingest.UdpIngest and reports
+packets/s received, loss, receiver CPU per 1k packets and stop latency.
+
+Usage:
+    python benchmarks/bench_ingest.py [--count N] [--decode]
+"""
+import argparse
+import multiprocessing
+import socket
+import threading
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from ingest import MAX_DATAGRAM, UdpIngest
+from intendix import decode_board_item, encode_board_item, make_board_item
+
+
+def flood(port, count, ready):
+    """Sender process: sends count BoardItem packets as fast as possible"""
+    packets = [encode_board_item(make_board_item(c)) for c in "HELLO WORLD!"]
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    ready.wait()
+    for i in range(count):
+        sock.sendto(packets[i % len(packets)], ("127.0.0.1", port))
+    sock.close()
+
+
+class Counter:
+    def __init__(self, decode):
+        self.decode = decode
+        self.packets = 0
+        self.first = None
+        self.last = None
+
+    def datagram(self, data):
+        now = time.perf_counter()
+        if self.first is None:
+            self.first = now
+        self.last = now
+        self.packets += 1
+        if self.decode:
+            decode_board_item(data)
+
+    def batch(self, batch):
+        for data, _, _ in batch:
+            self.datagram(data)
+
+
+class LegacyReceiver:
+    """The blocking loop intendix_listener used before the ingest engine"""
+
+    def __init__(self, counter):
+        self.counter = counter
+        self.running = True
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        self.sock.bind(("127.0.0.1", 0))
+        self.port = self.sock.getsockname()[1]
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        while self.running:
+            try:
+                data, addr = self.sock.recvfrom(MAX_DATAGRAM)
+            except OSError:
+                break
+            self.counter.datagram(data)
+
+    def stop(self):
+        self.running = False
+        self.thread.join(1.0)
+        stopped = not self.thread.is_alive()
+        self.sock.close()
+        return stopped
+
+
+class IngestReceiver:
+    def __init__(self, counter):
+        self.ingest = UdpIngest(counter.batch, "127.0.0.1", [0])
+        self.ingest.start()
+        self.port = self.ingest.addresses[0][1]
+
+    def stop(self):
+        self.ingest.stop(1.0)
+        return not self.ingest.running
+
+
+def run(name, receiver_cls, count, decode):
+    counter = Counter(decode)
+    receiver = receiver_cls(counter)
+    ready = multiprocessing.Event()
+    sender = multiprocessing.Process(target=flood, args=(receiver.port, count, ready))
+    sender.start()
+
+    cpu_start = time.process_time()
+    ready.set()
+    sender.join()
+    # Let the receiver drain what is still queued in the socket buffer
+    idle_since = time.perf_counter()
+    seen = counter.packets
+    while time.perf_counter() - idle_since < 0.2:
+        time.sleep(0.02)
+        if counter.packets != seen:
+            seen = counter.packets
+            idle_since = time.perf_counter()
+    cpu = time.process_time() - cpu_start
+
+    stop_start = time.perf_counter()
+    stopped = receiver.stop()
+    stop_ms = (time.perf_counter() - stop_start) * 1000
+
+    received = counter.packets
+    span = (counter.last - counter.first) if received > 1 else float("nan")
+    rate = received / span if span else 0.0
+    loss = 100.0 * (count - received) / count
+    cpu_per_k = 1000.0 * cpu / received if received else float("nan")
+    stop_text = f"{stop_ms:.1f} ms" if stopped else "blocked (>1 s)"
+    print(f"{name:<8} {received:>9,} {rate:>12,.0f} {loss:>7.1f}% {cpu_per_k * 1000:>12.1f} {stop_text:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000)
+    parser.add_argument("--decode", action="store_true", help="decode every packet in the receiver")
+    args = parser.parse_args()
+
+    print(f"{args.count:,} packets, decode={'on' if args.decode else 'off'}")
+    print(f"{'receiver':<8} {'received':>9} {'packets/s':>12} {'loss':>8} {'CPU ms/1k':>12} {'stop':>16}")
+    run("legacy", LegacyReceiver, args.count, args.decode)
+    run("ingest", IngestReceiver, args.count, args.decode)
+
+
+if __name__ == "__main__":
+    main()
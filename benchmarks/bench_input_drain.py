@@ -0,0 +1,171 @@
+"""
+Benchmark: speller input draining under bursty replayed input.
+
+Bursts of BoardItem datagrams are replayed over UDP into a UdpIngest, decoded
+and queued, then consumed by a Tk-like single-threaded callback loop where
+every UI update costs --ui-cost ms. Compared policies:
+
+    legacy  two queues polled every 50 ms, one phrase or one char per tick
+    drain   one ordered InputQueue that wakes the loop and drains everything
+
+Reports queueing delay (decoded -> handled) percentiles, order violations and
+events still pending when the replay ends.
+
+Usage:
+    python benchmarks/bench_input_drain.py [--bursts N] [--burst-size K] [--gap S] [--ui-cost MS]
+"""
+import argparse
+import queue
+import time
+
+from common import CallbackLoop  # also puts the repo root on sys.path
+from capture import replay
+from ingest import UdpIngest
+from inputqueue import CHAR, PHRASE, InputQueue
+from intendix import clean_character, decode_board_item, encode_board_item, make_board_item
+from latency import percentile
+
+WORDS = ["HELLO", "HOW", "ARE", "YOU", "WATER", "PLEASE", "THANKS", "DOCTOR"]
+
+
+class Recorder:
+    def __init__(self, ui_cost):
+        self.ui_cost = ui_cost / 1000.0
+        self.delays = []
+        self.order = []
+        self.ui_updates = 0
+
+    def handled(self, seq, queued_at):
+        self.delays.append((time.perf_counter() - queued_at) * 1000)
+        self.order.append(seq)
+
+    def ui_update(self):
+        self.ui_updates += 1
+        time.sleep(self.ui_cost)
+
+
+def bursty_records(bursts, burst_size, gap, port):
+    """Bursts of burst_size selections arriving together, phrases ending with '!'"""
+    text = ""
+    i = 0
+    while len(text) < bursts * burst_size:
+        text += WORDS[i % len(WORDS)] + "!"
+        i += 1
+    text = text[:bursts * burst_size]
+    records = []
+    for n, c in enumerate(text):
+        burst = n // burst_size
+        records.append((int(burst * gap * 1e9) + (n % burst_size) * 1000, port, encode_board_item(make_board_item(c))))
+    return records
+
+
+class Producer:
+    """Decodes datagrams like handle_intendix_batch and hands events to a sink"""
+
+    def __init__(self, sink):
+        self.sink = sink
+        self.seq = 0
+        self.buffer = ""
+
+    def batch(self, batch):
+        events = []
+        now = time.perf_counter()
+        for data, _, _ in batch:
+            char = clean_character(decode_board_item(data).output_text)
+            if not char:
+                continue
+            events.append((CHAR, (self.seq, now, char)))
+            self.seq += 1
+            self.buffer += char
+            if char == "!":
+                events.append((PHRASE, (self.seq, now, self.buffer[:-1])))
+                self.seq += 1
+                self.buffer = ""
+        self.sink(events)
+
+
+def run_legacy(loop, recorder):
+    chars = queue.Queue()
+    phrases = queue.Queue()
+
+    def sink(events):
+        for kind, value in events:
+            (phrases if kind == PHRASE else chars).put(value)
+
+    def process(value):
+        recorder.handled(value[0], value[1])
+        recorder.ui_update()
+
+    def tick():
+        try:
+            value = phrases.get_nowait()
+            loop.after(0, lambda v=value: process(v))
+        except queue.Empty:
+            try:
+                value = chars.get_nowait()
+                loop.after(0, lambda v=value: process(v))
+            except queue.Empty:
+                pass
+        loop.after(50, tick)
+
+    loop.after(50, tick)
+    return sink, lambda: chars.qsize() + phrases.qsize()
+
+
+def run_drain(loop, recorder):
+    def drain():
+        events = pending.drain()
+        for kind, value, _ in events:
+            recorder.handled(value[0], value[1])
+            if kind == PHRASE:
+                recorder.ui_update()
+        recorder.ui_update()
+
+    pending = InputQueue(wake=lambda: loop.after(0, drain))
+
+    def sink(events):
+        if events:
+            pending.put_many([(kind, value, None) for kind, value in events])
+
+    return sink, lambda: len(pending)
+
+
+def run(name, policy, records, ui_cost, gap):
+    loop = CallbackLoop()
+    recorder = Recorder(ui_cost)
+    sink, backlog = policy(loop, recorder)
+    producer = Producer(sink)
+    ingest = UdpIngest(producer.batch, "127.0.0.1", [0])
+    ingest.start()
+    port = ingest.addresses[0][1]
+
+    replay(records, "127.0.0.1", port, speed=1.0)
+    time.sleep(gap)
+    left = backlog()
+    ingest.stop()
+    loop.stop()
+
+    delays = sorted(recorder.delays)
+    violations = sum(1 for a, b in zip(recorder.order, recorder.order[1:]) if b < a)
+    print(f"{name:<7} {len(delays):>7} {percentile(delays, 50):>9.1f} {percentile(delays, 95):>9.1f} "
+          f"{(delays[-1] if delays else 0):>9.1f} {violations:>8} {left:>8} {recorder.ui_updates:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bursts", type=int, default=20)
+    parser.add_argument("--burst-size", type=int, default=12)
+    parser.add_argument("--gap", type=float, default=0.5, help="seconds between bursts")
+    parser.add_argument("--ui-cost", type=float, default=3.0, help="ms per UI update")
+    args = parser.parse_args()
+
+    records = bursty_records(args.bursts, args.burst_size, args.gap, 0)
+    print(f"{len(records)} selections in {args.bursts} bursts of {args.burst_size}, "
+          f"{args.gap:g} s apart, {args.ui_cost:g} ms per UI update")
+    print(f"{'policy':<7} {'handled':>7} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'order':>8} {'backlog':>8} {'updates':>8}")
+    run("legacy", run_legacy, records, args.ui_cost, args.gap)
+    run("drain", run_drain, records, args.ui_cost, args.gap)
+
+
+if __name__ == "__main__":
+    main()
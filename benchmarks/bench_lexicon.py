@@ -0,0 +1,97 @@
+"""
+Benchmark: startup and per-keystroke completion over a large lexicon.
+
+Every word of the test phrases is typed letter by letter; after each letter
+the top-8 completions are computed.
+
+    list     all words loaded into Python (word, frequency) tuples, linear
+             startswith scan + sort per keystroke (suggest_auto_completion's
+             approach, scaled up to the lexicon)
+    mmap     LexiconIndex over the memory-mapped lexicon file
+
+Reports startup time, Python heap held after startup (tracemalloc) and
+per-keystroke latency percentiles. Without --lexicon a temporary one is
+built from the wordfreq package (English + Spanish, --top words each).
+
+Usage:
+    python benchmarks/bench_lexicon.py [--lexicon FILE] [--top N]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from latency import percentile
+from lexicon import LexiconIndex, build, normalize_word, read_wordfreq
+
+PHRASES = [
+    "QUIERO AGUA POR FAVOR", "LLAMA A MI HIJA", "TENGO DOLOR DE ESPALDA", "I WANT TO SLEEP",
+    "WHAT IS THE WEATHER TODAY", "PLEASE OPEN THE WINDOW", "NECESITO MI MEDICAMENTO",
+    "INTERNATIONAL NEWS", "CONVERSACIÓN CON EL MÉDICO", "MAÑANA QUIERO SALIR",
+]
+
+
+def load_list(path):
+    """Every word and frequency as Python objects, as a plain word list would be used"""
+    index = LexiconIndex(path)
+    words = list(index.items())
+    index.close()
+    return words
+
+
+def list_complete(words, prefix, k=8):
+    key = normalize_word(prefix)
+    matches = [(w, f) for w, f in words if w.startswith(key)]
+    matches.sort(key=lambda m: -m[1])
+    return [w for w, _ in matches[:k]]
+
+
+def keystrokes():
+    for phrase in PHRASES:
+        for word in phrase.split():
+            for i in range(1, len(word) + 1):
+                yield word[:i]
+
+
+def measure(name, setup, complete):
+    tracemalloc.start()
+    start = time.perf_counter()
+    state = setup()
+    startup = (time.perf_counter() - start) * 1000
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    times = []
+    for prefix in keystrokes():
+        start = time.perf_counter()
+        complete(state, prefix)
+        times.append((time.perf_counter() - start) * 1e6)
+    times.sort()
+    print(f"{name:<5} {startup:>11.1f} {held / 1e6:>10.1f} {percentile(times, 50):>10.1f} "
+          f"{percentile(times, 95):>10.1f} {times[-1]:>10.1f}")
+    return state
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--lexicon", help="lexicon file built with lexicon.py")
+    parser.add_argument("--top", type=int, default=100000, help="wordfreq words per language for a temporary lexicon")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.lexicon
+        if path is None:
+            path = os.path.join(tmp, "lexicon.lex")
+            count = build(read_wordfreq(["en", "es"], args.top), path)
+            print(f"Built a temporary lexicon of {count} words (wordfreq en+es)")
+        print(f"{os.path.getsize(path) / 1e6:.1f} MB lexicon, {sum(1 for _ in keystrokes())} keystrokes")
+        print(f"{'index':<5} {'startup ms':>11} {'heap MB':>10} {'p50 µs':>10} {'p95 µs':>10} {'max µs':>10}")
+        measure("list", lambda: load_list(path), list_complete)
+        index = measure("mmap", lambda: LexiconIndex(path), lambda index, prefix: index.complete(prefix))
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
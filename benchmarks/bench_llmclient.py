@@ -0,0 +1,150 @@
+"""
+Benchmark: LLM client throughput and tail latency against a local stand-in API.
+
+mockllm.py (the chat completions stand-in) runs in a separate process. It
+answers after --ttft-ms (streams: --tokens events --token-ms apart), fails
+--error-rate of requests with 500/503, answers 429 while more than --capacity
+requests are in flight (a rate limit), and delays every new connection by
+--connect-ms (the TCP + TLS handshake a real API costs). --callers threads
+call it back to back for --seconds, each call with a --deadline:
+
+    per-request  a new connection per call, no limit, no retries
+    pooled       llmclient.LLMClient, keep-alive + retries, limit = callers
+    bounded      llmclient.LLMClient, keep-alive + retries, limit = --limit
+
+Reports successful calls/s, failed calls, latency percentiles of successful
+calls (for streams: until the last event), connections opened and retries.
+
+Usage:
+    python benchmarks/bench_llmclient.py [--callers N] [--limit N] [--stream] [--error-rate F]
+"""
+import argparse
+import contextlib
+import http.client
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+import mockllm
+from latency import percentile
+from llmclient import LLMClient
+
+MESSAGES = [{"role": "user", "content": "Topics: water. Generate 6 short questions."}]
+
+
+class PerRequest:
+    """A new connection for every call, no retries, no limit"""
+
+    def __init__(self, base_url, timeout):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.port = parts.port
+        self.path = parts.path + "/chat/completions"
+        self.timeout = timeout
+        self.opened = 0
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    def call(self, stream):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=self.timeout)
+        with self._lock:
+            self.opened += 1
+        try:
+            body = json.dumps({"model": "m", "messages": MESSAGES, "stream": stream})
+            conn.request("POST", self.path, body, {"Content-Type": "application/json"})
+            resp = conn.getresponse()
+            payload = resp.read()
+            if resp.status != 200:
+                raise RuntimeError(f"HTTP {resp.status}")
+            return payload
+        finally:
+            conn.close()
+
+
+class Pooled:
+    def __init__(self, base_url, limit, deadline):
+        self.client = LLMClient("key", base_url=base_url, max_concurrency=limit, timeout=deadline)
+
+    @property
+    def opened(self):
+        return self.client.pool.opened
+
+    @property
+    def retries(self):
+        return self.client.retries
+
+    def call(self, stream):
+        result = self.client.chat.completions.create(model="m", messages=MESSAGES, stream=stream)
+        if stream:
+            for _ in result:
+                pass
+        return result
+
+
+def run(name, client, args):
+    latencies, failed = [], [0]
+    lock = threading.Lock()
+    stop_at = time.perf_counter() + args.seconds
+
+    def caller():
+        while time.perf_counter() < stop_at:
+            start = time.perf_counter()
+            try:
+                client.call(args.stream)
+            except Exception:
+                with lock:
+                    failed[0] += 1
+                continue
+            with lock:
+                latencies.append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=caller) for _ in range(args.callers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    latencies.sort()
+    return (f"{name:<12} {len(latencies) / args.seconds:>7.1f} {failed[0]:>7} {percentile(latencies, 50):>8.0f} "
+          f"{percentile(latencies, 95):>8.0f} {percentile(latencies, 99):>8.0f} "
+          f"{latencies[-1] if latencies else 0:>8.0f} {client.opened:>6} {client.retries:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--callers", type=int, default=32)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--deadline", type=float, default=10, help="seconds per call")
+    parser.add_argument("--stream", action="store_true", help="streamed answers instead of question lists")
+    parser.add_argument("--ttft-ms", type=int, default=200)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-ms", type=int, default=10)
+    parser.add_argument("--error-rate", type=float, default=0.05)
+    parser.add_argument("--capacity", type=int, default=12, help="requests in flight before the stand-in answers 429")
+    parser.add_argument("--connect-ms", type=int, default=60)
+    args = parser.parse_args()
+
+    server, base_url = mockllm.start_process(ttft_ms=args.ttft_ms, tokens=args.tokens, token_ms=args.token_ms,
+                                             error_rate=args.error_rate, max_concurrent=args.capacity,
+                                             connect_ms=args.connect_ms)
+
+    print(f"{args.callers} callers for {args.seconds:g} s, stand-in: ttft {args.ttft_ms} ms"
+          + (f", {args.tokens} x {args.token_ms} ms" if args.stream else "")
+          + f", {args.error_rate:.0%} 5xx, 429 above {args.capacity} in flight, {args.connect_ms} ms per connection")
+    print(f"{'client':<12} {'ok/s':>7} {'failed':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'conns':>6} {'retries':>8}")
+    for name, client in (("per-request", PerRequest(base_url, args.deadline)),
+                         ("pooled", Pooled(base_url, args.callers, args.deadline)),
+                         ("bounded", Pooled(base_url, args.limit, args.deadline))):
+        # Retry messages go to the console; keep the table readable
+        with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            row = run(name, client, args)
+        print(row)
+    server.terminate()
+
+
+if __name__ == "__main__":
+    main()
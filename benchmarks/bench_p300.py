@@ -0,0 +1,94 @@
+"""
+Benchmark: P300 engine per-epoch cost and selection accuracy.
+
+A synthetic 8-channel stream (synthetic.SyntheticEEG: 1/f background with
+alpha, line noise, P300 after every flash of the target at --snr) is fed in
+chunks of --chunk samples, with flashes every --isi-ms in shuffled rounds over --options
+candidates, as run_interface does in graph mode. Each trial runs until
+P300Engine.decide() returns a candidate.
+
+Reports selection accuracy, seconds per selection, per-epoch processing
+time percentiles against the inter-stimulus interval, and the cost of one
+push+process call (the loop's per-chunk work).
+
+Usage:
+    python benchmarks/bench_p300.py [--trials N] [--options K] [--snr A] [--isi-ms MS]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from latency import percentile
+from p300 import P300Engine
+from synthetic import SyntheticEEG
+
+
+def trial(engine, eeg, rng, options, target, args):
+    """Streams until the engine decides; returns (choice, seconds of signal, per-chunk ms list)"""
+    fs, chunk = engine.fs, args.chunk
+    step = int(round(args.isi_ms / 1000 * fs))
+    first = eeg.index + fs // 2
+    flashes = []
+    for r in range(60 * 1000 // (args.isi_ms * len(options))):
+        for c in rng.permutation(options):
+            flashes.append((int(c), first + len(flashes) * step))
+    costs = []
+    begin_index = eeg.index
+    while flashes:
+        end = eeg.index + chunk
+        while flashes and flashes[0][1] < end:
+            c, index = flashes.pop(0)
+            engine.mark(c, index / fs)
+            if c == target:
+                eeg.erp(index)
+        samples = eeg.block(chunk)
+        begin = time.perf_counter()
+        engine.push(samples, (eeg.index - 1) / fs)
+        engine.process()
+        costs.append((time.perf_counter() - begin) * 1000)
+        choice = engine.decide(options)
+        if choice is not None:
+            return choice, (eeg.index - begin_index) / fs, costs
+    engine.reset()
+    return None, (eeg.index - begin_index) / fs, costs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=40)
+    parser.add_argument("--options", type=int, default=6, help="candidates flashed")
+    parser.add_argument("--snr", type=float, default=0.5, help="P300 peak amplitude over background RMS")
+    parser.add_argument("--isi-ms", type=int, default=250)
+    parser.add_argument("--chunk", type=int, default=25, help="samples per pushed chunk")
+    parser.add_argument("--repetitions", type=int, default=10, help="most rounds per selection")
+    parser.add_argument("--threshold", type=float, default=0.95, help="dynamic stopping posterior (0 = fixed rounds)")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    engine = P300Engine(repetitions=args.repetitions, threshold=args.threshold)
+    eeg = SyntheticEEG(engine.fs, engine.channels, snr=args.snr, seed=args.seed)
+    options = list(range(args.options))
+    correct, seconds, chunk_costs = 0, [], []
+    for _ in range(args.trials):
+        target = int(rng.integers(args.options))
+        choice, elapsed, costs = trial(engine, eeg, rng, options, target, args)
+        correct += choice == target
+        seconds.append(elapsed)
+        chunk_costs.extend(costs)
+
+    epochs = sorted(engine.process_times)
+    chunk_costs.sort()
+    print(f"{args.trials} trials, {args.options} options, up to {args.repetitions} rounds "
+          f"(stop at {args.threshold}), ISI {args.isi_ms} ms, SNR {args.snr}")
+    print(f"accuracy {correct / args.trials:.0%}, {sum(seconds) / len(seconds):.1f} s per selection")
+    print(f"per epoch:        p50 {percentile(epochs, 50):.3f} ms, p95 {percentile(epochs, 95):.3f} ms, "
+          f"max {epochs[-1]:.3f} ms ({percentile(epochs, 95) / args.isi_ms:.2%} of the ISI)")
+    print(f"per chunk ({args.chunk} samples): p50 {percentile(chunk_costs, 50):.3f} ms, "
+          f"p95 {percentile(chunk_costs, 95):.3f} ms")
+
+
+if __name__ == "__main__":
+    main()
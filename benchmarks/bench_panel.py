@@ -0,0 +1,133 @@
+"""
+Benchmark: right panel update cost, rebuild vs reconcile.
+
+Replays a sequence of panel states like a session produces them (speller
+grid, question menu, selecting questions one after another, back, switching
+modes) on real ttk widgets, timing each update including update_idletasks().
+
+    rebuild    destroy every child and create the panel again (the old
+               create_dynamic_interface)
+    reconcile  WidgetPool.update() over the same specs, widgets retained
+
+Reports per-update latency percentiles and the widgets created per update.
+Needs a display (Tk).
+
+Usage:
+    python benchmarks/bench_panel.py [--rounds N] [--questions Q]
+"""
+import argparse
+import time
+import tkinter
+from tkinter import ttk
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from latency import percentile
+from widgetpool import WidgetPool, spec
+
+ALPHABET = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 _.,?!")
+FACTORIES = {"frame": ttk.Frame, "label": ttk.Label, "button": ttk.Button}
+
+
+def select(value):
+    pass
+
+
+def speller_specs():
+    specs = []
+    for i in range(5):
+        specs.append(spec(f"row{i}", "frame"))
+        for j in range(8):
+            idx = i * 8 + j
+            if idx < len(ALPHABET):
+                specs.append(spec(f"char{idx}", "button", f"row{i}", dict(side="left", padx=1, pady=1),
+                                  text=ALPHABET[idx], width=3, command=(select, (ALPHABET[idx],))))
+    return specs
+
+
+def menu_specs(questions, selected):
+    specs = [spec("breadcrumb", "label", None, dict(anchor="w"), text=f"Path: Root > {selected or ''}"),
+             spec("instruction", "label", None, dict(anchor="w"), text="Click on a question", wraplength=320)]
+    for i, q in enumerate(questions, 1):
+        text = f"{i}. {q}"
+        specs.append(spec(f"question{i}", "button", None, dict(pady=2),
+                          text=f"✓ {text}" if q == selected else text, width=45, command=(select, (q,))))
+    specs.append(spec("separator", "frame", None, dict(fill="x", pady=8), height=2))
+    if selected:
+        specs.append(spec("selection", "frame", None, dict(fill="x", padx=4)))
+        specs.append(spec("selection_title", "label", "selection", dict(anchor="w"), text="Selected Question:"))
+        specs.append(spec("selection_text", "label", "selection", dict(anchor="w"), text=f'"{selected}"'))
+        specs.append(spec("send", "button", None, dict(fill="x"), text="Send this question to Chat"))
+        specs.append(spec("back", "button", None, dict(fill="x"), text="Back"))
+    else:
+        specs.append(spec("select_hint", "label", None, dict(anchor="w"), text="Select a question above"))
+    return specs
+
+
+def states(rounds, count):
+    for r in range(rounds):
+        questions = [f"Question {r}.{i} about the topic being discussed?" for i in range(count)]
+        yield speller_specs()
+        yield menu_specs(questions, None)
+        for q in questions:
+            yield menu_specs(questions, q)
+        yield menu_specs(questions, None)
+
+
+def rebuild(frame, specs):
+    """Builds the specs from scratch like the old create_dynamic_interface"""
+    for w in frame.winfo_children():
+        w.destroy()
+    widgets = {}
+    for s in specs:
+        master = frame if s["parent"] is None else widgets[s["parent"]]
+        options = dict(s["options"])
+        if isinstance(options.get("command"), tuple):
+            func, args = options["command"]
+            options["command"] = lambda func=func, args=args: func(*args)
+        widgets[s["key"]] = FACTORIES[s["kind"]](master, **options)
+        widgets[s["key"]].pack(**s["pack"])
+    return len(widgets)
+
+
+def run(root, name, update, rounds, count):
+    frame = ttk.Frame(root)
+    frame.pack()
+    times, created = [], 0
+    for specs in states(rounds, count):
+        start = time.perf_counter()
+        created += update(frame, specs)
+        root.update_idletasks()
+        times.append((time.perf_counter() - start) * 1000)
+    frame.destroy()
+    times.sort()
+    print(f"{name:<10} {len(times):>8} {percentile(times, 50):>9.2f} {percentile(times, 95):>9.2f} "
+          f"{times[-1]:>9.2f} {created / len(times):>14.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=20)
+    parser.add_argument("--questions", type=int, default=5, help="questions in the menu")
+    args = parser.parse_args()
+
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError as e:
+        print(f"Tk is not available ({e}); run this benchmark on a machine with a display")
+        return
+
+    pools = {}
+
+    def reconcile(frame, specs):
+        pool = pools.setdefault(frame, WidgetPool(frame, FACTORIES))
+        pool.update(specs)
+        return pool.last["created"]
+
+    print(f"{'mode':<10} {'updates':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'created/update':>14}")
+    run(root, "rebuild", rebuild, args.rounds, args.questions)
+    run(root, "reconcile", reconcile, args.rounds, args.questions)
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""
+Benchmark: keystroke savings and lookup time of the predictive text engine.
+
+Sessions of phrases are "spelled" in order. Before each selection the user
+may pick the word they are spelling from the top --k suggestions (one
+selection completes the word and its space) or select the next letter. The
+predictor learns every phrase after it is spelled, like process_phrase does,
+so later sessions benefit from earlier ones.
+
+    fixed    the old common_suggestions list, matched with startswith
+    ngram    NgramPredictor (word completion + next word)
+
+Keystroke savings = 1 - selections / characters. Also reports next-letter
+top-1/top-5 accuracy and predict_words/predict_chars latency.
+
+Phrases come from --capture files (Intendix captures, split at '!') or a
+built-in set of everyday AAC phrases.
+
+Usage:
+    python benchmarks/bench_predict.py [--capture FILE ...] [--sessions N] [--k K]
+"""
+import argparse
+import random
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from capture import read_capture
+from intendix import clean_character, decode_board_item
+from latency import percentile
+from predict import NgramPredictor
+
+COMMON_SUGGESTIONS = [
+    "who", "what", "how", "when", "where", "why", "AI", "care", "health", "education", "finances",
+    "blockchain", "cryptocurrencies", "marriage", "sex", "addictions", "volcanoes", "physics", "biology"
+]
+
+PHRASES = [
+    "I WANT WATER", "I WANT TO SLEEP", "I AM IN PAIN", "CALL MY DAUGHTER", "CALL THE NURSE",
+    "I AM COLD", "I AM HOT", "PLEASE TURN ON THE TV", "PLEASE TURN OFF THE LIGHT", "THANK YOU",
+    "WHAT TIME IS IT", "WHERE IS MY DAUGHTER", "I WANT TO GO OUTSIDE", "I LOVE YOU", "HOW ARE YOU",
+    "I NEED MY MEDICATION", "MY BACK HURTS", "I WANT TO EAT", "PLEASE OPEN THE WINDOW",
+    "WHAT IS THE WEATHER TODAY", "I WANT TO LISTEN TO MUSIC", "HOW DOES THE BRAIN WORK",
+    "WHAT IS ARTIFICIAL INTELLIGENCE", "TELL ME ABOUT PHYSICS", "I NEED HELP",
+]
+
+
+def phrases_from_captures(paths):
+    phrases = []
+    for path in paths:
+        text = ""
+        for _, _, data in read_capture(path):
+            char = clean_character(decode_board_item(data).output_text)
+            if char == "!":
+                if text.strip():
+                    phrases.append(text.strip())
+                text = ""
+            elif char:
+                text += char
+    return phrases
+
+
+def fixed_words(text, k):
+    stripped = text.strip().lower()
+    if not stripped or text != text.rstrip():
+        return []
+    return [s.upper() for s in COMMON_SUGGESTIONS if s.lower().startswith(stripped)][:k]
+
+
+def spell(phrase, predict_words, k):
+    """Selections needed to spell phrase when the current word can be picked from the top k"""
+    selections = 0
+    typed = ""
+    words = phrase.split(" ")
+    for w, word in enumerate(words):
+        target = word + (" " if w < len(words) - 1 else "")
+        done = 0
+        while done < len(word):
+            if word in predict_words(typed, k):
+                typed += target[done:]
+                done = len(target)
+                selections += 1
+                break
+            typed += word[done]
+            done += 1
+            selections += 1
+        if done < len(target):
+            typed += " "
+            selections += 1
+    return selections
+
+
+def letter_accuracy(predictor, phrase):
+    top1 = top5 = 0
+    for i in range(len(phrase)):
+        predicted = predictor.predict_chars(phrase[:i], k=5)
+        top1 += bool(predicted) and predicted[0] == phrase[i]
+        top5 += phrase[i] in predicted
+    return top1, top5
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capture", nargs="*", default=[], help="Intendix capture files to take phrases from")
+    parser.add_argument("--sessions", type=int, default=4, help="sessions of shuffled phrases")
+    parser.add_argument("--k", type=int, default=5, help="suggestions shown")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    phrases = phrases_from_captures(args.capture) if args.capture else PHRASES
+    rng = random.Random(args.seed)
+    predictor = NgramPredictor()
+    for word in COMMON_SUGGESTIONS:
+        predictor.learn(word)
+
+    print(f"{len(phrases)} phrases x {args.sessions} sessions, top-{args.k} suggestions")
+    print(f"{'session':>7} {'chars':>7} {'fixed':>9} {'ngram':>9} {'letter@1':>9} {'letter@5':>9}")
+    for session in range(1, args.sessions + 1):
+        order = phrases[:]
+        rng.shuffle(order)
+        chars = fixed = ngram = top1 = top5 = 0
+        for phrase in order:
+            chars += len(phrase)
+            fixed += spell(phrase, fixed_words, args.k)
+            ngram += spell(phrase, predictor.predict_words, args.k)
+            a, b = letter_accuracy(predictor, phrase)
+            top1 += a
+            top5 += b
+            predictor.learn(phrase, weight=3)
+        print(f"{session:>7} {chars:>7} {1 - fixed / chars:>8.1%} {1 - ngram / chars:>8.1%} "
+              f"{top1 / chars:>8.1%} {top5 / chars:>8.1%}")
+
+    # Lookup latency: cold (memo dropped by a learn) and warm (same context again)
+    cold, warm = [], []
+    for phrase in phrases:
+        for i in range(1, len(phrase) + 1):
+            predictor._memo.clear()  # what a learn() does to it
+            start = time.perf_counter()
+            predictor.predict_words(phrase[:i], args.k)
+            predictor.predict_chars(phrase[:i], 5)
+            cold.append((time.perf_counter() - start) * 1e6)
+            start = time.perf_counter()
+            predictor.predict_words(phrase[:i], args.k)
+            predictor.predict_chars(phrase[:i], 5)
+            warm.append((time.perf_counter() - start) * 1e6)
+    cold.sort()
+    warm.sort()
+    print(f"\nwords+letters lookup: cold p50 {percentile(cold, 50):.1f} µs, p95 {percentile(cold, 95):.1f} µs; "
+          f"warm p50 {percentile(warm, 50):.1f} µs, p95 {percentile(warm, 95):.1f} µs")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""
+Benchmark: question menu selection to answer on screen, with answer prefetch.
+
+Each round shows a 6-question menu, waits --select-ms (the user spelling a
+digit with P300 selections), then picks a question, usually one of the first
+ones. The chat endpoint stand-in answers after --ttft-ms and then streams
+--tokens pieces --token-ms apart, honouring cancellation like stream_chat.
+
+    off    request sent when the digit is typed (current behaviour)
+    top3   AnswerPrefetcher(top_k=3)
+    all    AnswerPrefetcher(top_k=None)
+
+Reports selection -> first piece and selection -> full answer percentiles and
+the tokens spent on answers nobody picked.
+
+Usage:
+    python benchmarks/bench_prefetch.py [--rounds N] [--select-ms MS] [--ttft-ms MS]
+"""
+import argparse
+import random
+import threading
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from latency import percentile
+from prefetch import AnswerPrefetcher
+
+MENU = 6
+
+
+def make_fetch(ttft, tokens, token_s):
+    def fetch(messages, on_piece, cancelled=None, on_stream=None):
+        time.sleep(ttft)
+        text = ""
+        for i in range(tokens):
+            if cancelled is not None and cancelled():
+                break
+            piece = f"word{i} "
+            text += piece
+            on_piece(piece)
+            time.sleep(token_s)
+        return text
+    return fetch
+
+
+def run(name, top_k, rounds, select_s, fetch, tokens, seed):
+    rng = random.Random(seed)
+    prefetcher = AnswerPrefetcher(fetch, top_k=top_k, max_workers=3) if top_k != 0 else None
+    first, full = [], []
+    for round_no in range(rounds):
+        questions = [f"Question {round_no}.{i}?" for i in range(MENU)]
+        messages = [{"role": "user", "content": "earlier turn"}]
+        if prefetcher:
+            prefetcher.start(questions, messages, revision=round_no)
+        time.sleep(select_s)
+        choice = questions[min(MENU - 1, int(rng.expovariate(0.8)))]
+
+        selected = time.perf_counter()
+        got_first = threading.Event()
+        pieces = []
+
+        def on_piece(piece):
+            if not got_first.is_set():
+                first.append((time.perf_counter() - selected) * 1000)
+                got_first.set()
+            pieces.append(piece)
+
+        prefetch = prefetcher.claim(choice, round_no) if prefetcher else None
+        if prefetch is not None:
+            prefetch.attach(on_piece)
+        else:
+            fetch(messages + [{"role": "user", "content": choice}], on_piece)
+        full.append((time.perf_counter() - selected) * 1000)
+        assert len(pieces) == 1 or "".join(pieces).count("word") == tokens
+
+    first.sort()
+    full.sort()
+    stats = prefetcher.stats() if prefetcher else {"used": 0, "started": 0, "wasted_tokens": 0}
+    if prefetcher:
+        prefetcher.shutdown()
+    print(f"{name:<5} {percentile(first, 50):>9.0f} {percentile(first, 95):>9.0f} {percentile(full, 50):>9.0f} "
+          f"{percentile(full, 95):>9.0f} {stats['used']:>5}/{rounds:<3} {stats['started']:>7} {stats['wasted_tokens']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--select-ms", type=float, default=500.0, help="time to spell the digit")
+    parser.add_argument("--ttft-ms", type=float, default=200.0)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-ms", type=float, default=4.0)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    fetch = make_fetch(args.ttft_ms / 1000.0, args.tokens, args.token_ms / 1000.0)
+    print(f"{args.rounds} menus of {MENU}, {args.select_ms:g} ms to select, TTFT {args.ttft_ms:g} ms, "
+          f"{args.tokens} tokens x {args.token_ms:g} ms")
+    print(f"{'mode':<5} {'first p50':>9} {'first p95':>9} {'full p50':>9} {'full p95':>9} "
+          f"{'used':>9} {'started':>7} {'wasted':>8}")
+    for name, top_k in (("off", 0), ("top3", 3), ("all", None)):
+        run(name, top_k, args.rounds, args.select_ms / 1000.0, fetch, args.tokens, args.seed)
+
+
+if __name__ == "__main__":
+    main()
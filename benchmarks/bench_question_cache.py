@@ -0,0 +1,91 @@
+"""
+Benchmark: time to the question menu with and without the question cache.
+
+Topics are drawn from a Zipf-like distribution (a few topics are very common,
+like across real users' sessions) and typed with random case/spacing/order.
+The generator stand-in sleeps --api-ms like a Groq round trip. Each
+--sessions session starts a fresh QuestionCache on the same file, as an app
+restart would, so later sessions show the disk tier at work.
+
+    uncached  every request goes to the generator
+    cached    QuestionCache(memory LRU + SQLite) in front of it
+
+Usage:
+    python benchmarks/bench_question_cache.py [--requests N] [--sessions S] [--api-ms MS]
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from latency import percentile
+from questioncache import QuestionCache
+
+TOPICS = ["water", "pain, doctor", "family", "food, lunch", "music", "weather", "sleep",
+          "AI, health", "football", "news", "medication", "pets", "travel", "books", "movies"]
+
+
+def typed(rng, topic):
+    """The same topic the way different users might spell it"""
+    parts = [p.strip() for p in topic.split(",")]
+    rng.shuffle(parts)
+    text = " ,  ".join(parts) if rng.random() < 0.3 else ", ".join(parts)
+    return text.upper() if rng.random() < 0.5 else text
+
+
+def requests_for(rng, count, topics):
+    weights = [1.0 / (rank + 1) for rank in range(len(topics))]
+    return [typed(rng, rng.choices(topics, weights)[0]) for _ in range(count)]
+
+
+def generate(keyword, api_s):
+    time.sleep(api_s)
+    return [f"What about {keyword}? ({i})" for i in range(6)]
+
+
+def run(name, sessions, api_s, path, topics, seed, requests):
+    rng = random.Random(seed)
+    times = []
+    hits = disk_hits = 0
+    for _ in range(sessions):
+        cache = QuestionCache(path, capacity=64) if name == "cached" else None
+        for keyword in requests_for(rng, requests, topics):
+            start = time.perf_counter()
+            questions = cache.get(keyword, "initial", "model") if cache else None
+            if questions is None:
+                questions = generate(keyword, api_s)
+                if cache:
+                    cache.put(keyword, questions, "initial", "model")
+            times.append((time.perf_counter() - start) * 1000)
+        if cache:
+            stats = cache.stats()
+            hits += stats["hits"]
+            disk_hits += stats["disk_hits"]
+            cache.close()
+    times.sort()
+    hits = f"{hits} ({disk_hits} disk)" if name == "cached" else "-"
+    print(f"{name:<9} {len(times):>8} {sum(times) / len(times):>9.1f} {percentile(times, 50):>9.2f} "
+          f"{percentile(times, 95):>9.1f} {hits:>16}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=60, help="question requests per session")
+    parser.add_argument("--sessions", type=int, default=3)
+    parser.add_argument("--api-ms", type=float, default=50.0, help="generator round trip")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    print(f"{args.sessions} sessions x {args.requests} requests over {len(TOPICS)} topics, "
+          f"{args.api_ms:g} ms per generator call")
+    print(f"{'cache':<9} {'requests':>8} {'mean ms':>9} {'p50 ms':>9} {'p95 ms':>9} {'hits':>16}")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "questions.sqlite3")
+        for name in ("uncached", "cached"):
+            run(name, args.sessions, args.api_ms / 1000.0, path, TOPICS, args.seed, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark: chat display insert cost over a long session.
+
+Appends --messages chat messages (a few lines each, alternating tags) to a real
+Tk Text widget, with insert + see(END) per message like main.py does.
+
+    unbounded  plain Text widget, every line kept
+    bounded    ChatScrollback with --lines live lines, the rest archived
+
+Reports insert latency percentiles for the first and last 10% of the session,
+the final widget line count and archive size, and the time to page one
+archived page back in. Needs a display (Tk).
+
+Usage:
+    python benchmarks/bench_scrollback.py [--messages N] [--lines L]
+"""
+import argparse
+import os
+import tempfile
+import time
+import tkinter
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from latency import percentile
+from scrollback import ChatScrollback
+
+TAGS = ("user", "ai", "system")
+MESSAGE = "the quick brown fox jumps over the lazy dog " * 3
+
+
+def session(target, widget, messages):
+    costs = []
+    for i in range(messages):
+        text = f"\nMessage {i}: {MESSAGE}\n{MESSAGE}\n"
+        start = time.perf_counter()
+        target.insert("end", text, TAGS[i % len(TAGS)])
+        target.see("end")
+        widget.update_idletasks()
+        costs.append((time.perf_counter() - start) * 1000)
+    return costs
+
+
+def report(name, costs, lines, archived):
+    tenth = max(1, len(costs) // 10)
+    first = sorted(costs[:tenth])
+    last = sorted(costs[-tenth:])
+    print(f"{name:<10} {percentile(first, 50):>9.2f} {percentile(first, 95):>9.2f} "
+          f"{percentile(last, 50):>9.2f} {percentile(last, 95):>9.2f} {lines:>9,} {archived:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--lines", type=int, default=2000, help="live lines kept by ChatScrollback")
+    args = parser.parse_args()
+
+    try:
+        root = tkinter.Tk()
+    except tkinter.TclError as e:
+        print(f"Tk is not available ({e}); run this benchmark on a machine with a display")
+        return
+    root.geometry("600x600")
+
+    print(f"{args.messages:,} messages, {args.lines:,} live lines")
+    print(f"{'display':<10} {'first p50':>9} {'first p95':>9} {'last p50':>9} {'last p95':>9} "
+          f"{'lines':>9} {'archive':>12}")
+
+    plain = tkinter.Text(root, wrap="word")
+    plain.pack(fill="both", expand=True)
+    costs = session(plain, root, args.messages)
+    report("unbounded", costs, int(plain.index("end-1c").split(".")[0]), "-")
+    plain.destroy()
+
+    with tempfile.TemporaryDirectory() as archive_dir:
+        text = tkinter.Text(root, wrap="word")
+        text.pack(fill="both", expand=True)
+        chat_log = ChatScrollback(text, max_lines=args.lines, archive_dir=archive_dir)
+        costs = session(chat_log, root, args.messages)
+        size = os.path.getsize(chat_log.archive_path) if chat_log.archive_path else 0
+        report("bounded", costs, chat_log.line_count(), f"{size / 1024:,.0f} KiB")
+
+        text.yview_moveto(0.0)
+        start = time.perf_counter()
+        loaded = chat_log.load_older()
+        root.update_idletasks()
+        print(f"reload one page: {(time.perf_counter() - start) * 1000:.1f} ms (loaded={loaded}, "
+              f"lines now {chat_log.line_count():,})")
+        chat_log.close()
+
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
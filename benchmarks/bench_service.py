@@ -0,0 +1,200 @@
+"""
+Benchmark: speller sessions per core and per-session latency in service.py.
+
+For each --sessions count, a SpellerService with that many sessions runs in
+this process (one asyncio loop). A separate sender process replays speller
+traffic to every session's port: each one spells phrases ending in '!' and
+then the digit of a menu question, one selection every --interval seconds,
+sessions staggered so the load is even. The chat API is a stand-in client:
+questions after --ttft-ms, answers streamed as --tokens pieces --token-ms
+apart.
+
+Reports, per session count: selections/s handled, CPU used by the service
+process (percent of one core), sessions per core at that load, latency from
+the datagram's scheduled send time to its handling in the session
+(p50/p95/p99/max over all sessions, p95 of the slowest session) and the
+question menus and answers delivered. Console output of the sessions is
+discarded.
+
+Usage:
+    python benchmarks/bench_service.py [--sessions 1 8 32 64] [--seconds S] [--interval S]
+"""
+import argparse
+import asyncio
+import contextlib
+import multiprocessing
+import os
+import socket
+import tempfile
+import time
+from types import SimpleNamespace
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from core import ConsoleView
+from intendix import encode_board_item, make_board_item
+from latency import percentile
+from service import SpellerService
+
+PHRASES = ["WATER", "PAIN", "HELLO DOCTOR", "MUSIC", "HOW ARE YOU", "THANKS"]
+
+
+class StandInClient:
+    """Groq-shaped client: chat.completions.create(...) with fixed delays"""
+
+    def __init__(self, ttft, tokens, token_s):
+        self.ttft = ttft
+        self.tokens = tokens
+        self.token_s = token_s
+        self.chat = SimpleNamespace(completions=self)
+
+    def create(self, model=None, messages=None, stream=False, **kwargs):
+        time.sleep(self.ttft)
+        questions = "questions" in (messages or [{}])[0].get("content", "")
+        if not stream:
+            text = "\n".join(f"{i}. Question {i} about it?" for i in range(1, 7))
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+        if questions:
+            return self._stream([f"{i}. Question {i} about it?\n" for i in range(1, 7)])
+        return self._stream([f"word{i} " for i in range(self.tokens)])
+
+    def _stream(self, pieces):
+        for piece in pieces:
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))])
+            time.sleep(self.token_s)
+
+
+class BenchView(ConsoleView):
+    """Counts what a session shows instead of printing it"""
+    menus = 0
+    answers = 0
+
+    def status(self, text):
+        pass
+
+    def chat(self, text, tag):
+        if text.startswith("\n" + "=" * 60 + "\nGENERATED QUESTIONS"):
+            BenchView.menus += 1
+
+    def answer_stream(self, after):
+
+        class Stream:
+            def feed(self, text):
+                pass
+
+            def close(self, on_done=None):
+                BenchView.answers += 1
+                after(0, on_done or (lambda: None))
+
+            def cancel(self):
+                pass
+
+        return Stream()
+
+
+def session_script(seconds, interval, offset, seed):
+    """(send time, char) for one session: phrases with '!', then a menu digit"""
+    script = []
+    t = offset
+    i = seed
+    while t < seconds:
+        for char in PHRASES[i % len(PHRASES)] + "!" + str(1 + i % 6):
+            script.append((t, char))
+            t += interval
+        i += 1
+    return [(t, c) for t, c in script if t < seconds]
+
+
+def send(ports, scripts, start):
+    """Sender process: replays every session's script at start + its times"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    packets = {c: encode_board_item(make_board_item(c)) for c in set(c for s in scripts for _, c in s)}
+    events = sorted((t, port, c) for port, script in zip(ports, scripts) for t, c in script)
+    for t, port, c in events:
+        delay = start + t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        sock.sendto(packets[c], ("127.0.0.1", port))
+    sock.close()
+
+
+async def run(n, args):
+    BenchView.menus = BenchView.answers = 0
+    client = StandInClient(args.ttft_ms / 1000, args.tokens, args.token_ms / 1000)
+    service = SpellerService([(f"s{i}", 0) for i in range(n)], host="127.0.0.1", workers=args.workers,
+                             view=BenchView, client=client)
+    await service.start()
+    names = list(service.sessions)
+    traces = {name: [] for name in names}
+    for name, session in service.sessions.items():
+        start_trace = session.latency_tracer.start
+
+        def traced(label="", t_ns=None, start_trace=start_trace, out=traces[name]):
+            trace = start_trace(label, t_ns)
+            out.append(trace)
+            return trace
+
+        session.latency_tracer.start = traced
+
+    scripts = [session_script(args.seconds, args.interval, args.interval * i / n, i) for i in range(n)]
+    start = time.perf_counter() + 0.5
+    sender = multiprocessing.Process(target=send, args=([service.ports[name] for name in names], scripts, start))
+    cpu = time.process_time()
+    sender.start()
+    loop = asyncio.get_running_loop()
+    await loop.run_in_executor(None, sender.join)
+    await asyncio.sleep(args.tail)
+    cpu = time.process_time() - cpu
+    wall = time.perf_counter() - start + 0.5
+
+    delays, session_p95, handled = [], [], 0
+    for name, script in zip(names, scripts):
+        mine = []
+        # Every char of the script becomes one trace, in arrival order
+        for (t, _), trace in zip(script, traces[name]):
+            mine.append((max(trace.stamps.values()) / 1e9 - (start + t)) * 1000)
+        handled += len(mine)
+        delays += mine
+        session_p95.append(percentile(sorted(mine), 95))
+    sent = sum(len(s) for s in scripts)
+    menus, answers = BenchView.menus, BenchView.answers
+    service.close()
+
+    delays.sort()
+    fraction = cpu / wall
+    return (f"{n:>8} {handled / args.seconds:>8.1f} {fraction * 100:>6.1f} {n / max(fraction, 1e-9):>9.0f} "
+          f"{percentile(delays, 50):>7.2f} {percentile(delays, 95):>7.2f} {percentile(delays, 99):>7.2f} "
+          f"{delays[-1] if delays else 0:>8.2f} {max(session_p95):>9.2f} {menus:>6} {answers:>7}"
+          + (f"  ({sent - handled} lost)" if handled < sent else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, nargs="*", default=[1, 8, 32, 64])
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--interval", type=float, default=0.5, help="seconds between selections per session")
+    parser.add_argument("--ttft-ms", type=int, default=300)
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-ms", type=int, default=15)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--tail", type=float, default=2.0, help="seconds to let answers finish")
+    args = parser.parse_args()
+
+    print(f"{args.seconds:g} s per run, one selection per {args.interval:g} s per session, "
+          f"API stand-in {args.ttft_ms} ms + {args.tokens} x {args.token_ms} ms, {args.workers} workers, "
+          f"{os.cpu_count()} CPUs")
+    print(f"{'sessions':>8} {'sel/s':>8} {'cpu%':>6} {'sess/core':>9} {'p50 ms':>7} {'p95 ms':>7} "
+          f"{'p99 ms':>7} {'max ms':>8} {'worst p95':>9} {'menus':>6} {'answers':>7}")
+    cwd = os.getcwd()
+    for n in args.sessions:
+        # Fresh question cache and predictive text files per run, outside the repo
+        with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+            os.chdir(tmp)
+            try:
+                row = asyncio.run(run(n, args))
+            finally:
+                os.chdir(cwd)
+        print(row)
+
+
+if __name__ == "__main__":
+    main()
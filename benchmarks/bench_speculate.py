@@ -0,0 +1,98 @@
+"""
+Benchmark: '!' to question menu latency with speculative generation.
+
+Phrases are spelled one char every --char-ms (P300 selections are slow) on
+a CallbackLoop standing in for Tk, with small jitter. The question generator
+stand-in sleeps --api-ms. When '!' arrives the menu is shown from the
+speculation if it matches the phrase (waiting for it if still in flight),
+otherwise the generator is called then.
+
+    off          generate when '!' arrives (current behaviour)
+    speculative  SpeculativeGenerator(debounce --debounce-ms)
+
+Reports '!' -> menu percentiles and generator calls per phrase.
+
+Usage:
+    python benchmarks/bench_speculate.py [--phrases N] [--char-ms MS] [--api-ms MS]
+"""
+import argparse
+import random
+import threading
+import time
+
+from common import CallbackLoop  # also puts the repo root on sys.path
+from latency import percentile
+from speculate import SpeculativeGenerator
+
+PHRASES = ["WATER", "I AM IN PAIN", "CALL MY DAUGHTER", "HELLO", "WHAT TIME IS IT", "MUSIC PLEASE"]
+
+
+class Generator:
+    def __init__(self, api_s):
+        self.api_s = api_s
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, keyword):
+        with self._lock:
+            self.calls += 1
+        time.sleep(self.api_s)
+        return [f"What about {keyword}?"]
+
+
+def run(name, phrases, char_s, api_s, debounce_ms, seed):
+    rng = random.Random(seed)
+    loop = CallbackLoop()
+    generator = Generator(api_s)
+    speculator = SpeculativeGenerator(generator, loop.after, debounce_ms=debounce_ms) if name != "off" else None
+    latencies = []
+    for phrase in phrases:
+        shown = threading.Event()
+        prefix = ""
+        for char in phrase + "!":
+            time.sleep(char_s * rng.uniform(0.8, 1.2))
+            if char != "!":
+                prefix += char
+                if speculator:
+                    loop.after(0, lambda p=prefix: speculator.update(p))
+                continue
+            bang = time.perf_counter()
+
+            def menu(p=phrase):
+                future = speculator.take(p) if speculator else None
+                if future is not None:
+                    future.add_done_callback(lambda f: loop.after(0, done))
+                else:
+                    threading.Thread(target=lambda: (generator(p), loop.after(0, done)), daemon=True).start()
+
+            def done(start=bang):
+                latencies.append((time.perf_counter() - start) * 1000)
+                shown.set()
+
+            loop.after(0, menu)
+        shown.wait()
+    loop.stop()
+    latencies.sort()
+    print(f"{name:<12} {percentile(latencies, 50):>9.1f} {percentile(latencies, 95):>9.1f} "
+          f"{latencies[-1]:>9.1f} {generator.calls / len(phrases):>10.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--phrases", type=int, default=6)
+    parser.add_argument("--char-ms", type=float, default=150.0, help="time per spelled char")
+    parser.add_argument("--api-ms", type=float, default=80.0, help="question generator round trip")
+    parser.add_argument("--debounce-ms", type=int, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    phrases = [PHRASES[i % len(PHRASES)] for i in range(args.phrases)]
+    print(f"{len(phrases)} phrases, {args.char_ms:g} ms per char, {args.api_ms:g} ms per generator call, "
+          f"debounce {args.debounce_ms} ms")
+    print(f"{'mode':<12} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'calls/phr':>10}")
+    for name in ("off", "speculative"):
+        run(name, phrases, args.char_ms / 1000.0, args.api_ms / 1000.0, args.debounce_ms, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Benchmark: cold start to the first listening Intendix socket.
+
+Each run starts a fresh interpreter that builds the engine and binds the
+UDP ingest, then prints "ready"; the time from spawning it to reading that
+line is the cold start. Modes:
+
+    eager      what main.py imported at module level before core.py existed:
+               ttkbootstrap, groq, numpy (p300, synthetic), pylsl (acquisition)
+               and every pipeline module, then the engine and the listener
+    headless   import core, BciCore + listener (API client/numpy/pylsl deferred)
+    tk         the thin Tk client's imports: ttkbootstrap + core
+
+The Tk window itself is not created, so no display is needed; eager and tk
+both exclude its cost. Interpreter startup alone is reported as "python".
+
+Usage:
+    python benchmarks/bench_startup.py [--runs N] [--port P]
+"""
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import common
+
+LISTEN = """
+from callbackloop import CallbackLoop
+from core import BciCore
+loop = CallbackLoop()
+bci = BciCore(loop.after, host="127.0.0.1", ports=[{port}])
+bci.start_intendix_listener()
+print("ready", flush=True)
+"""
+
+MODES = {
+    "python": "print('ready', flush=True)",
+    "eager": """
+import ttkbootstrap, tkinter
+try:
+    import groq
+except Exception:
+    pass
+import capture, chatcontext, ingest, intendix, inputqueue, latency, lexicon, predict, prefetch
+import questioncache, speculate, scrollback, streamrender, widgetpool
+try:
+    import p300, acquisition, synthetic
+    import pylsl
+except ImportError:
+    pass
+""" + LISTEN,
+    "headless": LISTEN,
+    "tk": "import ttkbootstrap, tkinter, streamrender, scrollback, widgetpool\n" + LISTEN,
+}
+
+
+def cold_start(code, cwd):
+    env = dict(os.environ, PYTHONPATH=common.ROOT)
+    start = time.perf_counter()
+    child = subprocess.Popen([sys.executable, "-c", code], cwd=cwd, env=env, stdout=subprocess.PIPE,
+                             stderr=subprocess.DEVNULL, text=True)
+    try:
+        for line in child.stdout:
+            if line.startswith("ready"):
+                return (time.perf_counter() - start) * 1000
+        raise RuntimeError(f"child exited with {child.wait()} before listening")
+    finally:
+        child.kill()
+        child.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--port", type=int, default=47200, help="first of the ports used, one per run")
+    args = parser.parse_args()
+
+    # Bytecode as a normal run would have it (PYTHONDONTWRITEBYTECODE would otherwise compile every time)
+    compileall.compile_dir(common.ROOT, maxlevels=0, quiet=1)
+    print(f"{'mode':<10} {'median ms':>10} {'min ms':>8} {'max ms':>8}")
+    port = args.port
+    # Children run in a scratch directory so the caches they create don't land in the repo
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode, code in MODES.items():
+            cold_start(code.format(port=port), tmp)  # warm the OS file cache
+            times = []
+            for _ in range(args.runs):
+                port += 1
+                times.append(cold_start(code.format(port=port), tmp))
+            print(f"{mode:<10} {statistics.median(times):>10.1f} {min(times):>8.1f} {max(times):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
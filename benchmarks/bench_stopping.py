@@ -0,0 +1,163 @@
+"""
+Benchmark: fixed vs dynamic stopping of P300 selections.
+
+A session of --trials selections over six words is streamed through
+P300Engine: each trial flashes the words in shuffled rounds (--isi-ms apart,
+up to --max-rounds rounds) while the attended word evokes a P300, with a
+--pause-ms gap between trials. The first --calibration trials train the
+classifier (as "Calibrate P300" does), the rest are selections, decided by
+
+    fixed R      every selection takes R rounds, best mean score wins
+    dynamic p    posterior of one word reaches p (max --max-rounds rounds)
+
+Reports accuracy, mean rounds, selections per minute (flashing + the tail
+of the last epoch + the pause) and Wolpaw ITR, for the template classifier
+and the calibrated one.
+
+The session comes from SyntheticEEG, or from --replay FILE (.npz with eeg
+(n, channels) microvolts, fs, flash_index, flash_word, flash_trial and
+targets, e.g. one written with --record FILE or exported from a recording).
+
+Usage:
+    python benchmarks/bench_stopping.py [--trials N] [--snr A] [--record FILE | --replay FILE]
+"""
+import argparse
+import math
+
+import numpy as np
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from p300 import P300Engine
+from synthetic import SyntheticEEG
+
+WORDS = ["WATER", "PAIN", "YES", "NO", "HELP", "MUSIC"]
+
+
+def synthetic_session(args):
+    rng = np.random.default_rng(args.seed)
+    fs = 250
+    eeg = SyntheticEEG(fs, snr=args.snr, seed=args.seed)
+    step = int(round(args.isi_ms / 1000 * fs))
+    flash_index, flash_word, flash_trial, targets = [], [], [], []
+    index = fs
+    for trial in range(args.trials):
+        target = int(rng.integers(len(WORDS)))
+        targets.append(target)
+        for _ in range(args.max_rounds):
+            for word in rng.permutation(len(WORDS)):
+                flash_index.append(index)
+                flash_word.append(word)
+                flash_trial.append(trial)
+                if word == target:
+                    eeg.erp(index)
+                index += step
+        index += fs + int(args.pause_ms / 1000 * fs)
+    return {"eeg": eeg.block(index + fs), "fs": fs, "flash_index": np.array(flash_index),
+            "flash_word": np.array(flash_word), "flash_trial": np.array(flash_trial), "targets": np.array(targets)}
+
+
+def run_trial(engine, session, trial, chunk=25, label=None):
+    """Streams one trial; returns (selected word index, rounds, samples from first flash to decision)"""
+    fs, data = int(session["fs"]), session["eeg"]
+    mask = session["flash_trial"] == trial
+    flashes = list(zip(session["flash_index"][mask], session["flash_word"][mask]))
+    first = flashes[0][0]
+    end = flashes[-1][0] + int(0.8 * fs) + engine.half + chunk
+    candidates = list(range(len(WORDS)))
+    engine.reset()
+    position = first - engine.half - chunk  # the filter needs half its length before the first epoch
+    while position < end:
+        while flashes and flashes[0][0] < position + chunk:
+            index, word = flashes.pop(0)
+            engine.mark(int(word), index / fs, label)
+        engine.push(data[position:position + chunk], (position + chunk - 1) / fs)
+        position += chunk
+        engine.process()
+        if label is None:
+            choice = engine.decide(candidates)
+            if choice is not None:
+                return choice, engine.selection_rounds[-1], position - first
+    return None, 0, position - first
+
+
+def itr(accuracy, n, seconds):
+    """Wolpaw information transfer rate in bits/min"""
+    if seconds <= 0:
+        return 0.0
+    bits = math.log2(n)
+    if 0 < accuracy < 1:
+        bits += accuracy * math.log2(accuracy) + (1 - accuracy) * math.log2((1 - accuracy) / (n - 1))
+    elif accuracy == 0:
+        bits = 0.0
+    return bits * 60 / seconds
+
+
+def evaluate(session, classifier, policy, args):
+    name, value = policy
+    threshold = value if name == "dynamic" else 0
+    repetitions = args.max_rounds if name == "dynamic" else value
+    engine = P300Engine(fs=session["fs"], channels=session["eeg"].shape[1], buffer_seconds=40,
+                        repetitions=repetitions, threshold=threshold)
+    if classifier is not None:
+        engine.classifier = classifier
+    fs = session["fs"]
+    correct, rounds, seconds = 0, [], []
+    trials = range(args.calibration, len(session["targets"]))
+    for trial in trials:
+        choice, used, samples = run_trial(engine, session, trial)
+        correct += choice == session["targets"][trial]
+        rounds.append(used)
+        seconds.append(samples / fs + args.pause_ms / 1000)
+    accuracy = correct / len(trials)
+    per_selection = sum(seconds) / len(seconds)
+    label = f"{name} {value}"
+    print(f"{label:<14} {accuracy:>8.0%} {sum(rounds) / len(rounds):>7.1f} {60 / per_selection:>9.1f} "
+          f"{itr(accuracy, len(WORDS), per_selection):>9.1f}")
+
+
+def calibrate(session, args):
+    engine = P300Engine(fs=session["fs"], channels=session["eeg"].shape[1], buffer_seconds=40)
+    for trial in range(args.calibration):
+        run_trial(engine, session, trial, label=(trial, int(session["targets"][trial])))
+    classifier, accuracy = engine.train()
+    return classifier, accuracy
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trials", type=int, default=70, help="trials in a synthetic session")
+    parser.add_argument("--calibration", type=int, default=10, help="first trials used for calibration")
+    parser.add_argument("--snr", type=float, default=0.5)
+    parser.add_argument("--isi-ms", type=int, default=250)
+    parser.add_argument("--pause-ms", type=int, default=1000)
+    parser.add_argument("--max-rounds", type=int, default=10)
+    parser.add_argument("--record", help="write the synthetic session to this .npz file")
+    parser.add_argument("--replay", help="use a session .npz file instead of synthetic EEG")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    if args.replay:
+        with np.load(args.replay) as f:
+            session = {k: f[k] for k in f.files}
+        session["fs"] = int(session["fs"])
+        source = args.replay
+    else:
+        session = synthetic_session(args)
+        source = f"synthetic, SNR {args.snr}"
+        if args.record:
+            np.savez_compressed(args.record, **session)
+            print(f"Session written to {args.record}")
+
+    classifier, held_out = calibrate(session, args)
+    print(f"{len(session['targets']) - args.calibration} selections ({source}), "
+          f"calibrated on {args.calibration} trials (held-out accuracy {held_out:.0%})")
+    policies = [("fixed", r) for r in (2, 5, args.max_rounds)] + [("dynamic", p) for p in (0.9, 0.95, 0.99)]
+    for name, clf in (("template", None), ("calibrated", classifier)):
+        print(f"\n{name} classifier")
+        print(f"{'policy':<14} {'accuracy':>8} {'rounds':>7} {'sel/min':>9} {'bits/min':>9}")
+        for policy in policies:
+            evaluate(session, clf, policy, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Benchmark: streamed chat tokens rendered into a Text widget.
+
+A local stand-in streams tokens as fast as a fast LLM endpoint would while an
+input thread posts a "keypress" callback every 10 ms. The Tk loop is the
+CallbackLoop stand-in and the Text widget charges --op-cost ms per call.
+
+    legacy    one app.after(0) per token with tag_configure + insert + see
+    frames    StreamRenderer: buffered, one insert + see per (adaptive) frame
+
+Reports tokens rendered/s, Tk callbacks and input-callback delay percentiles.
+
+Usage:
+    python benchmarks/bench_stream_render.py [--tokens N] [--token-delay MS] [--op-cost MS]
+"""
+import argparse
+import threading
+import time
+
+from common import CallbackLoop  # also puts the repo root on sys.path
+from latency import percentile
+from streamrender import StreamRenderer
+
+WORDS = "the quick brown fox jumps over a lazy dog while streaming tokens arrive".split()
+
+
+class FakeText:
+    """Text widget stand-in: every call costs op_cost ms, like a Tk round trip"""
+
+    def __init__(self, op_cost):
+        self.op_cost = op_cost / 1000.0
+        self.chars = 0
+        self.calls = 0
+        self.last_insert = None
+
+    def _call(self):
+        self.calls += 1
+        time.sleep(self.op_cost)
+
+    def tag_configure(self, *args, **kwargs):
+        self._call()
+
+    def insert(self, index, text, tag=None):
+        self._call()
+        self.chars += len(text)
+        self.last_insert = time.perf_counter()
+
+    def see(self, index):
+        self._call()
+
+
+def stream_tokens(count, delay, emit):
+    for i in range(count):
+        emit(WORDS[i % len(WORDS)] + " ")
+        if delay:
+            time.sleep(delay)
+
+
+def input_probe(loop, stop, delays):
+    """Posts a callback every 10 ms and records how long it waits in the loop"""
+    while not stop.is_set():
+        posted = time.perf_counter()
+        loop.after(0, lambda p=posted: delays.append((time.perf_counter() - p) * 1000))
+        time.sleep(0.01)
+
+
+def run(name, tokens, token_delay, op_cost):
+    loop = CallbackLoop()
+    widget = FakeText(op_cost)
+    total_chars = sum(len(WORDS[i % len(WORDS)]) + 1 for i in range(tokens))
+    done = threading.Event()
+    stop_probe = threading.Event()
+    delays = []
+    probe = threading.Thread(target=input_probe, args=(loop, stop_probe, delays), daemon=True)
+    probe.start()
+
+    start = time.perf_counter()
+    if name == "legacy":
+        def emit(piece):
+            def insert_piece(p=piece):
+                widget.tag_configure("ai", foreground="#BBBBBB")
+                widget.insert("end", p, "ai")
+                widget.see("end")
+            loop.after(0, insert_piece)
+        stream_tokens(tokens, token_delay, emit)
+        loop.after(0, done.set)
+    else:
+        renderer = StreamRenderer(widget, loop.after)
+        stream_tokens(tokens, token_delay, renderer.feed)
+        renderer.close(done.set)
+    stream_end = time.perf_counter()
+    done.wait()
+    stop_probe.set()
+    probe.join()
+    loop.stop()
+
+    elapsed = widget.last_insert - start
+    delays.sort()
+    assert widget.chars == total_chars, (widget.chars, total_chars)
+    print(f"{name:<7} {tokens / elapsed:>11,.0f} {(widget.last_insert - stream_end) * 1000:>10.1f} "
+          f"{loop.callbacks:>10,} {percentile(delays, 50):>8.1f} {percentile(delays, 95):>8.1f} "
+          f"{(delays[-1] if delays else 0):>8.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tokens", type=int, default=3000)
+    parser.add_argument("--token-delay", type=float, default=0.2, help="ms between tokens from the stand-in")
+    parser.add_argument("--op-cost", type=float, default=0.2, help="ms per Text widget call")
+    args = parser.parse_args()
+
+    print(f"{args.tokens} tokens, {args.token_delay:g} ms apart, {args.op_cost:g} ms per widget call")
+    print(f"{'render':<7} {'tokens/s':>11} {'lag ms':>10} {'callbacks':>10} "
+          f"{'in p50':>8} {'in p95':>8} {'in max':>8}")
+    for name in ("legacy", "frames"):
+        run(name, args.tokens, args.token_delay / 1000.0, args.op_cost)
+
+
+if __name__ == "__main__":
+    main()
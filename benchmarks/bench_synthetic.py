@@ -0,0 +1,75 @@
+"""
+Benchmark: synthetic EEG generation speed and signal checks.
+
+Generates --seconds of SyntheticEEG (--rate Hz x --channels) in blocks of
+each --blocks size and reports how many times faster than real time it
+runs. Then checks the signal it produces on Pz (channel 5):
+
+    spectrum   power in delta/alpha/beta bands and at the line frequency
+               (1/f slope, alpha peak, line peak should all be visible)
+    ERP        --flashes target flashes; the average epoch's peak in
+               250-500 ms over the background RMS should be close to --snr
+
+Usage:
+    python benchmarks/bench_synthetic.py [--seconds S] [--snr A] [--blocks 10 25 250]
+"""
+import argparse
+import time
+
+import numpy as np
+
+import common  # noqa: F401  (puts the repo root on sys.path)
+from synthetic import SyntheticEEG
+
+BANDS = (("delta 1-4", 1, 4), ("alpha 8-12", 8, 12), ("beta 13-30", 13, 30), ("gamma 30-45", 30, 45))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=300)
+    parser.add_argument("--rate", type=int, default=250)
+    parser.add_argument("--channels", type=int, default=8)
+    parser.add_argument("--blocks", type=int, nargs="*", default=[10, 25, 250, 2500])
+    parser.add_argument("--snr", type=float, default=0.5)
+    parser.add_argument("--flashes", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    total = int(args.seconds * args.rate)
+    print(f"{'block':>7} {'x real time':>12}")
+    for size in args.blocks:
+        eeg = SyntheticEEG(args.rate, args.channels, seed=args.seed)
+        start = time.perf_counter()
+        for _ in range(total // size):
+            eeg.block(size)
+        elapsed = time.perf_counter() - start
+        print(f"{size:>7} {args.seconds / elapsed:>12,.0f}")
+
+    eeg = SyntheticEEG(args.rate, args.channels, snr=0, seed=args.seed)
+    pz = eeg.block(total)[:, min(4, args.channels - 1)].astype(float)
+    freqs = np.fft.rfftfreq(len(pz), 1.0 / args.rate)
+    power = np.abs(np.fft.rfft(pz)) ** 2
+    print("\nPz power per Hz (relative to beta):")
+    beta = power[(freqs >= 13) & (freqs < 30)].mean()
+    for name, lo, hi in BANDS + (("line", eeg.line_hz - 0.5, eeg.line_hz + 0.5),):
+        print(f"  {name:<12} {power[(freqs >= lo) & (freqs < hi)].mean() / beta:>8.2f}")
+
+    # ERP recovery: every flash is a target, about one per second (jittered so line noise
+    # does not phase-lock), averaged on Pz
+    eeg = SyntheticEEG(args.rate, args.channels, snr=args.snr, seed=args.seed)
+    rng = np.random.default_rng(args.seed)
+    background = eeg.rms
+    epochs = []
+    for _ in range(args.flashes):
+        eeg.erp(eeg.index + args.rate // 10)
+        block = eeg.block(args.rate + int(rng.integers(0, args.rate // 10)))
+        epochs.append(block[args.rate // 10:args.rate, min(4, args.channels - 1)])
+    average = np.mean(epochs, axis=0)
+    t = np.arange(len(average)) / args.rate
+    window = (t >= 0.25) & (t <= 0.5)
+    print(f"\nERP over {args.flashes} flashes: peak {average[window].max():.2f} µV, "
+          f"{average[window].max() / background:.2f} x background RMS (configured {args.snr})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,9 @@
+"""Shared helpers for the benchmark scripts"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from callbackloop import CallbackLoop  # noqa: E402,F401  (Tk after() stand-in, shared with core.py)
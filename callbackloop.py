@@ -0,0 +1,52 @@
+"""
+Single-threaded callback loop with Tk's after(ms, fn, *args) semantics.
+
+Runs the headless engine (core.BciCore) the way app.mainloop() runs it in
+main.py: every callback on one thread, in deadline order, so engine state is
+only touched from that thread. The benchmarks use it as a stand-in for
+app.after.
+"""
+import heapq
+import threading
+import time
+
+
+class CallbackLoop:
+    def __init__(self):
+        self.callbacks = 0
+        self._heap = []
+        self._seq = 0
+        self._cond = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="callback-loop", daemon=True)
+        self._thread.start()
+
+    def after(self, ms, fn, *args):
+        with self._cond:
+            self._seq += 1
+            heapq.heappush(self._heap, (time.perf_counter() + ms / 1000.0, self._seq, fn, args))
+            self._cond.notify()
+
+    def after_idle(self, fn, *args):
+        self.after(0, fn, *args)
+
+    def stop(self):
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        self._thread.join()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopped and (not self._heap or self._heap[0][0] > time.perf_counter()):
+                    timeout = self._heap[0][0] - time.perf_counter() if self._heap else None
+                    self._cond.wait(timeout)
+                if self._stopped:
+                    return
+                _, _, fn, args = heapq.heappop(self._heap)
+            self.callbacks += 1
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"❌ Callback {getattr(fn, '__name__', fn)} failed: {e}")
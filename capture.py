@@ -0,0 +1,233 @@
+"""
+Capture and timed replay of the Intendix UDP stream.
+
+Capture file layout (little endian):
+    header  b"ICAP" | version (u8) | reserved (3 bytes)
+    record  t_ns (u64, monotonic since capture start) | port (u16) | length (u16) | datagram
+
+Usage:
+    python capture.py record out.icap [--host 127.0.0.1] [--ports 1000]
+    python capture.py replay in.icap [--speed 1|N|max] [--host 127.0.0.1] [--port P]
+    python capture.py info in.icap
+    python capture.py synth out.icap --text "HELLO!" [--interval 2.0]
+"""
+import argparse
+import socket
+import struct
+import threading
+import time
+
+from ingest import UdpIngest
+from intendix import encode_board_item, make_board_item
+
+MAGIC = b"ICAP"
+VERSION = 1
+_HEADER = struct.Struct('<4sB3x')
+_RECORD = struct.Struct('<QHH')
+
+
+def is_capture_file(path):
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+class CaptureWriter:
+    """Appends raw datagrams with monotonic timestamps to a capture file (thread-safe)"""
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        self._file = open(path, 'wb')
+        self._file.write(_HEADER.pack(MAGIC, VERSION))
+        self._start = time.monotonic_ns()
+
+    def write(self, data, port=0, t_ns=None):
+        self.write_batch(((data, None, port),), t_ns)
+
+    def write_batch(self, batch, t_ns=None):
+        """Writes the (data, addr, port) datagrams of one ingest batch and flushes, so a crash loses none"""
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        with self._lock:
+            if self._file is None:
+                return
+            offset = max(0, t_ns - self._start)
+            for data, _, port in batch:
+                self._file.write(_RECORD.pack(offset, port, len(data)))
+                self._file.write(data)
+                self.count += 1
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_capture(path):
+    """Yields (t_ns, port, datagram) for every record of a capture file"""
+    with open(path, 'rb') as f:
+        magic, version = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a capture file")
+        if version != VERSION:
+            raise ValueError(f"unsupported capture version {version}")
+        while True:
+            head = f.read(_RECORD.size)
+            if len(head) < _RECORD.size:
+                return
+            t_ns, port, length = _RECORD.unpack(head)
+            data = f.read(length)
+            if len(data) < length:
+                return
+            yield t_ns, port, data
+
+
+def write_capture(path, records):
+    """Writes (t_ns, port, datagram) records to a new capture file"""
+    with open(path, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, VERSION))
+        for t_ns, port, data in records:
+            f.write(_RECORD.pack(t_ns, port, len(data)))
+            f.write(data)
+
+
+def synthesize_session(text, interval=2.0, port=1000):
+    """Builds the records a speller session typing text would produce, one selection every interval seconds"""
+    return [(int(i * interval * 1e9), port, encode_board_item(make_board_item(c)))
+            for i, c in enumerate(text)]
+
+
+def replay(records, host="127.0.0.1", port=None, speed=1.0, stop_event=None):
+    """
+    Sends captured datagrams to host. port overrides the recorded port.
+    speed=1 keeps the original timing, N plays N times faster, None sends as fast as possible.
+    Returns the number of datagrams sent.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sent = 0
+    start = time.perf_counter()
+    first_ns = None
+    try:
+        for t_ns, recorded_port, data in records:
+            if stop_event is not None and stop_event.is_set():
+                break
+            if first_ns is None:
+                first_ns = t_ns
+            if speed:
+                delay = start + (t_ns - first_ns) / 1e9 / speed - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+            sock.sendto(data, (host, port or recorded_port))
+            sent += 1
+    finally:
+        sock.close()
+    return sent
+
+
+def _parse_speed(text):
+    if text == "max":
+        return None
+    speed = float(text.rstrip("x"))
+    if speed <= 0:
+        raise argparse.ArgumentTypeError("speed must be positive or 'max'")
+    return speed
+
+
+def _record(args):
+    writer = None
+
+    def on_batch(batch):
+        if writer is not None:
+            writer.write_batch(batch)
+
+    ports = [int(p) for p in args.ports.split(",") if p.strip()]
+    ingest = UdpIngest(on_batch, args.host, ports)
+    ingest.start()
+    # Only once the ports are bound: a failed start leaves no empty capture behind
+    try:
+        writer = CaptureWriter(args.path)
+    except BaseException:
+        ingest.stop()
+        raise
+    print(f"Recording UDP {args.host}:{ports} to {args.path} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1.0)
+            print(f"\r   {writer.count} datagrams", end="", flush=True)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        ingest.stop()
+        writer.close()
+    print(f"\nSaved {writer.count} datagrams to {args.path}")
+
+
+def _replay(args):
+    records = list(read_capture(args.path))
+    if not records:
+        print("Capture is empty")
+        return
+    speed_text = "max speed" if args.speed is None else f"{args.speed:g}x"
+    print(f"Replaying {len(records)} datagrams to {args.host} at {speed_text}")
+    start = time.perf_counter()
+    sent = replay(records, args.host, args.port, args.speed)
+    elapsed = time.perf_counter() - start
+    print(f"Sent {sent} datagrams in {elapsed:.3f} s ({sent / elapsed if elapsed else 0:,.0f}/s)")
+
+
+def _info(args):
+    count = 0
+    total = 0
+    ports = set()
+    last = 0
+    for t_ns, port, data in read_capture(args.path):
+        count += 1
+        total += len(data)
+        ports.add(port)
+        last = t_ns
+    print(f"{args.path}: {count} datagrams, {total} bytes, {last / 1e9:.3f} s, ports {sorted(ports)}")
+
+
+def _synth(args):
+    records = synthesize_session(args.text, args.interval, args.port)
+    write_capture(args.path, records)
+    print(f"Wrote {len(records)} datagrams to {args.path}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    rec = sub.add_parser("record", help="capture datagrams to a file")
+    rec.add_argument("path")
+    rec.add_argument("--host", default="127.0.0.1")
+    rec.add_argument("--ports", default="1000", help="comma separated port list")
+    rec.set_defaults(func=_record)
+
+    rep = sub.add_parser("replay", help="send a capture back to the listener")
+    rep.add_argument("path")
+    rep.add_argument("--host", default="127.0.0.1")
+    rep.add_argument("--port", type=int, default=None, help="override the recorded port")
+    rep.add_argument("--speed", type=_parse_speed, default=1.0, help="1 (real time), N (N times faster) or max")
+    rep.set_defaults(func=_replay)
+
+    info = sub.add_parser("info", help="summarize a capture")
+    info.add_argument("path")
+    info.set_defaults(func=_info)
+
+    syn = sub.add_parser("synth", help="write a synthetic speller session")
+    syn.add_argument("path")
+    syn.add_argument("--text", required=True, help="characters to type, end phrases with '!'")
+    syn.add_argument("--interval", type=float, default=2.0, help="seconds between selections")
+    syn.add_argument("--port", type=int, default=1000)
+    syn.set_defaults(func=_synth)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
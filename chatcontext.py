@@ -0,0 +1,215 @@
+"""
+Token-budgeted conversation context for the chat API.
+
+Every message's token count is computed once when it is appended, so the
+running total is kept incrementally. messages() returns the newest messages
+that fit in `budget` tokens, preceded by a running summary of everything
+older. When the unsummarized tail passes `fold_at` of the budget, its oldest
+turns are handed to summarize(previous_summary, messages) through spawn (the
+app's shared worker pool; a one-thread pool of its own by default), one
+summary at a time: appends while one is running just leave the fold for the
+next append. The folded turns stay in the prompt (budget permitting) until
+the new summary lands, then are dropped. Without a summarizer (or while
+summaries lag) the oldest messages are simply discarded, so memory and
+prompt size stay bounded either way.
+
+With a GenerationTracker, each summary is registered as a "summary"
+generation and passed to summarize(..., generation=...), so reset() and
+close() can stop it at once.
+"""
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+MESSAGE_OVERHEAD = 4  # role + separators, roughly what chat templates add per message
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]", re.UNICODE)
+
+
+def estimate_tokens(text):
+    """Rough BPE-style count: long words split into ~4-char pieces, punctuation counts as one"""
+    count = 0
+    for piece in _TOKEN_RE.findall(text or ""):
+        count += (len(piece) + 3) // 4
+    return count
+
+
+class ConversationContext:
+    def __init__(self, summarize=None, budget=3000, summary_budget=300, fold_at=0.75,
+                 count_tokens=estimate_tokens, spawn=None, tracker=None):
+        self.summarize = summarize
+        self._pool = None
+        if spawn is None:
+            self._pool = ThreadPoolExecutor(1, "summary")
+            spawn = self._pool.submit
+        self.spawn = spawn
+        self.tracker = tracker
+        self.budget = budget
+        self.summary_budget = summary_budget
+        self.fold_at = fold_at
+        self.count_tokens = count_tokens
+        self.summary = ""
+        self.summary_tokens = 0
+        self.summaries = 0
+        self.dropped = 0
+        self.revision = 0      # bumped by append() and reset()
+        self._lock = threading.Lock()
+        self._turns = deque()  # [message, tokens], oldest first, not yet in the summary
+        self._tokens = 0
+        self._folding = 0      # oldest entries of _turns handed to the running summary
+        self._summarizing = False  # stays set until the running summary returns, even across reset()
+        self._generation = 0   # bumped by reset() and close() so stale summaries are ignored
+        self._closed = False
+
+    def append(self, role, content):
+        """Adds a message (counted once) and folds old turns into the summary if needed"""
+        message = {"role": role, "content": content}
+        tokens = self.count_tokens(content) + MESSAGE_OVERHEAD
+        with self._lock:
+            self._turns.append([message, tokens])
+            self._tokens += tokens
+            self.revision += 1
+            fold = self._start_fold()
+            self._drop_overflow()
+        if fold:
+            try:
+                self.spawn(self._summarize, *fold)
+            except RuntimeError:
+                # Pool already shut down (app closing): drop the fold, overflow handles the rest
+                with self._lock:
+                    self._folding = 0
+                    self._summarizing = False
+
+    def messages(self):
+        """Summary (if any) + the newest messages that fit in the budget, oldest first"""
+        with self._lock:
+            tail = []
+            used = 0
+            for message, tokens in reversed(self._turns):
+                if tail and used + tokens > self.budget:
+                    break
+                tail.append(message)
+                used += tokens
+            out = []
+            if self.summary:
+                out.append({"role": "system", "content": SUMMARY_PREFIX + self.summary})
+            out.extend(reversed(tail))
+            return out
+
+    def prompt_tokens(self):
+        """Tokens messages() would send, from the cached counts"""
+        with self._lock:
+            used = 0
+            for _, tokens in reversed(self._turns):
+                if used and used + tokens > self.budget:
+                    break
+                used += tokens
+            return used + (self.summary_tokens + MESSAGE_OVERHEAD if self.summary else 0)
+
+    def reset(self):
+        with self._lock:
+            self._turns.clear()
+            self._tokens = 0
+            self._folding = 0
+            self._generation += 1
+            self.revision += 1
+            self.summary = ""
+            self.summary_tokens = 0
+        self._cancel_summary()
+
+    def close(self):
+        """Stops the summary in flight and starts no new ones"""
+        with self._lock:
+            self._closed = True
+            self._generation += 1
+            self._folding = 0
+        self._cancel_summary()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def __len__(self):
+        return len(self._turns)
+
+    # -- summarization --
+    def _start_fold(self):
+        """Picks the oldest whole turns to summarize (lock held); returns thread args or None"""
+        if (self.summarize is None or self._summarizing or self._closed
+                or self._tokens <= self.budget * self.fold_at):
+            return None
+        # Fold down to half the budget, never splitting a user message from its reply
+        remaining = self._tokens
+        count = 0
+        while count < len(self._turns) - 1 and remaining > self.budget / 2:
+            remaining -= self._turns[count][1]
+            count += 1
+        while count < len(self._turns) - 1 and self._turns[count][0]["role"] != "user":
+            count += 1
+        if count == 0:
+            return None
+        self._folding = count
+        self._summarizing = True
+        folded = [self._turns[i][0] for i in range(count)]
+        return (self._generation, self.summary, folded)
+
+    def _cancel_summary(self):
+        if self.tracker is not None:
+            self.tracker.cancel("summary")
+
+    def _summarize(self, generation, previous, folded):
+        start = time.perf_counter()
+        tracked = None
+        if self.tracker is not None:
+            tracked = self.tracker.start("summary", f"{len(folded)} messages", folded)
+        try:
+            if generation != self._generation:
+                summary = None  # reset or closed while queued
+            elif tracked is None:
+                summary = (self.summarize(previous, folded) or "").strip()
+            else:
+                summary = (self.summarize(previous, folded, generation=tracked) or "").strip()
+        except Exception as e:
+            if tracked is None or not tracked.cancelled():
+                print(f"⚠️ Conversation summary failed: {e}")
+            summary = None
+        finally:
+            if tracked is not None:
+                tracked.finish()
+        with self._lock:
+            self._summarizing = False
+            if generation != self._generation:
+                return
+            count = self._folding
+            self._folding = 0
+            if summary is None:
+                return
+            summary = self._clip(summary)
+            for _ in range(count):
+                _, tokens = self._turns.popleft()
+                self._tokens -= tokens
+            self.summary = summary
+            self.summary_tokens = self.count_tokens(summary)
+            self.summaries += 1
+        print(f"[DEBUG] Folded {count} messages into the summary "
+              f"({self.summary_tokens} tokens, {(time.perf_counter() - start) * 1000:.0f} ms)")
+
+    def _clip(self, summary):
+        """Keeps a runaway summary inside summary_budget"""
+        if self.count_tokens(summary) <= self.summary_budget:
+            return summary
+        words = summary.split()
+        while words and self.count_tokens(" ".join(words)) > self.summary_budget:
+            words = words[:max(1, len(words) * 3 // 4)] if len(words) > 1 else []
+        return " ".join(words)
+
+    def _drop_overflow(self):
+        """Caps what is held (lock held): the budget without a summarizer, twice it while summaries lag"""
+        limit = self.budget if self.summarize is None else 2 * self.budget
+        while len(self._turns) > 1 and self._tokens > limit:
+            _, tokens = self._turns.popleft()
+            self._tokens -= tokens
+            self.dropped += 1
+            if self._folding:
+                self._folding -= 1
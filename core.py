@@ -0,0 +1,1411 @@
+"""
+Headless BCI chat engine: everything main.py does except drawing.
+
+BciCore decodes Intendix datagrams, orders speller input, builds question
+menus (cache, speculation, Groq), streams chat answers (context budget,
+prefetch) and runs P300 selection, without a GUI. All of its state is
+changed on one after(ms, fn, *args) loop: Tk's app.after in main.py, a
+callbackloop.CallbackLoop when headless. What should appear on screen goes
+to a view: ConsoleView prints it, main.TkView draws it, so main.py is only
+the Tk front end.
+
+Heavy modules are imported when first needed: the API client (llmclient,
+http.client and ssl) by the first API call (warmed up in the background once
+the listener is up), numpy by the P300 engine, pylsl by LSL acquisition and
+the marker outlet. Importing core and
+listening on the UDP ports therefore costs a fraction of main.py's old
+module-level imports (benchmarks/bench_startup.py).
+
+    python core.py [--debug]     # speller in, menus and answers on the console
+"""
+import argparse
+import configparser
+import os
+import random
+import threading
+import time
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor
+
+from callbackloop import CallbackLoop
+from capture import CaptureWriter
+from chatcontext import ConversationContext, estimate_tokens
+from generation import GenerationTracker, close_quietly
+from ingest import UdpIngest
+from intendix import ALLOWED_CHARS, clean_character, decode_board_item
+from inputqueue import CHAR, PHRASE, InputQueue
+from latency import LatencyTracer
+from lexicon import LexiconIndex
+from predict import NgramPredictor, partial_word
+from prefetch import AnswerPrefetcher
+from questioncache import QuestionCache
+from questionstream import QuestionStreamParser
+from speculate import SpeculativeGenerator
+
+# --------- API KEY ----------
+GROQ_API_KEY = " "
+
+# Intendix UDP settings (override in config.ini, section [intendix])
+INTENDIX_HOST = "127.0.0.1"
+INTENDIX_PORTS = [1000]
+INTENDIX_CAPTURE = ""
+config = configparser.ConfigParser()
+if config.read(os.path.join(os.path.dirname(os.path.abspath(__file__)), "config.ini")):
+    INTENDIX_HOST = config.get("intendix", "host", fallback=INTENDIX_HOST)
+    ports = config.get("intendix", "ports", fallback="")
+    if ports.strip():
+        INTENDIX_PORTS = [int(p) for p in ports.replace(";", ",").split(",") if p.strip()]
+    # Optional raw capture of every datagram (strftime patterns allowed), see capture.py
+    INTENDIX_CAPTURE = config.get("intendix", "capture", fallback="").strip()
+
+# Chat scrollback: lines kept in the widget, older ones go to archive_dir (config.ini, section [chat])
+CHAT_SCROLLBACK_LINES = config.getint("chat", "scrollback_lines", fallback=2000)
+CHAT_ARCHIVE_DIR = config.get("chat", "archive_dir", fallback="chat_archive")
+# Tokens of recent turns sent with each chat request; older turns are summarized
+CHAT_CONTEXT_TOKENS = config.getint("chat", "context_tokens", fallback=3000)
+CHAT_SUMMARY_TOKENS = config.getint("chat", "summary_tokens", fallback=300)
+CHAT_INSTRUCTION = " Instruction: Respond briefly and in the language of the prompt."
+
+# Groq API client (config.ini, section [api]): requests in flight at once, seconds per call
+# (questions and summaries get question_timeout, a chat answer timeout for its whole stream), retries
+# of transient errors, and worker threads for API calls
+API_BASE_URL = config.get("api", "base_url", fallback="").strip()
+API_MAX_CONCURRENCY = config.getint("api", "max_concurrency", fallback=8)
+API_TIMEOUT = config.getfloat("api", "timeout", fallback=60)
+API_QUESTION_TIMEOUT = config.getfloat("api", "question_timeout", fallback=15)
+API_MAX_RETRIES = config.getint("api", "max_retries", fallback=3)
+API_WORKERS = config.getint("api", "workers", fallback=8)
+
+# Generated questions are cached per topic in memory and on disk (config.ini, section [questions])
+QUESTION_MODEL = "llama-3.3-70b-versatile"
+QUESTION_CACHE_PATH = config.get("questions", "cache_path", fallback="question_cache.sqlite3").strip()
+QUESTION_CACHE_SIZE = config.getint("questions", "cache_size", fallback=256)
+QUESTION_CACHE_TTL = config.getfloat("questions", "cache_ttl_hours", fallback=168) * 3600
+# Menu answers prefetched per menu (config.ini [questions] prefetch: 0 = off, "all" = every question)
+prefetch_setting = config.get("questions", "prefetch", fallback="3").strip().lower()
+PREFETCH_TOP_K = None if prefetch_setting == "all" else int(prefetch_setting or 0)
+# Quiet time (ms) after a speller char before questions are requested for the phrase so far (0 = off)
+SPECULATE_MS = config.getint("questions", "speculate_ms", fallback=800)
+
+# Predictive text learned from typed phrases and questions (config.ini, section [predict])
+PREDICT_PATH = config.get("predict", "path", fallback="predictive_text.json").strip() or None
+# Learned counts are written at most this often (and on close)
+PREDICT_SAVE_MS = config.getint("predict", "save_ms", fallback=60000)
+# Large word list for completions, built with lexicon.py (memory-mapped, optional)
+LEXICON_PATH = config.get("predict", "lexicon", fallback="lexicon.lex").strip()
+
+# P300 selection in graph mode: question flashes and their timing (config.ini, section [p300])
+P300_ISI_MS = config.getint("p300", "isi_ms", fallback=250)
+P300_FLASH_MS = config.getint("p300", "flash_ms", fallback=100)
+# Dynamic stopping: select once one option's posterior reaches stop_threshold, after min_repetitions
+# and at most repetitions rounds of flashes (stop_threshold = 0: always repetitions rounds)
+P300_REPETITIONS = config.getint("p300", "repetitions", fallback=10)
+P300_MIN_REPETITIONS = config.getint("p300", "min_repetitions", fallback=2)
+P300_STOP_THRESHOLD = config.getfloat("p300", "stop_threshold", fallback=0.95)
+# EEG source: "mock" (MockUnicorn) or "lsl" (first LSL stream of lsl_type, or named lsl_name)
+P300_SOURCE = config.get("p300", "source", fallback="mock").strip().lower()
+P300_LSL_TYPE = config.get("p300", "lsl_type", fallback="EEG").strip()
+P300_LSL_NAME = config.get("p300", "lsl_name", fallback="").strip() or None
+# P300 amplitude over background RMS of the MockUnicorn's synthetic EEG
+P300_MOCK_SNR = config.getfloat("p300", "mock_snr", fallback=0.5)
+# Classifier trained by "Calibrate P300" (copy-spelling the calibration words), loaded at start
+P300_MODEL_PATH = config.get("p300", "model", fallback="p300_model.p3m").strip()
+P300_CALIBRATION_TARGETS = config.getint("p300", "calibration_targets", fallback=10)
+P300_CALIBRATION_REPETITIONS = config.getint("p300", "calibration_repetitions", fallback=10)
+CALIBRATION_WORDS = ["WATER", "PAIN", "YES", "NO", "HELP", "MUSIC"]
+
+alphabet = list("ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 _.,?!")
+common_suggestions = [
+    "who","what","how","when","where","why","AI","care","health","education","finances",
+    "blockchain","cryptocurrencies","marriage","sex","addictions","volcanoes","physics","biology"
+]
+
+WELCOME = ("\n" + "="*60 + "\n"
+           "WELCOME TO BCI CHAT SYSTEM\n"
+           + "="*60 + "\n\n"
+           "INSTRUCTIONS:\n\n"
+           "SPELLER MODE (with Intendix):\n"
+           "1. Use the Speller to write your query\n"
+           "2. End with '!' to generate questions\n"
+           "3. A numbered menu will be shown\n"
+           "4. Type the number (1-9) with the Speller\n"
+           "5. Read the AI response\n\n"
+           "GRAPH MODE (with clicks):\n"
+           "1. Type keywords in the text field\n"
+           "2. Press 'Generate Questions'\n"
+           "3. Click on questions to select\n"
+           "4. Press 'Send this question to Chat'\n\n"
+           + "="*60 + "\n\n")
+
+
+def make_api_client(api_key):
+    """Pooled Groq API client for api_key (imports llmclient), or None"""
+    if not api_key or len(api_key) < 10:
+        return None
+    from llmclient import GROQ_BASE_URL, LLMClient
+    try:
+        client = LLMClient(api_key, base_url=API_BASE_URL or GROQ_BASE_URL, max_concurrency=API_MAX_CONCURRENCY,
+                           timeout=API_TIMEOUT, max_retries=API_MAX_RETRIES)
+    except Exception as e:
+        print(f"❌ Groq client init error: {e}")
+        return None
+    print("✓ Groq client initialized successfully")
+    return client
+
+
+def open_question_cache():
+    return QuestionCache(QUESTION_CACHE_PATH or None, capacity=QUESTION_CACHE_SIZE, ttl=QUESTION_CACHE_TTL)
+
+
+def open_lexicon():
+    """The configured lexicon, or None if there is none (or it is unusable)"""
+    if not LEXICON_PATH or not os.path.exists(LEXICON_PATH):
+        return None
+    try:
+        lexicon = LexiconIndex(LEXICON_PATH)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ Lexicon {LEXICON_PATH} not usable: {e}")
+        return None
+    print(f"✓ Lexicon loaded: {len(lexicon)} words")
+    return lexicon
+
+
+class MockUnicorn:
+    """Synthetic 8-channel EEG at 250 Hz in real time; flashes of the attended option evoke a P300"""
+    fs = 250
+    channels = 8
+    def __init__(self, snr=0.5):
+        try:
+            from synthetic import SyntheticEEG
+            self.eeg = SyntheticEEG(self.fs, self.channels, snr=snr)
+        except ImportError:
+            self.eeg = None
+        self.attended = None
+        self.connect()
+    def connect(self):
+        self._start = time.perf_counter()
+        self._sent = 0
+    def flash(self, option, stamp):
+        if self.eeg is not None and option == self.attended:
+            self.eeg.erp(int(round((stamp - self._start) * self.fs)))
+    def read_eeg(self):
+        """Samples since the last call and the time of the last one"""
+        due = int((time.perf_counter() - self._start) * self.fs)
+        if due - self._sent > self.fs:  # no backlog beyond a second
+            if self.eeg is not None:
+                self.eeg.skip(due - self.fs - self._sent)
+            self._sent = due - self.fs
+        n = due - self._sent
+        self._sent = due
+        if self.eeg is None:
+            samples = [[random.gauss(0, 10) for _ in range(self.channels)] for _ in range(n)]
+        else:
+            samples = self.eeg.block(n)
+        return samples, self._start + (due - 1) / self.fs
+
+
+class ConsoleStream:
+    """StreamRenderer stand-in: prints answer pieces on the loop as they arrive"""
+    def __init__(self, after):
+        self.after = after
+        self.cancelled = False
+    def feed(self, text):
+        if text and not self.cancelled:
+            self.after(0, self._show, text)
+    def _show(self, text):
+        if not self.cancelled:
+            print(text, end="", flush=True)
+    def close(self, on_done=None):
+        if on_done is not None and not self.cancelled:
+            self.after(0, on_done)
+    def cancel(self):
+        """Pieces still queued on the loop are dropped"""
+        self.cancelled = True
+
+
+class ConsoleView:
+    """What BciCore shows, printed to the console (main.TkView draws it instead)"""
+    def __init__(self, name=None):
+        self.prefix = f"[{name}] " if name else ""
+    def status(self, text):
+        print(f"{self.prefix}● {text}")
+    def chat(self, text, tag):
+        print(f"{self.prefix}{text}" if self.prefix else text, end="", flush=True)
+    def clear_chat(self):
+        pass
+    def typed(self, text):
+        """Speller chars appended to the prompt"""
+    def prompt(self, text):
+        """Prompt replaced by text"""
+    def suggest(self):
+        """Prompt changed by typing: refresh completions"""
+    def menu(self):
+        """Mode, question menu, selection or calibration changed"""
+    def flash(self, index, on):
+        """Highlights question index (1-based); True once the flash is visible"""
+        return True
+    def answer_stream(self, after):
+        return ConsoleStream(after)
+    def error(self, title, message):
+        print(f"❌ {title}: {message}")
+    def api_missing(self):
+        """No API key when a question is sent; True if the front end takes over (send is dropped)"""
+        return False
+
+
+class BciCore:
+    """
+    One speller user's state and pipeline. Several can share a process (see
+    service.py): pass the loop's after, a spawn(fn, *args) for blocking work
+    (default: a pool of API_WORKERS threads), and the question_cache/lexicon to share;
+    otherwise each opens its own. predict_path is this user's predictive text
+    file. client replaces the Groq client (e.g. a stand-in in benchmarks).
+    """
+    def __init__(self, after, view=None, after_idle=None, host=INTENDIX_HOST, ports=INTENDIX_PORTS,
+                 api_key=GROQ_API_KEY, spawn=None, question_cache=None, lexicon=None,
+                 predict_path=PREDICT_PATH, client=None):
+        self.after = after
+        self.after_idle = after_idle or (lambda fn, *args: after(0, fn, *args))
+        # Blocking work (API calls, training) runs on a bounded pool, not a new thread per request
+        self._pool = None
+        if spawn is None:
+            self._pool = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="core")
+            spawn = self._pool.submit
+        self.spawn = spawn
+        self.view = view or ConsoleView()
+        self.host = host
+        self.ports = list(ports)
+
+        # Groq client (llmclient.LLMClient): created by the first API call
+        self.api_key = api_key
+        self._client = client
+        self._client_ready = client is not None
+        self._own_client = client is None
+        self._client_lock = threading.Lock()
+        if client is None and (not api_key or len(api_key) < 10):
+            print("⚠️ WARNING: No valid Groq API key found")
+
+        # Speller and graph state
+        self.decision_tree = {"root": {"options": [], "next": {}}}
+        self.current_mode = "speller"
+        self.current_node = self.decision_tree["root"]
+        self.breadcrumb_trail = ["Root"]
+        self.is_running = False
+        self.debug_mode = True
+        self.current_question_map = {}
+        self.waiting_for_selection = False
+        self.speller_prefix = ""        # chars since the last '!', as seen by the loop thread
+        self.menu_requested_at = None   # when the current question menu was asked for
+        self._predictor_save_pending = False
+        self.menu_generation = None     # the generation whose menu is still streaming in
+        self.pending_selection = None   # a digit spelled before its option arrived
+
+        # Intendix ingest (buffered_text is only touched by the thread that feeds handle_intendix_batch)
+        self.buffered_text = ""
+        # Ordered chars/phrases; the first event after a drain schedules handle_pending_input on the loop
+        self.pending_input = InputQueue(wake=lambda: self.after(0, self.handle_pending_input))
+        self.intendix_ingest = None
+        self.intendix_packet_count = 0
+        self.intendix_capture = None
+
+        # Per-character latency tracing (socket -> screen)
+        self.latency_tracer = LatencyTracer()
+
+        # Shared ones are closed by their owner, not by close()
+        self._own_cache = question_cache is None
+        self.question_cache = open_question_cache() if question_cache is None else question_cache
+        self._own_lexicon = lexicon is None
+        self.lexicon = open_lexicon() if lexicon is None else lexicon
+        self.predictor = NgramPredictor(predict_path)
+        if self.predictor.path is None or not os.path.exists(self.predictor.path):
+            # First run: start from the old fixed suggestion list
+            for word in common_suggestions:
+                self.predictor.learn(word)
+
+        # In-flight answers and menus; reset, a new phrase or a new menu cancels the ones they supersede
+        self.generations = GenerationTracker()
+        self.conversation = ConversationContext(summarize=self.summarize_conversation, budget=CHAT_CONTEXT_TOKENS,
+                                                summary_budget=CHAT_SUMMARY_TOKENS, spawn=self.spawn,
+                                                tracker=self.generations)
+        # Questions for the phrase being spelled are requested before '!' arrives
+        self.speculator = SpeculativeGenerator(self.request_questions, self.after, debounce_ms=SPECULATE_MS,
+                                               min_chars=3, spawn=self.spawn, tracker=self.generations)
+        # Answers for the shown question menu are fetched while the user spells the digit
+        self.answer_prefetcher = AnswerPrefetcher(self.stream_chat, top_k=PREFETCH_TOP_K, max_workers=3)
+
+        # P300: engine (numpy) and MockUnicorn created on first use, LSL acquisition when configured
+        self.unicorn = None
+        self.p300_engine = None
+        self.eeg_acquisition = None
+        self.calibration = None  # p300.Calibration while a calibration session runs
+        self._p300_lock = threading.Lock()
+        self._p300_missing = False
+
+    # ----------------- Groq client -----------------
+    @property
+    def has_api(self):
+        """An API key is set (no import, no network)"""
+        if self._client_ready and self._client is not None:
+            return True
+        return bool(self.api_key) and len(self.api_key) >= 10
+
+    @property
+    def client(self):
+        """The Groq client, created on first use; None without a usable key"""
+        with self._client_lock:
+            if not self._client_ready:
+                self._client = make_api_client(self.api_key)
+                self._client_ready = True
+            return self._client
+
+    def set_api_key(self, api_key):
+        """Switches to api_key; returns the new client (None if it could not be created)"""
+        with self._client_lock:
+            self.api_key = api_key
+            self._client_ready = False
+            previous, self._client = self._client, None
+        if previous is not None and hasattr(previous, "close"):
+            previous.close()
+        return self.client
+
+    def warm_up_client(self):
+        """Builds the client and opens its first connection in the background, off the first request's path"""
+        if self.has_api:
+            self.spawn(self._warm_up_client)
+
+    def _warm_up_client(self):
+        client = self.client
+        if client is not None and hasattr(client, "warm_up"):
+            client.warm_up()
+
+    def status(self, text):
+        """Status line update from any thread"""
+        self.after(0, self.view.status, text)
+
+    # ----------------- Intendix input -----------------
+    def handle_intendix_batch(self, batch):
+        """Decodes a batch of Intendix datagrams and queues chars/phrases (runs on the ingest thread)"""
+        received_ns = time.perf_counter_ns()
+        if self.intendix_capture is not None:
+            self.intendix_capture.write_batch(batch)
+
+        events = []
+        for data, addr, port in batch:
+            self.intendix_packet_count += 1
+
+            # Single-pass extraction
+            try:
+                item = decode_board_item(data)
+            except ValueError as e:
+                print(f"⚠ Packet #{self.intendix_packet_count} could not be decoded: {e}")
+                continue
+
+            raw_char = item.output_text
+            char = clean_character(raw_char)
+            if char:
+                trace = self.latency_tracer.start(char, received_ns)
+                trace.mark("decoded")
+                print(f"✓ Valid character received: '{char}'")
+
+                events.append((CHAR, char, trace))
+                self.buffered_text += char
+                print(f"   Buffer: '{self.buffered_text}'")
+
+                if char == '!':
+                    phrase = self.buffered_text.replace('!', '').strip()
+                    if phrase:
+                        print(f"\n✓ Complete phrase: '{phrase}'")
+                        print("=" * 60)
+                        events.append((PHRASE, phrase, None))
+                    self.buffered_text = ""
+            elif raw_char:
+                hex_repr = ' '.join(f'{ord(c):04x}' for c in raw_char)
+                print(f"⚠ Invalid character rejected: {repr(raw_char)} (hex: {hex_repr})")
+
+        if events:
+            self.pending_input.put_many(events)
+
+    def start_intendix_listener(self):
+        """Starts the Intendix UDP ingest on the configured address/ports"""
+        if self.intendix_ingest is None:
+            self.intendix_ingest = UdpIngest(self.handle_intendix_batch, self.host, self.ports)
+        self.intendix_ingest.start()
+        # Only once the ports are bound: a failed start leaves no empty capture behind
+        if INTENDIX_CAPTURE and self.intendix_capture is None:
+            path = time.strftime(INTENDIX_CAPTURE)
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+            self.intendix_capture = CaptureWriter(path)
+            print(f"● Capturing Intendix datagrams to {path}")
+
+        print("Waiting for data from Intendix Speller...")
+        print("Type something in the Speller and end with '!'")
+        print("=" * 60)
+        print()
+
+    def stop_intendix_listener(self):
+        if self.intendix_ingest is not None:
+            self.intendix_ingest.stop()
+        if self.intendix_capture is not None:
+            self.intendix_capture.close()
+            print(f"● Saved {self.intendix_capture.count} datagrams to {self.intendix_capture.path}")
+            self.intendix_capture = None
+
+    def finish_trace(self, trace):
+        """Marks a speller char as on screen and closes its trace once the loop is idle again"""
+        if trace is not None:
+            trace.mark("rendered")
+            self.after_idle(trace.finish, "idle")
+
+    def handle_pending_input(self):
+        """Drains every pending speller char/phrase into one batched update (loop thread)"""
+        try:
+            events = self.pending_input.drain()
+            if events:
+                print(f"[DEBUG] Queue drained: {len(events)} event(s)")
+                self.process_input_batch(events)
+        except Exception as e:
+            print(f"Error handling input: {e}")
+            import traceback
+            traceback.print_exc()
+
+    def process_input_batch(self, events):
+        """Applies speller events in arrival order; consecutive typed chars become one prompt insert"""
+        prefix_before = self.speller_prefix
+        typed = []
+        typed_traces = []
+
+        def flush_typed():
+            if typed:
+                self.view.typed("".join(typed))
+                for t in typed_traces:
+                    self.finish_trace(t)
+                typed.clear()
+                typed_traces.clear()
+
+        typing = False
+        for kind, value, trace in events:
+            if kind == PHRASE:
+                flush_typed()
+                typing = False
+                self.process_phrase(value)
+                continue
+
+            if trace is not None:
+                trace.mark("dispatched")
+            print(f"[DEBUG] Speller char: {repr(value)}")
+
+            cleaned = clean_character(value)
+            if not cleaned:
+                continue
+            # Mirrors the listener's phrase buffer: everything since the last '!'
+            self.speller_prefix = "" if cleaned == "!" else self.speller_prefix + cleaned
+
+            # Check if we're in selection mode (numbered menu active)
+            if self.waiting_for_selection and cleaned in self.current_question_map:
+                flush_typed()
+                typing = False
+                self.select_question_by_number(cleaned, trace)
+            elif self.waiting_for_selection and self.menu_generation is not None and cleaned in "123456789":
+                # The menu is still streaming in: select the option once it arrives
+                flush_typed()
+                typing = False
+                self.pending_selection = cleaned
+                self.finish_trace(trace)
+                self.view.status(f"Option {cleaned} is still arriving...")
+            elif self.current_mode == "speller":
+                # Normal mode: add character to input buffer
+                print(f"[DEBUG] Adding character to input: '{cleaned}'")
+                typed.append(cleaned)
+                typed_traces.append(trace)
+                typing = True
+
+        flush_typed()
+        if typing:
+            self.view.status("Typing... (end with '!' to generate questions)")
+            self.view.suggest()
+        if self.speller_prefix and self.speller_prefix != prefix_before and self.has_api and SPECULATE_MS > 0:
+            self.speculator.update(self.speller_prefix)
+
+    def process_phrase(self, phrase):
+        """Called when user completes a phrase with '!' in speller"""
+        print(f"[DEBUG] process_phrase called with raw: {repr(phrase)}")
+
+        # DEEP CLEANING
+        cleaned = ''.join(c for c in phrase if unicodedata.category(c)[0] != 'C' or c == ' ')
+        cleaned = ''.join(c for c in cleaned if c in ALLOWED_CHARS)
+        cleaned = cleaned.strip()
+
+        print(f"[DEBUG] Cleaned phrase: '{cleaned}'")
+
+        if cleaned:
+            # What the user spells is the best predictor of what they will spell
+            self.predictor.learn(cleaned, weight=3)
+            self.save_predictor_later()
+
+            # Show what user typed
+            self.view.chat(f"\nYou wrote: {cleaned}\n", "user")
+            self.view.prompt(cleaned)
+            self.view.status(f"Generating questions for: '{cleaned}'...")
+
+            # Generate questions
+            self.start_question_generation(cleaned)
+        else:
+            print("⚠ Empty phrase after cleaning")
+            self.view.status("⚠ Invalid phrase")
+
+    def select_question_by_number(self, number, trace=None):
+        """Sends the menu question typed as a digit with the Speller"""
+        selected_question = self.current_question_map[number]
+
+        # Show selection in chat
+        self.view.chat(f"\n✓ You selected option {number}: {selected_question}\n\n", "system")
+        self.view.chat("="*60 + "\n\n", "system")
+        self.finish_trace(trace)
+
+        # Clear selection state; the rest of a menu still streaming in is no longer wanted
+        self.waiting_for_selection = False
+        self.current_question_map = {}
+        self.pending_selection = None
+        self.generations.cancel("questions")
+
+        # Update graph mode to show selection
+        if self.current_mode == "graph":
+            self.process_selection(selected_question)
+
+        # Send to chat
+        self.send_question(selected_question)
+
+        self.view.status("Question sent. Type new query with '!' or select another.")
+
+    # ----------------- Modes and selection -----------------
+    def set_mode(self, mode):
+        self.current_mode = mode
+        self.current_node = self.decision_tree["root"]
+        self.breadcrumb_trail = ["Root"]
+        self.waiting_for_selection = False
+        self.current_question_map = {}
+        self.pending_selection = None
+        instruction = ("Type or use autocomplete (Speller)" if mode == "speller"
+                       else "Enter keywords and press 'Generate Questions'")
+        self.view.status(f"Mode: {mode} – {instruction}")
+        self.view.menu()
+
+    def go_back(self):
+        if len(self.breadcrumb_trail) > 1:
+            self.breadcrumb_trail = ["Root"]
+            self.current_node = self.decision_tree["root"]
+            self.view.menu()
+            self.view.status("Returned to start")
+
+    def process_selection(self, selected):
+        if self.current_mode == "speller":
+            # In speller mode, add character to input
+            self.view.typed(selected)
+            return
+
+        # Graph mode selection
+        if selected == "Custom":
+            self.set_mode(self.current_mode)
+            return
+
+        self.breadcrumb_trail = ["Root", selected]
+
+        root = self.decision_tree["root"]
+        if selected not in root["next"]:
+            root["next"][selected] = {"options": [], "next": {}}
+        self.current_node = root["next"][selected]
+
+        self.view.menu()
+        self.view.status("✓ Question selected")
+
+    def selected_question(self):
+        """Question picked in graph mode, or None"""
+        return self.breadcrumb_trail[-1] if len(self.breadcrumb_trail) > 1 else None
+
+    def predict(self, text, k=8):
+        """Word completions and the likely next letters for the text typed so far"""
+        start = time.perf_counter()
+        words = self.predictor.predict_words(text, k=k)
+        partial = partial_word(text)
+        if self.lexicon is not None and partial and len(words) < k:
+            # Personal predictions first, then the most frequent lexicon words
+            words = words + [w for w in self.lexicon.complete(partial, k)
+                             if w not in words and w != partial.upper()][:k - len(words)]
+        letters = self.predictor.predict_chars(text, k=5)
+        print(f"[DEBUG] Predictions in {(time.perf_counter() - start) * 1e6:.0f} µs: {words[:3]} / {letters}")
+        return words, letters
+
+    # ----------------- Question Generation -----------------
+    def start_question_generation(self, keyword):
+        """Shows cached or speculated questions as soon as possible, otherwise streams them into the menu from a worker thread"""
+        self.menu_requested_at = time.perf_counter()
+        # A new query supersedes the answer being streamed and any menu still being generated
+        # (speculations are left to take(), which keeps the one for this phrase)
+        self.generations.cancel("answer", "questions")
+        cached = self.question_cache.get(keyword, "initial", QUESTION_MODEL)
+        if cached is not None:
+            print(f"[DEBUG] Question cache hit for: {keyword}")
+            self.speculator.cancel()
+            self.finish_question_generation(keyword, cached[:9])
+            return
+        generation = self.generations.start("questions", keyword)
+        speculation = self.speculator.take(keyword)
+        if speculation is not None:
+            print(f"[DEBUG] Using speculative questions for: {keyword} "
+                  f"({'ready' if speculation.done() else 'in flight'})")
+
+            def speculation_done(future):
+                if generation.cancelled():
+                    generation.finish()
+                    return
+                if future.exception() is not None:
+                    print(f"Speculative generation failed: {future.exception()}")
+                    self.spawn(self.generate_initial_questions_thread, keyword, generation)
+                    return
+                suggestions = future.result()[:9]
+                self.question_cache.put(keyword, suggestions, "initial", QUESTION_MODEL)
+                self.after(0, self.finish_question_generation, keyword, suggestions, generation)
+
+            speculation.add_done_callback(speculation_done)
+            return
+        self.spawn(self.generate_initial_questions_thread, keyword, generation)
+
+    def generate_initial_questions_thread(self, keyword, generation=None):
+        """Generate initial questions from keywords, showing each one as soon as it has streamed in"""
+        if generation is not None and generation.cancelled():
+            generation.finish()
+            return
+        print(f"[DEBUG] Generating questions for: {keyword}")
+        self.status("Generating questions... (AI)")
+
+        def on_question(question):
+            self.after(0, self.add_menu_question, keyword, question, generation)
+
+        try:
+            suggestions = self.generate_questions_from_keyword(keyword, context="initial", on_question=on_question,
+                                                               generation=generation)
+        except Exception as e:
+            print(f"Error generating questions: {e}")
+            suggestions = fallback_generate_questions(keyword)
+
+        # Limit to 9 questions (for digits 1-9)
+        suggestions = suggestions[:9]
+        print(f"[DEBUG] Generated {len(suggestions)} suggestions")
+
+        self.after(0, self.finish_question_generation, keyword, suggestions, generation)
+
+    def begin_menu(self, keyword, generation=None):
+        """Opens an empty question menu; options are added as they arrive"""
+        # A new menu supersedes an answer still streaming
+        self.generations.cancel("answer")
+        self.answer_prefetcher.cancel_all()
+        self.menu_generation = generation
+        self.pending_selection = None
+        if self.menu_requested_at is not None:
+            print(f"[DEBUG] Phrase to menu: {(time.perf_counter() - self.menu_requested_at) * 1000:.0f} ms")
+
+        self.decision_tree["root"]["options"] = []
+        self.decision_tree["root"]["next"] = {}
+        self.current_node = self.decision_tree["root"]
+        self.breadcrumb_trail = ["Root"]
+
+        # Switch to graph mode to show questions
+        self.current_mode = "graph"
+
+        # Numbered question map for speller selection
+        self.current_question_map = {}
+        menu_text = "\n" + "="*60 + "\n"
+        menu_text += "GENERATED QUESTIONS\n"
+        menu_text += "="*60 + "\n\n"
+        self.view.chat(menu_text, "system")
+
+        # Activate selection mode
+        self.waiting_for_selection = True
+
+    def add_menu_option(self, question):
+        """Appends a question to the open menu; False if it is full or already there"""
+        if len(self.current_question_map) >= 9 or question in self.current_question_map.values():
+            return False
+        number = str(len(self.current_question_map) + 1)
+        root = self.decision_tree["root"]
+        root["options"].append(question)
+        root["next"][question] = {"options": [], "next": {}}
+        self.current_question_map[number] = question
+        self.view.chat(f"  {number}. {question}\n\n", "system")
+        if self.has_api:
+            self.answer_prefetcher.add(question, self.conversation.messages(), self.conversation.revision,
+                                       CHAT_INSTRUCTION)
+        return True
+
+    def add_menu_question(self, keyword, question, generation=None):
+        """A question of a streaming menu is complete: show it, selectable at once"""
+        if generation is not None and generation.cancelled():
+            return
+        if self.menu_generation is not generation:
+            self.begin_menu(keyword, generation)
+        if not self.waiting_for_selection:
+            # The user already selected, or left the menu
+            return
+        if not self.add_menu_option(question):
+            return
+        self.view.status(f"Questions arriving... type a number (1-{len(self.current_question_map)}) with Speller")
+        self.view.menu()
+        if self.pending_selection in self.current_question_map:
+            number, self.pending_selection = self.pending_selection, None
+            self.select_question_by_number(number)
+
+    def finish_question_generation(self, keyword, suggestions, generation=None):
+        """Finalize question generation and complete the menu (dropped if its generation was cancelled meanwhile)"""
+        if generation is not None:
+            generation.finish()
+            if generation.cancelled():
+                print(f"[DEBUG] Dropping superseded menu for: {keyword}")
+                if self.menu_generation is generation:
+                    self.menu_generation = None
+                return
+        print(f"[DEBUG] Finishing generation for: {keyword}")
+        if generation is None or self.menu_generation is not generation:
+            self.begin_menu(keyword, generation)
+        self.menu_generation = None
+        if not self.waiting_for_selection:
+            return
+
+        # Whatever did not stream in: cached or speculated menus, the fallback after a failed stream
+        for q in suggestions:
+            self.add_menu_option(q)
+        count = len(self.current_question_map)
+
+        menu_text = "="*60 + "\n"
+        menu_text += f"Type the number (1-{count}) using the Speller to select.\n\n"
+        self.view.chat(menu_text, "system")
+
+        if self.pending_selection is not None:
+            # Spelled a number the menu never reached
+            self.view.chat(f"⚠ There is no option {self.pending_selection}\n", "system")
+            self.pending_selection = None
+
+        self.view.status(f"Questions generated. Click or type number (1-{count}) with Speller")
+        self.view.menu()
+
+    def request_questions(self, keyword, context="initial", on_question=None, generation=None):
+        """One streamed Groq round trip for questions, on_question(q) as each line completes; raises if none"""
+        if context == "initial":
+            system_msg = "You are an assistant that generates short and useful questions in English from keywords or phrases. Include questions like: what, how, when, where, why and 2-3 related conceptual questions. Return only a numbered list, one question per line, like: 1. question"
+            user_msg = f"Topics: {keyword}. Generate 6 short questions (max 10 words each) in English that combine the ideas."
+        else:
+            system_msg = "You are an assistant that generates concise variations and follow-up questions in English from a short question or topic. Return only a numbered list, one question per line, like: 1. question"
+            user_msg = f"Topic or question: {keyword}. Generate 5 short variations / follow-up questions that deepen the topic."
+
+        client = self.client
+        if client is None:
+            raise RuntimeError("Groq client not configured")
+        stream = client.chat.completions.create(
+            model=QUESTION_MODEL,
+            messages=[
+                {"role": "system", "content": system_msg},
+                {"role": "user", "content": user_msg}
+            ],
+            temperature=0.6,
+            max_tokens=200,
+            stream=True,
+            timeout=API_QUESTION_TIMEOUT
+        )
+        if generation is not None:
+            generation.attach(stream)
+        parser = QuestionStreamParser(limit=9)
+
+        def emit(questions):
+            if on_question is not None:
+                for q in questions:
+                    on_question(q)
+
+        try:
+            for chunk in stream:
+                if generation is not None and generation.cancelled():
+                    break
+                try:
+                    piece = chunk.choices[0].delta.content
+                except Exception:
+                    piece = getattr(chunk.choices[0].delta, "content", "")
+                if not piece:
+                    continue
+                if generation is not None:
+                    generation.feed(piece)
+                emit(parser.feed(piece))
+                if parser.done():
+                    break  # nine is all the menu holds
+        finally:
+            # Stops the server generating more and frees the client's request slot
+            close_quietly(stream)
+        emit(parser.finish())
+        if generation is not None and generation.cancelled():
+            raise RuntimeError("Question generation cancelled")
+        if not parser.questions:
+            raise ValueError("No questions obtained from the API.")
+        return parser.questions[:9]
+
+    def generate_questions_from_keyword(self, keyword, context="initial", on_question=None, generation=None):
+        """Call Groq to generate questions (API answers go to question_cache, fallbacks don't)"""
+        shown = []
+
+        def show(question):
+            shown.append(question)
+            if on_question is not None:
+                on_question(question)
+
+        if self.has_api:
+            try:
+                questions = self.request_questions(keyword, context, on_question=show, generation=generation)
+                self.question_cache.put(keyword, questions, context, QUESTION_MODEL)
+                return questions
+            except Exception as e:
+                print(f"Groq API error: {e}")
+                if shown:
+                    # The stream broke after some questions were on screen: keep them, don't cache them
+                    return shown
+        return fallback_generate_questions(keyword) if context == "initial" else fallback_generate_more(keyword)
+
+    # ----------------- Chat API -----------------
+    def send_question(self, question):
+        """Shows the question in the chat and answers it on a worker thread"""
+        if not self.has_api and self.view.api_missing():
+            return
+        self.view.chat(f"\nQuestion: {question}\n\n", "user")
+        # One answer at a time: a new question supersedes the one still streaming
+        self.generations.cancel("answer")
+        generation = self.generations.start("answer", question, self.conversation.messages())
+        generation.prompt_tokens += estimate_tokens(question + CHAT_INSTRUCTION)
+        self.spawn(self.send_question_thread, question, generation)
+
+    def send_question_thread(self, question, generation=None):
+        generation = generation or self.generations.start("answer", question)
+        renderer = self.view.answer_stream(self.after)
+        # Text already handed to the renderer but not yet on screen is dropped on cancel
+        generation.on_cancel(renderer.cancel)
+        if generation.cancelled():
+            generation.finish()
+            return
+        self.status("⏳ Sending question to Groq...")
+        response = self.answer_from_prefetch(question, renderer.feed, generation)
+        if response is None:
+            response = self.send_to_chat_api(question, on_piece=renderer.feed, generation=generation)
+        if generation.cancelled():
+            generation.finish()
+            print(f"[DEBUG] Answer cancelled: {question} ({len(response)} chars received)")
+            return
+        # Model answers are not learned: the user spells phrases and picks questions, not answers
+        self.predictor.learn(question, weight=2)
+
+        def update_chat():
+            # Live until its last piece is on screen, so a reset in the final frames still cancels the renderer
+            generation.finish()
+            if generation.cancelled():
+                return
+            self.save_predictor_later()
+            self.view.chat(f"\n{'='*60}\n\n", "ai")
+            self.view.status("✓ Response received. Type new query or select another question.")
+
+        # Separator goes in after the last buffered piece
+        renderer.close(update_chat)
+
+    def summarize_conversation(self, previous, messages, generation=None):
+        """Folds old turns into the running summary (runs on a worker); generation.cancel() closes the stream"""
+        client = self.client
+        if client is None:
+            return ""
+        transcript = "\n".join(f"{m['role']}: {m['content']}" for m in messages)
+        stream = client.chat.completions.create(
+            model="llama-3.3-70b-versatile",
+            messages=[
+                {"role": "system", "content": f"Summarize the conversation so far in at most {CHAT_SUMMARY_TOKENS // 2} words. Keep names, facts, decisions and open questions. Return only the summary."},
+                {"role": "user", "content": f"Previous summary: {previous or '(none)'}\n\nNew turns:\n{transcript}"}
+            ],
+            temperature=0.3,
+            max_tokens=CHAT_SUMMARY_TOKENS,
+            stream=True,
+            timeout=API_QUESTION_TIMEOUT
+        )
+        if generation is not None:
+            generation.attach(stream)
+        summary = ""
+        try:
+            for chunk in stream:
+                if generation is not None and generation.cancelled():
+                    break
+                piece = getattr(chunk.choices[0].delta, "content", "")
+                if piece:
+                    summary += piece
+                    if generation is not None:
+                        generation.feed(piece)
+        finally:
+            close_quietly(stream)
+        return summary
+
+    def stream_chat(self, messages, on_piece=None, cancelled=None, generation=None, on_stream=None):
+        """
+        Streams one chat completion; pieces go to on_piece, stops early once cancelled() is true.
+        With a generation (or an on_stream callback that keeps the stream), cancel closes the
+        stream at once instead of at the next chunk.
+        """
+        if generation is not None:
+            cancelled = generation.cancelled
+        client = self.client
+        if client is None:
+            raise RuntimeError("Groq client not configured")
+        full_response = ""
+        start = time.perf_counter()
+        stream = None
+        try:
+            stream = client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages,
+                stream=True,
+                temperature=0.7,
+                max_tokens=500,
+                timeout=API_TIMEOUT
+            )
+            if generation is not None:
+                generation.attach(stream)
+            if on_stream is not None:
+                on_stream(stream)
+            for chunk in stream:
+                if cancelled is not None and cancelled():
+                    break
+                try:
+                    piece = chunk.choices[0].delta.content
+                except Exception:
+                    piece = getattr(chunk.choices[0].delta, "content", "")
+                if piece:
+                    if not full_response:
+                        print(f"[DEBUG] First token after {(time.perf_counter() - start) * 1000:.0f} ms")
+                    full_response += piece
+                    if generation is not None:
+                        generation.feed(piece)
+                    if on_piece is not None:
+                        on_piece(piece)
+        except Exception as e:
+            if cancelled is not None and cancelled():
+                return full_response
+            if full_response:
+                # Part of the answer is on screen: keep it rather than ask for a different one
+                print(f"⚠️ Answer stream broken after {len(full_response)} chars: {e}")
+                self.status("⚠ Answer cut short")
+                return full_response
+            from llmclient import DeadlineExceeded
+            if isinstance(e, DeadlineExceeded):
+                raise
+            print(f"[DEBUG] Stream failed ({e}), retrying without streaming")
+            resp = client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=messages,
+                stream=False,
+                temperature=0.7,
+                max_tokens=500,
+                timeout=API_TIMEOUT
+            )
+            try:
+                full_response = resp.choices[0].message.content
+            except Exception:
+                full_response = getattr(resp.choices[0], "text", str(resp))
+            if on_piece is not None:
+                on_piece(full_response)
+        finally:
+            # An unfinished stream holds one of the client's request slots until it is closed
+            if stream is not None:
+                close_quietly(stream)
+        return full_response
+
+    def send_to_chat_api(self, prompt, on_piece=None, generation=None):
+        """
+        Sends prompt with the budgeted conversation; streamed text is passed to on_piece as it arrives.
+        The turn is added to the conversation once answered, not if the generation was cancelled.
+        """
+        user_message = {"role": "user", "content": prompt + CHAT_INSTRUCTION}
+        if self.client is None:
+            full_response = f"(Simulated response for '{prompt}')"
+            self.record_turn(prompt, full_response, generation)
+            return full_response
+        messages = self.conversation.messages() + [user_message]
+        print(f"[DEBUG] Chat request: {len(messages)} messages, "
+              f"~{self.conversation.prompt_tokens() + estimate_tokens(user_message['content'])} tokens")
+        try:
+            full_response = self.stream_chat(messages, on_piece, generation=generation)
+        except Exception as e:
+            if generation is not None and generation.cancelled():
+                return ""
+            full_response = f"Error: {e}"
+            self.after(0, self.view.error, "API Error", f"Failed to connect to Groq: {e}")
+            self.status("Status: API Error")
+        self.record_turn(prompt, full_response, generation)
+        return full_response
+
+    def record_turn(self, question, answer, generation=None):
+        """
+        Adds an answered turn to the conversation. A generation's turn goes through the loop,
+        where cancels happen, and is dropped if the generation was cancelled by then.
+        """
+        if generation is not None:
+            self.after(0, self._record_turn, question, answer, generation)
+        else:
+            self._record_turn(question, answer)
+
+    def _record_turn(self, question, answer, generation=None):
+        if generation is not None and generation.cancelled():
+            return
+        self.conversation.append("user", question + CHAT_INSTRUCTION)
+        self.conversation.append("assistant", answer)
+
+    def answer_from_prefetch(self, question, on_piece, generation=None):
+        """Answers from a menu prefetch if there is a usable one; returns None to fall back to a request"""
+        prefetch = self.answer_prefetcher.claim(question, self.conversation.revision)
+        if prefetch is None:
+            return None
+        print(f"[DEBUG] Answer prefetched for: {question} ({len(prefetch.text())} chars ready)")
+        if generation is not None:
+            # Its tokens are the prefetcher's to count as wasted
+            generation.prompt_tokens = 0
+            generation.on_cancel(lambda: self.answer_prefetcher.cancel(prefetch))
+        shown = []
+
+        def forward(piece):
+            shown.append(piece)
+            on_piece(piece)
+
+        full_response, error = prefetch.attach(forward)
+        if generation is not None and generation.cancelled():
+            return full_response
+        if error is not None and not shown:
+            return None
+        if error is not None:
+            full_response += f"\nError: {error}"
+            on_piece(f"\nError: {error}")
+            self.status("Status: API Error")
+        self.record_turn(question, full_response, generation)
+        return full_response
+
+    # ----------------- P300 -----------------
+    def p300(self):
+        """The P300 engine, created on first use (imports numpy); None without numpy"""
+        with self._p300_lock:
+            if self.p300_engine is None and not self._p300_missing:
+                try:
+                    from p300 import P300Engine
+                except ImportError:
+                    print("⚠️ 'numpy' module not installed, P300 selection disabled. Use: pip install numpy")
+                    self._p300_missing = True
+                    return None
+                self.unicorn = MockUnicorn(snr=P300_MOCK_SNR)
+                self.p300_engine = P300Engine(fs=self.unicorn.fs, channels=self.unicorn.channels,
+                                              repetitions=P300_REPETITIONS, threshold=P300_STOP_THRESHOLD,
+                                              min_repetitions=P300_MIN_REPETITIONS)
+                self.load_p300_model()
+            return self.p300_engine
+
+    def start_eeg_acquisition(self):
+        """Switches the P300 engine to an LSL EEG stream filled by its own thread (falls back to MockUnicorn)"""
+        if self.eeg_acquisition is not None or P300_SOURCE != "lsl" or self.p300() is None:
+            return
+        try:
+            from acquisition import LslAcquisition
+            acquisition = LslAcquisition(P300_LSL_TYPE, P300_LSL_NAME).start()
+        except (ImportError, RuntimeError) as e:
+            print(f"⚠️ {e}; using MockUnicorn")
+            return
+        from p300 import P300Engine
+        self.p300_engine = P300Engine(fs=acquisition.fs, channels=acquisition.channels,
+                                      repetitions=P300_REPETITIONS, threshold=P300_STOP_THRESHOLD,
+                                      min_repetitions=P300_MIN_REPETITIONS, buffer=acquisition.buffer)
+        self.load_p300_model()
+        self.eeg_acquisition = acquisition
+
+    def stop_eeg_acquisition(self):
+        if self.eeg_acquisition is not None:
+            self.eeg_acquisition.stop()
+            print(f"● EEG acquisition stopped: {self.eeg_acquisition.format_stats()}")
+            self.eeg_acquisition = None
+
+    def load_p300_model(self):
+        """Loads the calibrated classifier into the P300 engine, if there is one for this stream"""
+        if self.p300_engine is None or not P300_MODEL_PATH or not os.path.exists(P300_MODEL_PATH):
+            return
+        start = time.perf_counter()
+        try:
+            epochs, accuracy = self.p300_engine.load(P300_MODEL_PATH)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ P300 model not loaded: {e}")
+            return
+        print(f"✓ P300 model loaded in {(time.perf_counter() - start) * 1000:.1f} ms "
+              f"({epochs} calibration epochs, accuracy {accuracy:.0%})")
+
+    def start_calibration(self):
+        """Starts a copy-spelling calibration session; False if P300 is not available"""
+        engine = self.p300()
+        if engine is None:
+            return False
+        from p300 import Calibration
+        self.set_mode("graph")
+        engine.clear_labeled()
+        self.calibration = Calibration(CALIBRATION_WORDS, P300_CALIBRATION_TARGETS, P300_CALIBRATION_REPETITIONS)
+        self.view.menu()
+        self.view.status(f"Calibration: focus on the named word while the words flash "
+                         f"({len(self.calibration.targets)} targets)")
+        if not self.is_running:
+            self.start_interface()
+        return True
+
+    def train_p300_model(self):
+        """Trains the classifier on the calibration epochs (background thread) and saves it"""
+        engine = self.p300_engine
+        start = time.perf_counter()
+        try:
+            classifier, accuracy = engine.train()
+        except ValueError as e:
+            print(f"❌ P300 calibration failed: {e}")
+            self.status(f"❌ P300 calibration failed: {e}")
+        else:
+            epochs = len(engine.labeled()[1])
+            engine.classifier = classifier
+            engine.reset()
+            message = (f"✓ P300 calibrated on {epochs} epochs in {time.perf_counter() - start:.1f} s, "
+                       f"held-out accuracy {accuracy:.0%}")
+            if P300_MODEL_PATH:
+                engine.save(P300_MODEL_PATH, epochs, accuracy)
+                message += f", saved to {P300_MODEL_PATH}"
+            print(message)
+            self.status(message)
+        engine.clear_labeled()
+        self.calibration = None
+        self.after(0, self.view.menu)
+
+    def flash_question(self, index, option, on, label=None):
+        """One flash of question index; marked for the P300 engine once the view has drawn it (loop thread)"""
+        if self.current_mode != "graph" or not self.view.flash(index, on) or not on:
+            return
+        stamp = time.perf_counter()
+        self.p300_engine.mark(option, stamp, label)
+        if self.eeg_acquisition is None:
+            self.unicorn.flash(option, stamp)
+
+    # ----------------- Interface Runtime -----------------
+    def start_interface(self):
+        """Listens for the speller and starts the selection loop; False if the ports can't be bound"""
+        if self.is_running:
+            self.view.status("Interface already running.")
+            return False
+
+        try:
+            self.start_intendix_listener()
+        except OSError as e:
+            print(f"❌ Could not bind Intendix UDP port: {e}")
+            self.view.status(f"❌ Could not listen on UDP {self.host}:{self.ports}: {e}")
+            return False
+        self.is_running = True
+        self.warm_up_client()
+
+        threading.Thread(target=self.run_interface, daemon=True).start()
+
+        self.view.chat(WELCOME, "system")
+        ports = ", ".join(str(p) for p in self.ports)
+        self.view.status(f"Interface started. Speller listening on UDP {ports}.")
+        return True
+
+    def stop_interface(self):
+        self.is_running = False
+        self.stop_intendix_listener()
+        self.status("Interface stopped.")
+
+    def run_interface(self):
+        outlet = None
+        flash_options, sequence, next_flash = [], [], 0.0
+        train_at = None  # when the finished calibration is trained
+        if not self.debug_mode:
+            self.start_eeg_acquisition()
+        try:
+            from pylsl import StreamInfo, StreamOutlet
+            info = StreamInfo('BCIInterface', 'Markers', 1, 0, 'string', 'bci_marker')
+            outlet = StreamOutlet(info)
+        except ImportError:
+            pass
+        except Exception as e:
+            print("LSL outlet error:", e)
+
+        try:
+            while self.is_running:
+                if self.debug_mode and self.calibration is None:
+                    time.sleep(1.2)
+                    if self.current_mode == "speller":
+                        label = random.choice(alphabet)
+                        self.after(0, self.process_selection, label)
+                        if outlet:
+                            outlet.push_sample([label])
+                else:
+                    engine = self.p300() if self.current_mode == "graph" else None
+                    if engine is not None:
+                        try:
+                            if self.eeg_acquisition is None:
+                                samples, stamp = self.unicorn.read_eeg()
+                                engine.push(samples, stamp)
+                            calibrating = self.calibration
+                            if calibrating is not None:
+                                options = [] if calibrating.done else calibrating.options
+                            else:
+                                options = list(self.current_node.get("options", []))
+                            if options != flash_options:
+                                # New menu: start the flash sequence and the scores over
+                                engine.reset()
+                                flash_options, sequence = options, []
+                                if self.eeg_acquisition is None and options:
+                                    self.unicorn.attended = calibrating.target if calibrating else random.choice(options)
+                                    print(f"[DEBUG] MockUnicorn attends {self.unicorn.attended!r}")
+                            if options and time.perf_counter() >= next_flash:
+                                if not sequence:
+                                    sequence = random.sample(range(len(options)), len(options))
+                                index = sequence.pop()
+                                label = calibrating.label() if calibrating else None
+                                self.after(0, self.flash_question, index + 1, options[index], True, label)
+                                self.after(P300_FLASH_MS, self.flash_question, index + 1, options[index], False)
+                                if outlet:
+                                    outlet.push_sample([f"flash:{index + 1}"])
+                                next_flash = time.perf_counter() + P300_ISI_MS / 1000
+                                if calibrating and not sequence and calibrating.next_round():
+                                    # Next copy-spelling target, or done: train once the last epochs are in
+                                    self.unicorn.attended = calibrating.target
+                                    self.after(0, self.view.menu)
+                                    if calibrating.done:
+                                        train_at = time.perf_counter() + 1.5
+                            engine.process()
+                            if calibrating is not None:
+                                if train_at and time.perf_counter() >= train_at and engine.pending() == 0:
+                                    train_at = None
+                                    self.spawn(self.train_p300_model)
+                                time.sleep(0.02)
+                                continue
+                            sel = engine.decide(options)
+                            if sel:
+                                print(f"[DEBUG] P300 selected {sel!r} after {engine.selection_rounds[-1]} rounds; "
+                                      f"{engine.format_stats()}")
+                                self.after(0, self.process_selection, sel)
+                                if outlet:
+                                    outlet.push_sample([sel])
+                        except Exception as e:
+                            print(f"EEG read error: {e}")
+                    time.sleep(0.02)
+        except Exception as e:
+            print("Error run_interface:", e)
+        finally:
+            self.is_running = False
+            self.stop_eeg_acquisition()
+            self.status("Interface finished.")
+
+    def format_stats(self):
+        """Debug overlay lines: latency, caches, prefetch, generations, API client, P300 and EEG source"""
+        client = self._client if self._client_ready else None
+        return [self.latency_tracer.format_overlay(), self.question_cache.format_stats(),
+                self.answer_prefetcher.format_stats(), self.generations.format_stats(),
+                client.format_stats() if hasattr(client, "format_stats") else "API: no client",
+                self.p300_engine.format_stats() if self.p300_engine else "P300: off",
+                self.eeg_acquisition.format_stats() if self.eeg_acquisition else "EEG: MockUnicorn"]
+
+    # ----------------- Reset -----------------
+    def reset(self):
+        # Stop whatever is still streaming before the chat is cleared under it
+        self.generations.cancel()
+        self.conversation.reset()
+        self.calibration = None
+        self.decision_tree = {"root": {"options": [], "next": {}}}
+        self.current_node = self.decision_tree["root"]
+        self.breadcrumb_trail = ["Root"]
+        self.current_mode = "speller"
+        self.buffered_text = ""
+        self.current_question_map = {}
+        self.waiting_for_selection = False
+        self.pending_selection = None
+        self.pending_input.clear()
+        self.answer_prefetcher.cancel_all()
+        self.speculator.cancel()
+        self.speller_prefix = ""
+
+        self.view.prompt("")
+        self.view.clear_chat()
+        self.view.status("Reset completed. Ready for new query.")
+        self.view.menu()
+
+    def save_predictor_later(self):
+        """Writes the predictive text model PREDICT_SAVE_MS after the first unsaved change (loop thread)"""
+        if self._predictor_save_pending or not self.predictor.path:
+            return
+        self._predictor_save_pending = True
+        self.after(PREDICT_SAVE_MS, self._save_predictor)
+
+    def _save_predictor(self):
+        self._predictor_save_pending = False
+        try:
+            self.spawn(self.predictor.save)
+        except RuntimeError:
+            pass  # closed meanwhile; close() saved it
+
+    def close(self):
+        self.stop_interface()
+        self.answer_prefetcher.shutdown()
+        self.speculator.shutdown()
+        self.conversation.close()
+        self.predictor.save()
+        if self._own_cache:
+            self.question_cache.close()
+        if self._own_lexicon and self.lexicon is not None:
+            self.lexicon.close()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._own_client and self._client is not None:
+            self._client.close()
+
+
+def fallback_generate_questions(keyword):
+    basic = [
+        f"What is {keyword}?",
+        f"How does {keyword} work?",
+        f"When is {keyword} applied?",
+        f"Where is {keyword} observed?",
+        f"Why is {keyword} relevant?"
+    ]
+    conceptual = [
+        f"Common examples of {keyword}",
+        f"Benefits and risks of {keyword}"
+    ]
+    suggestions = basic + conceptual
+    return suggestions[:9]
+
+
+def fallback_generate_more(selected_option):
+    return [
+        f"Explain more about {selected_option}",
+        f"Common problems related to {selected_option}",
+        f"How to measure the impact of {selected_option}",
+        f"Practical recommendations on {selected_option}",
+        f"Use cases for {selected_option}"
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless BCI chat engine: Intendix speller in, menus and answers on the console")
+    parser.add_argument("--debug", action="store_true", help="simulate speller clicks like the GUI's debug mode")
+    args = parser.parse_args()
+
+    loop = CallbackLoop()
+    bci = BciCore(loop.after, after_idle=loop.after_idle)
+    bci.debug_mode = args.debug
+    if not bci.start_interface():
+        raise SystemExit(1)
+    try:
+        while bci.is_running:
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        bci.close()
+        loop.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+Cancellable handles for in-flight API generations (chat answers, question menus).
+
+Each request runs under a Generation. When it is superseded (reset, a new
+phrase, a new menu), cancel() marks it cancelled, closes its HTTP stream so
+the blocked read wakes up and the server stops generating, and runs its
+cancel callbacks (e.g. the renderer's cancel(), which drops text not yet on
+screen). The worker checks cancelled() and leaves the conversation and the
+view alone from then on. GenerationTracker keeps the live generations and
+counts the tokens spent on the ones cancelled before they finished.
+"""
+import threading
+
+from chatcontext import MESSAGE_OVERHEAD, estimate_tokens
+
+
+def close_quietly(stream):
+    close = getattr(stream, "close", None)
+    if close is None:
+        return
+    try:
+        close()
+    except Exception as e:
+        # e.g. a generator stand-in closed while its thread is inside it
+        print(f"[DEBUG] Stream close failed: {e}")
+
+
+class Generation:
+    def __init__(self, tracker, kind, label, prompt_tokens=0):
+        self.tracker = tracker
+        self.kind = kind
+        self.label = label
+        self.prompt_tokens = prompt_tokens
+        self._event = threading.Event()
+        self._lock = threading.Lock()
+        self._stream = None
+        self._callbacks = []
+        self._pieces = []
+
+    def cancelled(self):
+        return self._event.is_set()
+
+    def attach(self, stream):
+        """The response stream to close on cancel(); closed at once if already cancelled"""
+        with self._lock:
+            if not self._event.is_set():
+                self._stream = stream
+                return
+        close_quietly(stream)
+
+    def on_cancel(self, fn):
+        """Runs fn() on cancel() (at once if already cancelled)"""
+        with self._lock:
+            if not self._event.is_set():
+                self._callbacks.append(fn)
+                return
+        fn()
+
+    def feed(self, piece):
+        """Generated text so far, for the wasted-token count"""
+        with self._lock:
+            self._pieces.append(piece)
+
+    def text(self):
+        with self._lock:
+            return "".join(self._pieces)
+
+    def cancel(self):
+        """Aborts the stream and runs the cancel callbacks; False if already cancelled"""
+        with self._lock:
+            if self._event.is_set():
+                return False
+            self._event.set()
+            stream, self._stream = self._stream, None
+            callbacks, self._callbacks = self._callbacks, []
+        if stream is not None:
+            close_quietly(stream)
+        for fn in callbacks:
+            fn()
+        return True
+
+    def finish(self):
+        """The worker is done with it (cancelled or not)"""
+        with self._lock:
+            self._stream = None
+            self._callbacks = []
+        self.tracker.finished(self)
+
+
+class GenerationTracker:
+    def __init__(self):
+        self.started = 0
+        self.completed = 0
+        self.cancelled = 0
+        self.wasted_tokens = 0
+        self._lock = threading.Lock()
+        self._live = []
+
+    def start(self, kind, label, messages=()):
+        """A live Generation; messages is the prompt, counted as wasted if it gets cancelled"""
+        prompt_tokens = sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+        generation = Generation(self, kind, label, prompt_tokens)
+        with self._lock:
+            self._live.append(generation)
+            self.started += 1
+        return generation
+
+    def cancel(self, *kinds):
+        """Cancels the live generations of kinds (all of them without kinds); returns how many"""
+        with self._lock:
+            doomed = [g for g in self._live if not kinds or g.kind in kinds]
+            self._live = [g for g in self._live if g not in doomed]
+        count = 0
+        for generation in doomed:
+            if generation.cancel():
+                count += 1
+                tokens = generation.prompt_tokens + estimate_tokens(generation.text())
+                with self._lock:
+                    self.cancelled += 1
+                    self.wasted_tokens += tokens
+                print(f"[DEBUG] Cancelled {generation.kind} '{generation.label}' (~{tokens} tokens wasted)")
+        return count
+
+    def finished(self, generation):
+        with self._lock:
+            if generation in self._live:
+                self._live.remove(generation)
+                if not generation.cancelled():
+                    self.completed += 1
+
+    def live(self, *kinds):
+        with self._lock:
+            return [g for g in self._live if not kinds or g.kind in kinds]
+
+    def stats(self):
+        with self._lock:
+            return {
+                "started": self.started,
+                "completed": self.completed,
+                "cancelled": self.cancelled,
+                "live": len(self._live),
+                "wasted_tokens": self.wasted_tokens,
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"Generations: {s['completed']} completed, {s['live']} live, {s['cancelled']} cancelled, "
+                f"~{s['wasted_tokens']} tokens wasted")
@@ -0,0 +1,145 @@
+"""
+Non-blocking UDP ingest for the Intendix speller.
+
+UdpIngest binds one socket per configured port, waits on all of them with a
+selector and drains every readable socket in batches into preallocated
+buffers. A socketpair wakes the selector, so stop() returns as soon as the
+ingest thread has seen it instead of waiting for the next datagram.
+"""
+import selectors
+import socket
+import threading
+import traceback
+
+MAX_DATAGRAM = 12264
+
+
+class UdpIngest:
+    """
+    Receives datagrams on (host, port) for every port and hands them to
+    on_batch(batch) from the ingest thread.
+
+    batch is a list of (memoryview, addr, port) tuples, port being the local
+    port the datagram arrived on. The views point into buffers
+    that are reused for the next batch, so the callback must decode or copy
+    them before returning.
+    """
+
+    def __init__(self, on_batch, host="127.0.0.1", ports=(1000,), batch_size=64,
+                 bufsize=MAX_DATAGRAM, rcvbuf=1 << 20):
+        self.on_batch = on_batch
+        self.host = host
+        self.ports = list(ports)
+        self.batch_size = batch_size
+        self.bufsize = bufsize
+        self.rcvbuf = rcvbuf
+        self.addresses = []
+        self.packets = 0
+        self.batches = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._stopping = False
+        self._selector = None
+        self._sockets = []
+        self._wake_r = self._wake_w = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Binds the sockets and starts the ingest thread. Returns False if already running."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+
+            sockets = []
+            try:
+                for port in self.ports:
+                    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+                    sockets.append(sock)
+                    sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+                    try:
+                        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+                    except OSError:
+                        pass
+                    sock.bind((self.host, port))
+                    sock.setblocking(False)
+            except OSError:
+                for sock in sockets:
+                    sock.close()
+                raise
+
+            self._sockets = sockets
+            self.addresses = [sock.getsockname() for sock in sockets]
+            self._wake_r, self._wake_w = socket.socketpair()
+            self._wake_r.setblocking(False)
+            self._selector = selectors.DefaultSelector()
+            self._selector.register(self._wake_r, selectors.EVENT_READ)
+            for sock, address in zip(sockets, self.addresses):
+                self._selector.register(sock, selectors.EVENT_READ, address[1])
+
+            self._stopping = False
+            self._thread = threading.Thread(target=self._run, name="udp-ingest", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self, timeout=2.0):
+        """Stops the ingest thread and closes the sockets. Safe to call more than once."""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._stopping = True
+            try:
+                self._wake_w.send(b"\0")
+            except OSError:
+                pass
+            thread.join(timeout)
+            if thread.is_alive():
+                print("⚠ UDP ingest thread did not stop in time")
+
+            self._selector.close()
+            for sock in self._sockets + [self._wake_r, self._wake_w]:
+                sock.close()
+            self._sockets = []
+            self._selector = None
+            self._wake_r = self._wake_w = None
+            self._thread = None
+
+    def _run(self):
+        views = [memoryview(bytearray(self.bufsize)) for _ in range(self.batch_size)]
+        batch = []
+        selector = self._selector
+        wake_r = self._wake_r
+        while not self._stopping:
+            try:
+                events = selector.select()
+            except OSError as e:
+                print(f"❌ UDP ingest select error: {e}")
+                break
+            for key, _ in events:
+                sock = key.fileobj
+                if sock is wake_r:
+                    continue
+                port = key.data
+                # Drain the socket: one batch per wakeup, up to batch_size datagrams
+                batch.clear()
+                for view in views:
+                    try:
+                        n, addr = sock.recvfrom_into(view)
+                    except (BlockingIOError, InterruptedError):
+                        break
+                    except ConnectionResetError:
+                        # Windows reports ICMP port unreachable on UDP sockets
+                        continue
+                    batch.append((view[:n], addr, port))
+                if not batch:
+                    continue
+                self.packets += len(batch)
+                self.batches += 1
+                try:
+                    self.on_batch(batch)
+                except Exception as e:
+                    print(f"❌ Error in ingest handler: {e}")
+                    traceback.print_exc()
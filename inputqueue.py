@@ -0,0 +1,62 @@
+"""
+Ordered speller input from the listener thread to the UI thread.
+
+Chars and phrases share one queue so their order is kept. The first put after
+a drain calls wake() once (e.g. schedules a Tk callback); the consumer then
+takes everything pending with a single drain(), so a burst of input costs one
+wakeup and one UI update instead of one polling tick per event.
+"""
+import threading
+import time
+from collections import deque
+
+CHAR = "char"
+PHRASE = "phrase"
+
+
+class InputQueue:
+    def __init__(self, wake=None):
+        self.wake = wake
+        self.wakeups = 0
+        self._lock = threading.Lock()
+        self._events = deque()
+        self._wake_pending = False
+
+    def put(self, kind, value, trace=None):
+        self.put_many(((kind, value, trace),))
+
+    def put_many(self, events):
+        """Appends (kind, value, trace) events; wakes the consumer at most once per drain"""
+        with self._lock:
+            self._events.extend(events)
+            if self._wake_pending or not self._events:
+                return
+            self._wake_pending = True
+        self.wakeups += 1
+        if self.wake is not None:
+            try:
+                self.wake()
+            except Exception:
+                # Nobody will drain: let the next put try again
+                with self._lock:
+                    self._wake_pending = False
+                raise
+
+    def drain(self):
+        """Takes every pending event in arrival order and re-arms the wakeup"""
+        now = time.perf_counter_ns()
+        with self._lock:
+            events = list(self._events)
+            self._events.clear()
+            self._wake_pending = False
+        for _, _, trace in events:
+            if trace is not None:
+                trace.mark("dequeued", now)
+        return events
+
+    def clear(self):
+        with self._lock:
+            self._events.clear()
+
+    def __len__(self):
+        return len(self._events)
@@ -0,0 +1,525 @@
+"""
+Intendix Speller packet decoding.
+
+The speller sends every selected board item as a BoardItem object serialized
+with the .NET BinaryFormatter. decode_board_item walks the records of one
+packet a single time over a memoryview, without copying the datagram.
+"""
+import struct
+import unicodedata
+import zlib
+
+_INT32 = struct.Struct('<i')
+
+# Characters accepted from the speller (matches the Intendix board layouts we use)
+ALLOWED_CHARS = frozenset('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789 .,;:?!¿¡áéíóúÁÉÍÓÚñÑüÜ')
+
+# Record types (MS-NRBF 2.1.2.1)
+SERIALIZED_STREAM_HEADER = 0x00
+CLASS_WITH_ID = 0x01
+SYSTEM_CLASS_WITH_MEMBERS = 0x02
+CLASS_WITH_MEMBERS = 0x03
+SYSTEM_CLASS_WITH_MEMBERS_AND_TYPES = 0x04
+CLASS_WITH_MEMBERS_AND_TYPES = 0x05
+BINARY_OBJECT_STRING = 0x06
+BINARY_ARRAY = 0x07
+MEMBER_PRIMITIVE_TYPED = 0x08
+MEMBER_REFERENCE = 0x09
+OBJECT_NULL = 0x0A
+MESSAGE_END = 0x0B
+BINARY_LIBRARY = 0x0C
+OBJECT_NULL_MULTIPLE_256 = 0x0D
+OBJECT_NULL_MULTIPLE = 0x0E
+ARRAY_SINGLE_PRIMITIVE = 0x0F
+ARRAY_SINGLE_OBJECT = 0x10
+ARRAY_SINGLE_STRING = 0x11
+
+# Binary types of class members (MS-NRBF 2.1.2.2)
+BT_PRIMITIVE = 0
+BT_STRING = 1
+BT_OBJECT = 2
+BT_SYSTEM_CLASS = 3
+BT_CLASS = 4
+BT_OBJECT_ARRAY = 5
+BT_STRING_ARRAY = 6
+BT_PRIMITIVE_ARRAY = 7
+
+# Primitive types (MS-NRBF 2.1.2.3): fixed-size ones map to a struct
+PT_BOOLEAN = 1
+PT_CHAR = 3
+PT_DECIMAL = 5
+PT_NULL = 17
+PT_STRING = 18
+_PRIMITIVE_STRUCTS = {
+    1: struct.Struct('<?'), 2: struct.Struct('<B'), 6: struct.Struct('<d'),
+    7: struct.Struct('<h'), 8: _INT32, 9: struct.Struct('<q'),
+    10: struct.Struct('<b'), 11: struct.Struct('<f'), 12: struct.Struct('<q'),
+    13: struct.Struct('<Q'), 14: struct.Struct('<H'), 15: struct.Struct('<I'),
+    16: struct.Struct('<Q'),
+}
+
+# BoardItem member name (normalized) -> attribute
+_BOARD_ITEM_FIELDS = {
+    "enabled": "enabled",
+    "removable": "removable",
+    "supportsdoublesecurity": "supports_double_security",
+    "name": "name",
+    "text": "text",
+    "outputtext": "output_text",
+    "flashimagefilename": "flash_image_filename",
+    "darkimagefilename": "dark_image_filename",
+}
+_STRING_FIELDS = ("name", "text", "output_text", "flash_image_filename", "dark_image_filename")
+_member_attr_cache = {}
+_class_info_cache = {}
+
+
+class BoardItem:
+    """A selected item of the Intendix board"""
+    __slots__ = ("enabled", "removable", "supports_double_security", "name", "text",
+                 "output_text", "flash_image_filename", "dark_image_filename")
+
+    def __init__(self):
+        self.enabled = False
+        self.removable = False
+        self.supports_double_security = False
+        self.name = ""
+        self.text = ""
+        self.output_text = ""
+        self.flash_image_filename = ""
+        self.dark_image_filename = ""
+
+    def __repr__(self):
+        return f"BoardItem(name={self.name!r}, text={self.text!r}, output_text={self.output_text!r})"
+
+
+class _Reference:
+    __slots__ = ("id",)
+
+    def __init__(self, object_id):
+        self.id = object_id
+
+
+class _ClassInfo:
+    __slots__ = ("attrs", "member_names", "binary_types", "additional")
+
+    def __init__(self, member_names, binary_types, additional):
+        self.member_names = member_names
+        self.attrs = tuple(_member_attr(name) for name in member_names)
+        self.binary_types = binary_types
+        self.additional = additional
+
+
+class _ClassObject:
+    __slots__ = ("info", "values")
+
+    def __init__(self, info, values):
+        self.info = info
+        self.values = values
+
+
+def read_uleb128(data, offset):
+    """Reads a 7-bit encoded length, returning (value, new offset)"""
+    result = 0
+    shift = 0
+    while offset < len(data):
+        byte = data[offset]
+        offset += 1
+        result |= (byte & 0x7F) << shift
+        if (byte & 0x80) == 0:
+            break
+        shift += 7
+        if shift > 28:
+            raise ValueError("7-bit encoded length longer than 5 bytes")
+    else:
+        raise ValueError("truncated 7-bit encoded length")
+    return result, offset
+
+
+class _RecordReader:
+    """Single-pass reader over the records of one BinaryFormatter message"""
+    __slots__ = ("mv", "end", "offset", "objects", "classes")
+
+    def __init__(self, data):
+        self.mv = memoryview(data)
+        self.end = len(self.mv)
+        self.offset = 0
+        self.objects = {}
+        self.classes = None
+
+    # -- primitives --
+    def byte(self):
+        if self.offset >= self.end:
+            raise ValueError("unexpected end of packet")
+        value = self.mv[self.offset]
+        self.offset += 1
+        return value
+
+    def int32(self):
+        if self.offset + 4 > self.end:
+            raise ValueError("unexpected end of packet")
+        value = _INT32.unpack_from(self.mv, self.offset)[0]
+        self.offset += 4
+        return value
+
+    def length(self, limit, what):
+        """An int32 length or count, rejected unless 0 <= n <= limit (bytes or members left)"""
+        n = self.int32()
+        if n < 0 or n > limit:
+            raise ValueError(f"invalid {what} {n}")
+        return n
+
+    def string(self):
+        length, start = read_uleb128(self.mv, self.offset)
+        stop = start + length
+        if stop > self.end:
+            raise ValueError("string runs past end of packet")
+        self.offset = stop
+        return str(self.mv[start:stop], 'utf-8')
+
+    def primitive(self, ptype):
+        fmt = _PRIMITIVE_STRUCTS.get(ptype)
+        if fmt is not None:
+            if self.offset + fmt.size > self.end:
+                raise ValueError("unexpected end of packet")
+            value = fmt.unpack_from(self.mv, self.offset)[0]
+            self.offset += fmt.size
+            return value
+        if ptype == PT_CHAR:
+            # UTF-8 encoded char: length follows from the lead byte
+            lead = self.mv[self.offset] if self.offset < self.end else 0
+            size = 1 if lead < 0x80 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+            start = self.offset
+            self.offset += size
+            if self.offset > self.end:
+                raise ValueError("unexpected end of packet")
+            return str(self.mv[start:self.offset], 'utf-8')
+        if ptype in (PT_DECIMAL, PT_STRING):
+            return self.string()
+        if ptype == PT_NULL:
+            return None
+        raise ValueError(f"unknown primitive type {ptype}")
+
+    # -- records --
+    def skip_string(self):
+        length, start = read_uleb128(self.mv, self.offset)
+        if start + length > self.end:
+            raise ValueError("string runs past end of packet")
+        self.offset = start + length
+
+    def additional_infos(self, types_start, count, out):
+        """Walks the additional type infos; primitive types are collected into out"""
+        for i in range(types_start, types_start + count):
+            bt = self.mv[i]
+            if bt == BT_PRIMITIVE or bt == BT_PRIMITIVE_ARRAY:
+                ptype = self.byte()
+            else:
+                ptype = None
+                if bt == BT_SYSTEM_CLASS:
+                    self.skip_string()
+                elif bt == BT_CLASS:
+                    self.skip_string()
+                    self.int32()
+            if out is not None:
+                out.append(ptype)
+
+    def class_info(self, with_types, with_library):
+        object_id = self.int32()
+        self.skip_string()
+        count = self.length(self.end - self.offset, "member count")
+        # Metadata is identical packet after packet: walk it without decoding,
+        # then look the raw span up in the cache
+        start = self.offset
+        for _ in range(count):
+            self.skip_string()
+        names_end = self.offset
+        if with_types:
+            if names_end + count > self.end:
+                raise ValueError("unexpected end of packet")
+            self.offset = names_end + count
+            self.additional_infos(names_end, count, None)
+        span = self.mv[start:self.offset]
+        key = (zlib.crc32(span), len(span))
+        cached = _class_info_cache.get(key)
+        info = cached[1] if cached is not None and cached[0] == span else None
+        if info is None:
+            member_names = []
+            offset = start
+            for _ in range(count):
+                length, offset = read_uleb128(self.mv, offset)
+                member_names.append(str(self.mv[offset:offset + length], 'utf-8'))
+                offset += length
+            binary_types = None
+            additional = None
+            if with_types:
+                binary_types = bytes(self.mv[names_end:names_end + count])
+                additional = []
+                end = self.offset
+                self.offset = names_end + count
+                self.additional_infos(names_end, count, additional)
+                self.offset = end
+            info = _ClassInfo(member_names, binary_types, additional)
+            if len(_class_info_cache) < 64:
+                _class_info_cache[key] = (bytes(span), info)
+        if with_library:
+            self.int32()
+        if self.classes is None:
+            self.classes = {}
+        self.classes[object_id] = info
+        return object_id, info
+
+    def class_values(self, object_id, info):
+        values = []
+        count = len(info.member_names)
+        binary_types = info.binary_types
+        while len(values) < count:
+            index = len(values)
+            if binary_types is not None and binary_types[index] == BT_PRIMITIVE:
+                values.append(self.primitive(info.additional[index]))
+            else:
+                # Untyped members and references: every value is a record of its own
+                values.extend(self.values_from_record(count - index))
+        obj = _ClassObject(info, values)
+        self.objects[object_id] = obj
+        return obj
+
+    def values_from_record(self, remaining=1):
+        """Reads one value record; null runs expand to several values, at most remaining"""
+        rtype = self.byte()
+        if rtype == BINARY_OBJECT_STRING:
+            object_id = self.int32()
+            value = self.string()
+            self.objects[object_id] = value
+            return (value,)
+        if rtype == MEMBER_REFERENCE:
+            return (_Reference(self.int32()),)
+        if rtype == OBJECT_NULL:
+            return (None,)
+        if rtype == OBJECT_NULL_MULTIPLE_256:
+            count = self.byte()
+            if count > remaining:
+                raise ValueError(f"invalid null run {count}")
+            return (None,) * count
+        if rtype == OBJECT_NULL_MULTIPLE:
+            return (None,) * self.length(remaining, "null run")
+        if rtype == MEMBER_PRIMITIVE_TYPED:
+            return (self.primitive(self.byte()),)
+        self.offset -= 1
+        return (self.record(),)
+
+    def record(self):
+        """Reads one top-level record and returns the object it defines"""
+        rtype = self.byte()
+        if rtype == CLASS_WITH_MEMBERS_AND_TYPES:
+            return self.class_values(*self.class_info(True, True))
+        if rtype == SYSTEM_CLASS_WITH_MEMBERS_AND_TYPES:
+            return self.class_values(*self.class_info(True, False))
+        if rtype == CLASS_WITH_MEMBERS:
+            return self.class_values(*self.class_info(False, True))
+        if rtype == SYSTEM_CLASS_WITH_MEMBERS:
+            return self.class_values(*self.class_info(False, False))
+        if rtype == CLASS_WITH_ID:
+            object_id = self.int32()
+            info = self.classes.get(self.int32()) if self.classes else None
+            if info is None:
+                raise ValueError("ClassWithId refers to unknown metadata")
+            return self.class_values(object_id, info)
+        if rtype == SERIALIZED_STREAM_HEADER:
+            self.offset += 16
+            return None
+        if rtype == BINARY_LIBRARY:
+            self.int32()
+            self.skip_string()
+            return None
+        if rtype == ARRAY_SINGLE_OBJECT or rtype == ARRAY_SINGLE_STRING:
+            object_id = self.int32()
+            length = self.length(self.end - self.offset, "array length")
+            items = []
+            while len(items) < length:
+                items.extend(self.values_from_record(length - len(items)))
+            self.objects[object_id] = items
+            return items
+        if rtype == ARRAY_SINGLE_PRIMITIVE:
+            object_id = self.int32()
+            length = self.length(self.end - self.offset, "array length")
+            ptype = self.byte()
+            items = [self.primitive(ptype) for _ in range(length)]
+            self.objects[object_id] = items
+            return items
+        if rtype == MESSAGE_END:
+            return MESSAGE_END
+        if rtype in (BINARY_OBJECT_STRING, MEMBER_REFERENCE, OBJECT_NULL, MEMBER_PRIMITIVE_TYPED,
+                     OBJECT_NULL_MULTIPLE_256, OBJECT_NULL_MULTIPLE):
+            self.offset -= 1
+            values = self.values_from_record(self.end - self.offset)
+            return values[0] if values else None
+        raise ValueError(f"unsupported record type 0x{rtype:02x} at offset {self.offset - 1}")
+
+
+def _member_attr(member_name):
+    """Maps a serialized member name (field, m_field, <Prop>k__BackingField) to a BoardItem attribute"""
+    attr = _member_attr_cache.get(member_name)
+    if attr is None:
+        key = member_name
+        if key.startswith('<'):
+            key = key[1:key.find('>')]
+        elif key.startswith('m_'):
+            key = key[2:]
+        attr = _BOARD_ITEM_FIELDS.get(key.replace('_', '').lower(), "")
+        _member_attr_cache[member_name] = attr
+    return attr
+
+
+def decode_board_item(data):
+    """
+    Decodes a BoardItem packet in a single pass.
+    Raises ValueError if the packet is not a valid BinaryFormatter message.
+    """
+    reader = _RecordReader(data)
+    root = None
+    try:
+        while reader.offset < reader.end:
+            obj = reader.record()
+            if obj is MESSAGE_END:
+                break
+            if root is None and isinstance(obj, _ClassObject):
+                root = obj
+    except RecursionError:
+        # Arrays nested in arrays, a few bytes per level
+        raise ValueError("records nested too deeply") from None
+    if root is None:
+        raise ValueError("packet contains no object")
+
+    item = BoardItem()
+    objects = reader.objects
+    unmatched = None
+    for attr, value in zip(root.info.attrs, root.values):
+        if value.__class__ is _Reference:
+            value = objects.get(value.id)
+        if attr:
+            if value is not None:
+                setattr(item, attr, value if attr not in _STRING_FIELDS else str(value))
+        elif value.__class__ is str:
+            if unmatched is None:
+                unmatched = []
+            unmatched.append(value)
+
+    # Unknown member naming: strings come in declaration order (name, text, output_text, ...)
+    if unmatched and not (item.name or item.text or item.output_text):
+        for attr, value in zip(_STRING_FIELDS, unmatched):
+            setattr(item, attr, value)
+    return item
+
+
+def clean_character(char):
+    """Cleans and validates a character, removing control or non-printable characters"""
+    if not char:
+        return None
+
+    # Remove Unicode control characters (category C)
+    cleaned = ''.join(c for c in char if unicodedata.category(c)[0] != 'C')
+
+    # Take only the first character if multiple
+    if cleaned:
+        cleaned = cleaned[0]
+    else:
+        return None
+
+    if cleaned in ALLOWED_CHARS:
+        return cleaned
+
+    return None
+
+
+def deserialize_board_item(data):
+    """Deserializes a BoardItem from received bytes, None if it carries no valid character"""
+    try:
+        item = decode_board_item(data)
+    except ValueError as e:
+        print(f"   Error deserializing: {e}")
+        return None
+
+    cleaned_char = clean_character(item.output_text)
+    if cleaned_char:
+        item.output_text = cleaned_char
+        return item
+    return None
+
+
+# ----------------- Encoding (benchmarks / replay tools) -----------------
+_BOARD_ITEM_MEMBERS = (
+    ("<Enabled>k__BackingField", "enabled"),
+    ("<Removable>k__BackingField", "removable"),
+    ("<SupportsDoubleSecurity>k__BackingField", "supports_double_security"),
+    ("<Name>k__BackingField", "name"),
+    ("<Text>k__BackingField", "text"),
+    ("<OutputText>k__BackingField", "output_text"),
+    ("<FlashImageFilename>k__BackingField", "flash_image_filename"),
+    ("<DarkImageFilename>k__BackingField", "dark_image_filename"),
+)
+_LIBRARY_NAME = "Intendix.Board, Version=1.0.0.0, Culture=neutral, PublicKeyToken=null"
+_CLASS_NAME = "Intendix.Board.BoardItem"
+
+
+def _encode_string(value):
+    raw = value.encode('utf-8')
+    length = len(raw)
+    prefix = bytearray()
+    while True:
+        byte = length & 0x7F
+        length >>= 7
+        if length:
+            prefix.append(byte | 0x80)
+        else:
+            prefix.append(byte)
+            break
+    return bytes(prefix) + raw
+
+
+def encode_board_item(item, share_strings=True):
+    """
+    Serializes a BoardItem the way the speller does (BinaryFormatter, repeated strings as references).
+    share_strings=False writes every string out, as a serializer without string interning would.
+    """
+    out = bytearray()
+    out += bytes([SERIALIZED_STREAM_HEADER]) + struct.pack('<iiii', 1, -1, 1, 0)
+    out += bytes([BINARY_LIBRARY]) + _INT32.pack(2) + _encode_string(_LIBRARY_NAME)
+    out += bytes([CLASS_WITH_MEMBERS_AND_TYPES]) + _INT32.pack(1) + _encode_string(_CLASS_NAME)
+    out += _INT32.pack(len(_BOARD_ITEM_MEMBERS))
+    for member_name, _ in _BOARD_ITEM_MEMBERS:
+        out += _encode_string(member_name)
+    for _, attr in _BOARD_ITEM_MEMBERS:
+        out.append(BT_STRING if attr in _STRING_FIELDS else BT_PRIMITIVE)
+    for _, attr in _BOARD_ITEM_MEMBERS:
+        if attr not in _STRING_FIELDS:
+            out.append(PT_BOOLEAN)
+    out += _INT32.pack(2)
+
+    string_ids = {}
+    next_id = 3
+    for _, attr in _BOARD_ITEM_MEMBERS:
+        value = getattr(item, attr)
+        if attr not in _STRING_FIELDS:
+            out.append(1 if value else 0)
+        elif value is None:
+            out.append(OBJECT_NULL)
+        elif share_strings and value in string_ids:
+            out += bytes([MEMBER_REFERENCE]) + _INT32.pack(string_ids[value])
+        else:
+            string_ids[value] = next_id
+            out += bytes([BINARY_OBJECT_STRING]) + _INT32.pack(next_id) + _encode_string(value)
+            next_id += 1
+    out.append(MESSAGE_END)
+    return bytes(out)
+
+
+def make_board_item(char, image_dir="C:\\Intendix\\Boards\\Images"):
+    """Builds the BoardItem the speller would send for one character"""
+    item = BoardItem()
+    item.enabled = True
+    item.name = f"Button_{char}"
+    item.text = char
+    item.output_text = char
+    item.flash_image_filename = f"{image_dir}\\flash_{ord(char):04x}.png"
+    item.dark_image_filename = f"{image_dir}\\dark_{ord(char):04x}.png"
+    return item
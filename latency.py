@@ -0,0 +1,137 @@
+"""
+Per-character latency tracing from socket to screen.
+
+Every speller character carries a Trace that is stamped (perf_counter_ns) at
+each pipeline stage. Finished traces feed a rolling window per segment, so
+p50/p95/p99 are kept in memory, shown in the debug overlay and can be dumped
+to a JSON file.
+"""
+import json
+import math
+import threading
+import time
+from collections import deque
+
+# Pipeline stages, in order
+STAGES = ("received", "decoded", "dequeued", "dispatched", "rendered", "idle")
+
+# Segment -> (from stage, to stage)
+SEGMENTS = (
+    ("decode", "received", "decoded"),       # datagram decoding on the ingest thread
+    ("queue", "decoded", "dequeued"),        # waiting in the input queue until the Tk loop drains it
+    ("batch", "dequeued", "dispatched"),     # waiting for its turn inside the drained batch
+    ("process", "dispatched", "rendered"),   # handling up to the widget insert
+    ("paint", "rendered", "idle"),           # Tk idle (redraw) after the insert
+    ("total", "received", "idle"),
+)
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = max(0, math.ceil(p / 100.0 * len(sorted_values)) - 1)
+    return sorted_values[index]
+
+
+class Trace:
+    """Stage timestamps of one event"""
+    __slots__ = ("tracer", "label", "stamps", "finished")
+
+    def __init__(self, tracer, label, t_ns=None):
+        self.tracer = tracer
+        self.label = label
+        self.stamps = {"received": t_ns if t_ns is not None else time.perf_counter_ns()}
+        self.finished = False
+
+    def mark(self, stage, t_ns=None):
+        self.stamps[stage] = t_ns if t_ns is not None else time.perf_counter_ns()
+
+    def finish(self, stage=None):
+        """Optionally marks a last stage and hands the trace to the tracer (once)"""
+        if stage is not None:
+            self.mark(stage)
+        if not self.finished:
+            self.finished = True
+            self.tracer.record(self)
+
+
+class LatencyTracer:
+    """Rolling per-segment latency windows (milliseconds)"""
+
+    def __init__(self, window=1000):
+        self.window = window
+        self.count = 0
+        self._lock = threading.Lock()
+        self._samples = {name: deque(maxlen=window) for name, _, _ in SEGMENTS}
+        self._recent = deque(maxlen=window)
+
+    def start(self, label="", t_ns=None):
+        return Trace(self, label, t_ns)
+
+    def record(self, trace):
+        stamps = trace.stamps
+        row = {"label": trace.label}
+        with self._lock:
+            for name, begin, end in SEGMENTS:
+                if begin in stamps and end in stamps:
+                    ms = (stamps[end] - stamps[begin]) / 1e6
+                    self._samples[name].append(ms)
+                    row[name] = round(ms, 3)
+            self._recent.append(row)
+            self.count += 1
+
+    def reset(self):
+        with self._lock:
+            for samples in self._samples.values():
+                samples.clear()
+            self._recent.clear()
+            self.count = 0
+
+    def stats(self):
+        """{segment: {"count", "p50", "p95", "p99", "max"}} over the rolling window"""
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+        result = {}
+        for name, values in snapshot.items():
+            result[name] = {
+                "count": len(values),
+                "p50": percentile(values, 50),
+                "p95": percentile(values, 95),
+                "p99": percentile(values, 99),
+                "max": values[-1] if values else 0.0,
+            }
+        return result
+
+    def bottleneck(self, stats=None):
+        """Segment with the highest p95 (excluding total)"""
+        stats = stats or self.stats()
+        candidates = [(s["p95"], name) for name, s in stats.items() if name != "total" and s["count"]]
+        return max(candidates)[1] if candidates else None
+
+    def format_overlay(self):
+        stats = self.stats()
+        slowest = self.bottleneck(stats)
+        lines = [f"Latency ms (last {stats['total']['count']} chars)",
+                 f"{'stage':<10} {'p50':>7} {'p95':>7} {'p99':>7}"]
+        for name, _, _ in SEGMENTS:
+            s = stats[name]
+            marker = " ◀" if name == slowest else ""
+            lines.append(f"{name:<10} {s['p50']:>7.2f} {s['p95']:>7.2f} {s['p99']:>7.2f}{marker}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Writes the percentiles and the recent per-event samples to a JSON file"""
+        with self._lock:
+            recent = list(self._recent)
+        data = {
+            "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "window": self.window,
+            "events": self.count,
+            "segments": {name: [begin, end] for name, begin, end in SEGMENTS},
+            "stats_ms": self.stats(),
+            "recent_ms": recent,
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        return path
@@ -0,0 +1,268 @@
+"""
+Memory-mapped word lexicon with frequency-ranked prefix completion.
+
+The lexicon file is built once (see `python lexicon.py build --help`) from
+"word<TAB>frequency" lists or, if the optional `wordfreq` package is
+installed, from its English/Spanish top-N lists. Words are stored upper case
+(like the speller board), sorted by their UTF-8 bytes:
+
+    header   b"LEX1", word count N, prefix count P            (<4sII)
+    offsets  N+1 uint32, start of each word in the word blob
+    freqs    N uint32, frequency per billion words
+    prefixes P+1 uint32 offsets + P top-8 index rows (int32, -1 padded)
+             for every prefix of 1-3 chars, sorted like the words
+    blobs    word bytes, then prefix bytes
+
+LexiconIndex maps the file and never builds Python objects for the whole
+list: short prefixes are answered from the precomputed top-8 table, longer
+ones by binary search over the mapped offsets and a scan of the (small)
+matching range for the highest frequencies.
+
+Usage:
+    python lexicon.py build lexicon.lex --wordfreq en es --top 100000
+    python lexicon.py build lexicon.lex --tsv words_en.tsv words_es.tsv
+    python lexicon.py complete lexicon.lex AGU
+"""
+import argparse
+import heapq
+import mmap
+import struct
+import sys
+import time
+import unicodedata
+from array import array
+
+MAGIC = b"LEX1"
+TOP_K = 8
+TABLE_PREFIX_LEN = 3
+_HEADER = struct.Struct("<4sII")
+
+
+def normalize_word(word):
+    return unicodedata.normalize("NFC", word.strip()).upper()
+
+
+def _is_word(word):
+    return bool(word) and all(c.isalpha() for c in word)
+
+
+def _uint32_array(values):
+    a = array("I", values)
+    if sys.byteorder != "little":
+        a.byteswap()
+    return a
+
+
+def build(words, path):
+    """Writes a lexicon file from {word: frequency per billion}; returns the word count"""
+    merged = {}
+    for word, freq in words.items():
+        key = normalize_word(word)
+        if _is_word(key):
+            merged[key] = merged.get(key, 0) + freq
+    keys = sorted(merged, key=lambda w: w.encode("utf-8"))
+    encoded = [k.encode("utf-8") for k in keys]
+    freqs = [min(int(merged[k]), 0xFFFFFFFF) for k in keys]
+
+    offsets = [0]
+    for e in encoded:
+        offsets.append(offsets[-1] + len(e))
+
+    tops = {}
+    for i, key in enumerate(keys):
+        for n in range(1, min(TABLE_PREFIX_LEN, len(key)) + 1):
+            tops.setdefault(key[:n], []).append(i)
+    prefixes = sorted(tops, key=lambda p: p.encode("utf-8"))
+    prefix_bytes = [p.encode("utf-8") for p in prefixes]
+    prefix_offsets = [0]
+    for e in prefix_bytes:
+        prefix_offsets.append(prefix_offsets[-1] + len(e))
+    rows = array("i")
+    for p in prefixes:
+        best = heapq.nlargest(TOP_K, tops[p], key=freqs.__getitem__)
+        rows.extend(best + [-1] * (TOP_K - len(best)))
+    if sys.byteorder != "little":
+        rows.byteswap()
+
+    with open(path, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, len(keys), len(prefixes)))
+        _uint32_array(offsets).tofile(f)
+        _uint32_array(freqs).tofile(f)
+        _uint32_array(prefix_offsets).tofile(f)
+        rows.tofile(f)
+        f.write(b"".join(encoded))
+        f.write(b"".join(prefix_bytes))
+    return len(keys)
+
+
+def read_tsv(path):
+    """{word: frequency} from 'word<TAB>frequency' lines (frequency optional, default 1)"""
+    words = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            parts = line.rstrip("\n").split("\t")
+            if not parts[0] or parts[0].startswith("#"):
+                continue
+            freq = float(parts[1]) if len(parts) > 1 and parts[1] else 1.0
+            words[parts[0]] = words.get(parts[0], 0) + freq
+    return words
+
+
+def read_wordfreq(languages, top):
+    """{word: frequency per billion} for the top words of each language (needs `pip install wordfreq`)"""
+    try:
+        from wordfreq import top_n_list, word_frequency
+    except ImportError:
+        raise SystemExit("The 'wordfreq' package is not installed. Use: pip install wordfreq")
+    words = {}
+    for lang in languages:
+        for word in top_n_list(lang, top):
+            words[word] = words.get(word, 0) + word_frequency(word, lang) * 1e9
+    return words
+
+
+class LexiconIndex:
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        try:
+            self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self._file.close()
+            raise ValueError(f"{path} is empty")
+        magic, self.count, self.prefix_count = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a lexicon file")
+        n, p = self.count, self.prefix_count
+        pos = _HEADER.size
+        view = memoryview(self._mm)
+        self._offsets = self._ints(view, pos, n + 1, "I")
+        pos += (n + 1) * 4
+        self._freqs = self._ints(view, pos, n, "I")
+        pos += n * 4
+        self._prefix_offsets = self._ints(view, pos, p + 1, "I")
+        pos += (p + 1) * 4
+        self._rows = self._ints(view, pos, p * TOP_K, "i")
+        pos += p * TOP_K * 4
+        self._words_at = pos
+        self._prefixes_at = pos + self._offsets[n]
+
+    @staticmethod
+    def _ints(view, pos, count, fmt):
+        ints = view[pos:pos + count * 4].cast(fmt)
+        if sys.byteorder != "little":
+            ints = array(fmt, ints)
+            ints.byteswap()
+        return ints
+
+    def __len__(self):
+        return self.count
+
+    def word(self, i):
+        start = self._words_at
+        return self._mm[start + self._offsets[i]:start + self._offsets[i + 1]].decode("utf-8")
+
+    def items(self):
+        """Every (word, frequency) in sorted order"""
+        for i in range(self.count):
+            yield self.word(i), self._freqs[i]
+
+    def complete(self, prefix, k=TOP_K):
+        """Up to k words starting with prefix, most frequent first"""
+        return [self.word(i) for i in self._top(prefix, k)]
+
+    def ranked(self, prefix, k=TOP_K):
+        """complete() with frequencies: [(word, frequency per billion)]"""
+        return [(self.word(i), self._freqs[i]) for i in self._top(prefix, k)]
+
+    def _top(self, prefix, k):
+        key = normalize_word(prefix)
+        if not key:
+            return []
+        if len(key) <= TABLE_PREFIX_LEN:
+            row = self._find_prefix(key.encode("utf-8"))
+            if row is None:
+                return []
+            indices = [i for i in self._rows[row * TOP_K:(row + 1) * TOP_K] if i >= 0]
+        else:
+            encoded = key.encode("utf-8")
+            lo = self._bisect(encoded)
+            hi = self._bisect(encoded + b"\xff", lo)
+            indices = heapq.nlargest(k, range(lo, hi), key=self._freqs.__getitem__)
+        return indices[:k]
+
+    def _key(self, i):
+        start = self._words_at
+        return self._mm[start + self._offsets[i]:start + self._offsets[i + 1]]
+
+    def _bisect(self, key, lo=0):
+        hi = self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _find_prefix(self, key):
+        lo, hi = 0, self.prefix_count
+        start = self._prefixes_at
+        offsets = self._prefix_offsets
+        while lo < hi:
+            mid = (lo + hi) // 2
+            candidate = self._mm[start + offsets[mid]:start + offsets[mid + 1]]
+            if candidate < key:
+                lo = mid + 1
+            elif candidate > key:
+                hi = mid
+            else:
+                return mid
+        return None
+
+    def close(self):
+        for name in ("_offsets", "_freqs", "_prefix_offsets", "_rows"):
+            view = getattr(self, name, None)
+            if isinstance(view, memoryview):
+                view.release()
+        if getattr(self, "_mm", None) is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query speller lexicon files")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("build", help="build a lexicon file")
+    p.add_argument("path")
+    p.add_argument("--tsv", nargs="*", default=[], help="word<TAB>frequency files")
+    p.add_argument("--wordfreq", nargs="*", default=[], metavar="LANG", help="languages from the wordfreq package")
+    p.add_argument("--top", type=int, default=100000, help="words per wordfreq language")
+
+    p = sub.add_parser("complete", help="show completions for a prefix")
+    p.add_argument("path")
+    p.add_argument("prefix")
+
+    args = parser.parse_args()
+    if args.command == "build":
+        words = read_wordfreq(args.wordfreq, args.top) if args.wordfreq else {}
+        for tsv in args.tsv:
+            for word, freq in read_tsv(tsv).items():
+                words[word] = words.get(word, 0) + freq
+        if not words:
+            parser.error("give --tsv files and/or --wordfreq languages")
+        start = time.perf_counter()
+        count = build(words, args.path)
+        print(f"Wrote {count} words to {args.path} in {time.perf_counter() - start:.1f} s")
+    else:
+        index = LexiconIndex(args.path)
+        for word, freq in index.ranked(args.prefix):
+            print(f"{word:<24} {freq:>10}")
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,439 @@
+"""
+Pooled, bounded chat completions client for Groq's OpenAI-compatible API.
+
+Keeps the groq SDK's client.chat.completions.create(...) shape (responses
+and stream chunks have the same .choices[0].message / .delta attributes),
+so the rest of the code does not change, but:
+
+- HTTP/1.1 connections are kept alive in a small pool and reused, so only
+  the first requests pay for TCP and TLS handshakes (warm_up() pays it
+  ahead of time),
+- at most max_concurrency requests are in flight; the others wait for a
+  slot instead of all hitting the API (and its rate limit) at once,
+- every call has a deadline (timeout seconds, default self.timeout) that
+  covers waiting for a slot, connecting, retries and, for a stream, reading
+  it to the end; running out of it raises DeadlineExceeded,
+- connection errors and 408/409/425/429/5xx answers are retried up to
+  max_retries times with full-jitter exponential backoff (Retry-After is
+  honoured), never past the deadline. A stream is not retried once its
+  response has started.
+
+A stream holds its slot and connection until it ends or close() is called;
+close() drops the connection, which aborts the request on the server side.
+Standard library only. benchmarks/bench_llmclient.py measures it against a
+local stand-in server.
+"""
+import http.client
+import json
+import random
+import socket
+import ssl
+import threading
+import time
+from collections import deque
+from types import SimpleNamespace
+from urllib.parse import urlsplit
+
+from latency import percentile
+
+GROQ_BASE_URL = "https://api.groq.com/openai/v1"
+TRANSIENT_STATUS = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class APIError(Exception):
+    """Failed request; transient ones were retried until the attempts or the deadline ran out"""
+
+    def __init__(self, message, status=None, transient=False, retry_after=None):
+        super().__init__(message)
+        self.status = status
+        self.transient = transient
+        self.retry_after = retry_after
+
+
+class DeadlineExceeded(APIError):
+    def __init__(self, message="API call deadline exceeded"):
+        super().__init__(message)
+
+
+def to_namespace(value):
+    """JSON object -> attribute access, like the SDK's response models"""
+    if isinstance(value, dict):
+        return SimpleNamespace(**{k: to_namespace(v) for k, v in value.items()})
+    if isinstance(value, list):
+        return [to_namespace(v) for v in value]
+    return value
+
+
+class FairSlots:
+    """Counting semaphore that hands its slots out in arrival order (threading's wakes any waiter)"""
+
+    def __init__(self, count):
+        self._free = count
+        self._waiters = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, timeout):
+        with self._lock:
+            if self._free and not self._waiters:
+                self._free -= 1
+                return True
+            waiter = threading.Lock()
+            waiter.acquire()
+            self._waiters.append(waiter)
+        if waiter.acquire(timeout=timeout):
+            return True
+        with self._lock:
+            try:
+                self._waiters.remove(waiter)
+                return False
+            except ValueError:
+                return True  # handed a slot just as the wait timed out
+
+    def release(self):
+        with self._lock:
+            if self._waiters:
+                self._waiters.popleft().release()  # straight to the longest waiter
+            else:
+                self._free += 1
+
+
+class ConnectionPool:
+    """Idle keep-alive connections to one server, most recently used first"""
+
+    def __init__(self, base_url, size=8, connect_timeout=5.0):
+        parts = urlsplit(base_url)
+        self.https = parts.scheme == "https"
+        self.host = parts.hostname
+        self.port = parts.port or (443 if self.https else 80)
+        self.path = parts.path.rstrip("/")
+        self.size = size
+        self.connect_timeout = connect_timeout
+        self.opened = 0
+        self.reused = 0
+        self._context = ssl.create_default_context() if self.https else None
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def get(self, timeout):
+        """(connection, reused); a new one is connected if none is idle"""
+        if timeout <= 0:
+            # settimeout(0) would make the socket non-blocking instead of timing out
+            raise socket.timeout("deadline passed before connecting")
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+            if conn is not None:
+                self.reused += 1
+        if conn is not None:
+            conn.sock.settimeout(timeout)
+            return conn, True
+        connect_timeout = min(timeout, self.connect_timeout)
+        if self.https:
+            conn = http.client.HTTPSConnection(self.host, self.port, timeout=connect_timeout, context=self._context)
+        else:
+            conn = http.client.HTTPConnection(self.host, self.port, timeout=connect_timeout)
+        conn.connect()
+        conn.sock.settimeout(timeout)
+        with self._lock:
+            self.opened += 1
+        return conn, False
+
+    def put(self, conn):
+        with self._lock:
+            if len(self._idle) < self.size:
+                self._idle.append(conn)
+                return
+        conn.close()
+
+    def clear(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn in idle:
+            conn.close()
+
+
+class ChatStream:
+    """Chunks of a streamed completion (server-sent events); close() ends it early"""
+
+    def __init__(self, client, conn, sock, resp, deadline):
+        self.client = client
+        self.conn = conn
+        self.sock = sock
+        self.resp = resp
+        self.deadline = deadline
+        self.chunks = 0
+        self._lock = threading.Lock()
+        self._done = False
+        self._reading = False
+        self._closed_early = False
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        with self._lock:
+            if self._done or self._closed_early:
+                raise StopIteration
+            self._reading = True
+        try:
+            while True:
+                remaining = self.client.remaining(self.deadline)
+                if remaining <= 0:
+                    raise socket.timeout("deadline passed")  # not settimeout(0): that means non-blocking
+                self.sock.settimeout(remaining)
+                line = self.resp.readline()
+                if not line:
+                    raise APIError("stream ended without [DONE]")
+                line = line.strip()
+                if not line.startswith(b"data:"):
+                    continue  # blank separator, comment or other field
+                data = line[5:].strip()
+                if data == b"[DONE]":
+                    self.resp.read()  # the terminating chunk, so the connection can be reused
+                    self._finish(keep=not self.resp.will_close)
+                    raise StopIteration
+                event = json.loads(data)
+                if "error" in event:
+                    raise APIError(f"stream error: {event['error']}")
+                self.chunks += 1
+                return to_namespace(event)
+        except StopIteration:
+            raise
+        except socket.timeout:
+            self._finish(keep=False)
+            if self._closed_early:
+                raise StopIteration
+            self.client.count("timeouts")
+            raise DeadlineExceeded("API stream deadline exceeded")
+        except (OSError, ValueError, http.client.HTTPException, APIError) as e:
+            self._finish(keep=False)
+            if self._closed_early:
+                raise StopIteration
+            self.client.count("failures")
+            raise e if isinstance(e, APIError) else APIError(f"stream broken: {e}")
+        finally:
+            with self._lock:
+                self._reading = False
+            if self._closed_early:
+                self._finish(keep=False)
+
+    def close(self):
+        """Stops reading; an unfinished response is aborted by dropping its connection (any thread)"""
+        with self._lock:
+            if self._done or self._closed_early:
+                return
+            self._closed_early = True
+            reading = self._reading
+        self.client.count("aborted")
+        if reading:
+            # Wakes the reader blocked on the socket; it drops the connection on its way out
+            try:
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        else:
+            self._finish(keep=False)
+
+    def _finish(self, keep):
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+        if keep:
+            self.client.pool.put(self.conn)
+        else:
+            self.resp.close()
+            self.conn.close()
+        self.client.release()
+
+
+class LLMClient:
+    def __init__(self, api_key, base_url=GROQ_BASE_URL, max_concurrency=8, timeout=30.0, connect_timeout=5.0,
+                 max_retries=3, backoff=0.25, max_backoff=4.0):
+        self.api_key = api_key
+        self.pool = ConnectionPool(base_url, size=max_concurrency, connect_timeout=connect_timeout)
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.chat = SimpleNamespace(completions=self)  # client.chat.completions.create(...)
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.aborted = 0
+        self.in_flight = 0
+        self._slots = FairSlots(max_concurrency)
+        self._lock = threading.Lock()
+        self._waits = deque(maxlen=512)      # ms waiting for a slot
+        self._responses = deque(maxlen=512)  # ms from the call to the response headers
+
+    def create(self, model, messages, stream=False, timeout=None, **params):
+        """One chat completion: a response object, or a ChatStream if stream is true"""
+        start = time.monotonic()
+        deadline = start + (self.timeout if timeout is None else timeout)
+        body = json.dumps({"model": model, "messages": messages, "stream": stream, **params}).encode()
+        self.count("requests")
+        if not self._slots.acquire(self.remaining(deadline)):
+            self.count("timeouts")
+            raise DeadlineExceeded("no free API slot before the deadline")
+        with self._lock:
+            self.in_flight += 1
+            self._waits.append((time.monotonic() - start) * 1000)
+        try:
+            result = self._request(body, stream, deadline)
+        except BaseException as e:
+            self.count("timeouts" if isinstance(e, DeadlineExceeded) else "failures")
+            self.release()
+            raise
+        with self._lock:
+            self._responses.append((time.monotonic() - start) * 1000)
+        if stream:
+            return ChatStream(self, *result, deadline)
+        self.release()
+        return to_namespace(result)
+
+    def warm_up(self):
+        """Opens a pooled connection now (TCP + TLS), off the first request's path"""
+        try:
+            conn, _ = self.pool.get(self.pool.connect_timeout)
+        except OSError as e:
+            print(f"⚠ API warm-up failed: {e}")
+            return
+        self.pool.put(conn)
+
+    def close(self):
+        self.pool.clear()
+
+    def remaining(self, deadline):
+        return max(0.0, deadline - time.monotonic())
+
+    def release(self):
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def count(self, name):
+        with self._lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+    def _request(self, body, stream, deadline):
+        """Attempts with backoff between transient failures"""
+        attempt = 0
+        while True:
+            try:
+                return self._attempt(body, stream, deadline)
+            except DeadlineExceeded:
+                raise
+            except APIError as e:
+                if not e.transient or attempt >= self.max_retries:
+                    raise
+                # Full jitter: uniform in [0, backoff * 2^attempt], at least what the server asked for
+                delay = random.uniform(0, min(self.max_backoff, self.backoff * 2 ** attempt))
+                if e.retry_after is not None:
+                    delay = max(delay, e.retry_after)
+                if delay >= self.remaining(deadline):
+                    raise
+                attempt += 1
+                self.count("retries")
+                print(f"[DEBUG] API retry {attempt}/{self.max_retries} in {delay * 1000:.0f} ms: {e}")
+                time.sleep(delay)
+
+    def _attempt(self, body, stream, deadline):
+        """One request: the decoded JSON, or (conn, sock, resp) with the response open for a stream"""
+        headers = {
+            "Authorization": f"Bearer {self.api_key}",
+            "Content-Type": "application/json",
+            "Accept": "text/event-stream" if stream else "application/json",
+        }
+        for _ in range(2):
+            if self.remaining(deadline) <= 0:
+                raise DeadlineExceeded("API call deadline exceeded (before sending)")
+            try:
+                conn, reused = self.pool.get(self.remaining(deadline))
+            except socket.timeout:
+                raise self._timed_out(deadline, "connect timed out")
+            except OSError as e:
+                raise APIError(f"connection failed: {e}", transient=True)
+            sock = conn.sock
+            try:
+                conn.request("POST", self.pool.path + "/chat/completions", body, headers)
+                resp = conn.getresponse()
+                break
+            except socket.timeout:
+                conn.close()
+                raise self._timed_out(deadline, "no response")
+            except (OSError, http.client.HTTPException) as e:
+                conn.close()
+                if not reused:
+                    raise APIError(f"connection failed: {e}", transient=True)
+                # The server closed the idle keep-alive connection: once more on a fresh one
+        else:
+            raise APIError("connection failed", transient=True)
+
+        try:
+            if resp.status != 200:
+                payload = resp.read()
+                self._release_connection(conn, resp)
+                raise self._error(resp, payload)
+            if stream:
+                return conn, sock, resp
+            data = json.loads(resp.read())
+        except socket.timeout:
+            conn.close()
+            raise self._timed_out(deadline, "response timed out")
+        except (OSError, ValueError, http.client.HTTPException) as e:
+            conn.close()
+            raise APIError(f"response broken: {e}", transient=True)
+        self._release_connection(conn, resp)
+        return data
+
+    def _release_connection(self, conn, resp):
+        if resp.will_close:
+            conn.close()
+        else:
+            self.pool.put(conn)
+
+    def _timed_out(self, deadline, what):
+        if self.remaining(deadline) <= 0:
+            return DeadlineExceeded(f"API call deadline exceeded ({what})")
+        return APIError(what, transient=True)
+
+    def _error(self, resp, payload):
+        try:
+            message = json.loads(payload)["error"]["message"]
+        except Exception:
+            message = payload[:200].decode("utf-8", "replace")
+        retry_after = resp.getheader("retry-after")
+        try:
+            retry_after = float(retry_after) if retry_after else None
+        except ValueError:
+            retry_after = None
+        return APIError(f"HTTP {resp.status}: {message}", status=resp.status,
+                        transient=resp.status in TRANSIENT_STATUS, retry_after=retry_after)
+
+    def stats(self):
+        with self._lock:
+            waits = sorted(self._waits)
+            responses = sorted(self._responses)
+            return {
+                "requests": self.requests,
+                "retries": self.retries,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "aborted": self.aborted,
+                "in_flight": self.in_flight,
+                "opened": self.pool.opened,
+                "reused": self.pool.reused,
+                "wait_p95": percentile(waits, 95),
+                "response_p50": percentile(responses, 50),
+                "response_p95": percentile(responses, 95),
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"API: {s['requests']} requests, {s['in_flight']}/{self.max_concurrency} in flight, "
+                f"{s['retries']} retries, {s['failures']} failed, {s['timeouts']} timed out, "
+                f"{s['aborted']} aborted | connections {s['opened']} opened / {s['reused']} reused | "
+                f"slot wait p95 {s['wait_p95']:.0f} ms, response p50 {s['response_p50']:.0f} ms "
+                f"p95 {s['response_p95']:.0f} ms")
@@ -0,0 +1,257 @@
+"""
+Local stand-in for Groq's OpenAI-compatible chat completions API.
+
+Answers POST .../chat/completions (so both /v1 and Groq's /openai/v1 base
+URLs work) like the real endpoint: a JSON completion, or server-sent events
+ending in "data: [DONE]" when stream is true. Question prompts get a
+numbered list of questions about the topic, everything else an answer of
+--tokens words. What it costs is configurable:
+
+    --ttft-ms / --ttft-jitter-ms   time to the first token (uniform jitter)
+    --token-ms                     delay between tokens (a JSON completion waits for all of them)
+    --connect-ms                   delay on every new connection (TCP + TLS handshake)
+    --error-rate                   fraction of requests failed with 500/503
+    --rpm                          requests per minute (token bucket), 429 with Retry-After above it
+    --max-concurrent               requests in flight before 429
+
+GET /stats returns the counters as JSON (requests, completed, errors,
+rate_limited, aborted streams, tokens sent). Point the app at it with
+config.ini:
+
+    [api]
+    base_url = http://127.0.0.1:8800/v1
+
+    python mockllm.py [--port 8800] [--ttft-ms 300] [--token-ms 20] [--error-rate 0.02] [--rpm 600]
+
+Benchmarks start it in a child process with start_process().
+"""
+import argparse
+import json
+import multiprocessing
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULTS = {
+    "ttft_ms": 300,
+    "ttft_jitter_ms": 0,
+    "token_ms": 20,
+    "tokens": 60,
+    "questions": 6,
+    "connect_ms": 0,
+    "error_rate": 0.0,
+    "rpm": 0,
+    "max_concurrent": 0,
+}
+
+WORDS = ("the", "water", "is", "a", "good", "idea", "because", "it", "helps", "you", "feel", "better",
+         "and", "doctors", "often", "recommend", "small", "steps", "every", "day")
+
+
+class MockLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+    def __init__(self, host="127.0.0.1", port=0, **settings):
+        self.settings = dict(DEFAULTS, **settings)
+        self.lock = threading.Lock()
+        self.counters = {"requests": 0, "completed": 0, "errors": 0, "rate_limited": 0, "aborted": 0,
+                         "tokens": 0, "connections": 0}
+        self.active = 0
+        self._bucket = float(self.settings["rpm"] or 0)
+        self._refilled = time.monotonic()
+        super().__init__((host, port), MockLLMHandler)
+
+    @property
+    def port(self):
+        return self.server_address[1]
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+
+    def admit(self):
+        """None if the request may run, else (status, message, retry_after)"""
+        s = self.settings
+        with self.lock:
+            self.counters["requests"] += 1
+            if s["rpm"]:
+                now = time.monotonic()
+                self._bucket = min(s["rpm"], self._bucket + (now - self._refilled) * s["rpm"] / 60.0)
+                self._refilled = now
+                if self._bucket < 1:
+                    self.counters["rate_limited"] += 1
+                    return 429, "Rate limit reached for requests", (1 - self._bucket) * 60.0 / s["rpm"]
+                self._bucket -= 1
+            if s["max_concurrent"] and self.active >= s["max_concurrent"]:
+                self.counters["rate_limited"] += 1
+                return 429, "Too many requests in flight", None
+            if random.random() < s["error_rate"]:
+                self.counters["errors"] += 1
+                return random.choice((500, 503)), "Service unavailable", None
+            self.active += 1
+        return None
+
+    def release(self):
+        with self.lock:
+            self.active -= 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counters, active=self.active)
+
+
+class MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def setup(self):
+        self.server.count("connections")
+        delay = self.server.settings["connect_ms"]
+        if delay:
+            time.sleep(delay / 1000)
+        super().setup()
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, status, payload, headers=()):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path.rstrip("/").endswith("/stats"):
+            return self.reply(200, self.server.stats())
+        self.reply(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            return self.reply(400, {"error": {"message": "invalid JSON"}})
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            return self.reply(404, {"error": {"message": "not found"}})
+
+        refused = self.server.admit()
+        if refused is not None:
+            status, message, retry_after = refused
+            headers = [("Retry-After", f"{retry_after:.2f}")] if retry_after is not None else []
+            return self.reply(status, {"error": {"message": message}}, headers)
+        try:
+            self.complete(request)
+        except (BrokenPipeError, ConnectionResetError):
+            self.server.count("aborted")  # the client closed the stream
+            self.close_connection = True
+        finally:
+            self.server.release()
+
+    def complete(self, request):
+        s = self.server.settings
+        pieces = answer_pieces(request.get("messages") or [], s)
+        ttft = s["ttft_ms"] + random.uniform(-s["ttft_jitter_ms"], s["ttft_jitter_ms"])
+        time.sleep(max(0.0, ttft) / 1000)
+        model = request.get("model", "mock")
+        if not request.get("stream"):
+            # Generated just as slowly, only delivered at once
+            time.sleep(s["token_ms"] * max(0, len(pieces) - 1) / 1000)
+            self.server.count("tokens", len(pieces))
+            self.server.count("completed")
+            return self.reply(200, {
+                "id": "mock", "object": "chat.completion", "model": model,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": "".join(pieces)},
+                             "finish_reason": "stop"}],
+                "usage": {"completion_tokens": len(pieces)},
+            })
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for i, piece in enumerate(pieces):
+            if i:
+                time.sleep(s["token_ms"] / 1000)
+            event = {"id": "mock", "object": "chat.completion.chunk", "model": model,
+                     "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": None}]}
+            self.send_event(json.dumps(event))
+            self.server.count("tokens")
+        self.send_event("[DONE]")
+        self.wfile.write(b"0\r\n\r\n")
+        self.server.count("completed")
+
+    def send_event(self, data):
+        data = f"data: {data}\n\n".encode()
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        self.wfile.flush()
+
+
+def answer_pieces(messages, settings):
+    """Streamed pieces: numbered questions for question prompts, words otherwise"""
+    system = " ".join(m.get("content", "") for m in messages if m.get("role") == "system").lower()
+    user = next((m.get("content", "") for m in reversed(messages) if m.get("role") == "user"), "")
+    if "questions" in system:
+        topic = re.sub(r"^(topics?|topic or question):\s*", "", user.split(".")[0], flags=re.I).strip() or "it"
+        starts = ("What is", "How does", "When should I think about", "Where can I learn about",
+                  "Why does", "Who can help with", "What helps with", "How can I improve", "What else about")
+        text = "".join(f"{i + 1}. {starts[i % len(starts)]} {topic}?\n" for i in range(settings["questions"]))
+        return re.findall(r"\S+\s*", text)
+    return [WORDS[i % len(WORDS)] + " " for i in range(settings["tokens"])]
+
+
+def serve(ready=None, host="127.0.0.1", port=0, **settings):
+    """Runs a server until the process ends; its port is put on ready (a queue) once listening"""
+    server = MockLLMServer(host, port, **settings)
+    if ready is not None:
+        ready.put(server.port)
+    server.serve_forever()
+
+
+def start_process(**settings):
+    """(process, base_url) of a server in a child process; terminate() the process when done"""
+    ready = multiprocessing.Queue()
+    process = multiprocessing.Process(target=serve, args=(ready,), kwargs=settings, daemon=True)
+    process.start()
+    return process, f"http://127.0.0.1:{ready.get()}/v1"
+
+
+def fetch_stats(base_url):
+    """The counters of a running server"""
+    import http.client
+    from urllib.parse import urlsplit
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=5)
+    try:
+        conn.request("GET", parts.path.rstrip("/") + "/stats")
+        return json.loads(conn.getresponse().read())
+    finally:
+        conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Groq chat completions API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8800)
+    for name, value in DEFAULTS.items():
+        parser.add_argument("--" + name.replace("_", "-"), type=type(value), default=value)
+    args = vars(parser.parse_args())
+    host, port = args.pop("host"), args.pop("port")
+    server = MockLLMServer(host, port, **args)
+    print(f"✓ Mock LLM API on http://{host}:{server.port}/v1 "
+          f"(ttft {args['ttft_ms']} ms, {args['token_ms']} ms/token, errors {args['error_rate']:.0%}"
+          + (f", {args['rpm']} rpm" if args["rpm"] else "") + ")")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print()
+        print(json.dumps(server.stats()))
+
+
+if __name__ == "__main__":
+    main()
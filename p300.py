@@ -0,0 +1,450 @@
+"""
+Streaming P300 classification.
+
+EEG chunks are appended to a ring buffer (samples x channels) together with
+a timestamp per sample, by push() or by an acquisition thread writing into
+the same buffer. Every flash of a candidate is a marker (stimulus,
+time). Once the buffer holds enough samples after a marker, its epoch is
+cut out, band-pass filtered and decimated in one step, and scored by a
+linear classifier:
+
+    raw      epoch plus half a filter length on each side (channels kept)
+    filter   zero-phase windowed-sinc FIR band-pass, only evaluated at the
+             decimated sample positions (sliding windows @ taps)
+    score    features (points x channels, flattened) @ weights + bias
+
+Scores are accumulated per stimulus. decide() stops dynamically: every
+flash score adds its log-likelihood ratio (target vs non-target score
+distributions, from calibration or estimated from the trial's own scores)
+to its candidate, and the candidate whose posterior reaches `threshold` is
+selected, after at least `min_repetitions` and at most `repetitions` rounds.
+With threshold 0 every selection takes `repetitions` rounds (best mean
+score wins). Per-epoch processing time and rounds per selection are kept
+for the debug overlay.
+
+Calibration: flashes marked with a label (trial, attended stimulus) keep
+their features. train() fits a shrinkage LDA on them and reports the
+leave-one-trial-out selection accuracy. The trained filter and weights are
+saved in a small binary file that load() maps back in a few milliseconds:
+
+    header   b"P3M2", fs, channels, decimation, epoch offset and length,
+             tap count, weight count, training epochs, accuracy, bias,
+             target/non-target score mean and score sd (<4sfHHiIIIIfffff;
+             P3M1 files have no score statistics)
+    taps     float32 band-pass FIR
+    weights  float32 classifier weights
+
+Needs numpy.
+"""
+import os
+import random
+import struct
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from latency import percentile
+
+MODEL_MAGIC = b"P3M2"
+_MODEL_HEADER = struct.Struct("<4sfHHiIIIIfffff")
+_MODEL_HEADER_V1 = struct.Struct("<4sfHHiIIIIff")
+
+
+def bandpass_taps(low, high, fs, numtaps):
+    """Hamming windowed-sinc band-pass FIR (odd numtaps, zero gain at DC)"""
+    numtaps |= 1
+    n = np.arange(numtaps) - (numtaps - 1) / 2
+    window = np.hamming(numtaps)
+
+    def lowpass(cutoff):
+        h = np.sinc(2 * cutoff / fs * n) * window
+        return h / h.sum()
+
+    return lowpass(high) - lowpass(low)
+
+
+class RingBuffer:
+    """Fixed-size multichannel sample buffer addressed by absolute sample index.
+
+    Every sample is stored twice (at slot and slot + capacity), so any window
+    up to capacity samples long is a contiguous slice: window() returns views.
+    """
+
+    def __init__(self, channels, capacity, dtype=np.float32):
+        self.capacity = capacity
+        self.channels = channels
+        self.data = np.zeros((2 * capacity, channels), dtype=dtype)
+        self.stamps = np.zeros(capacity)
+        self.count = 0  # samples written so far
+
+    @property
+    def oldest(self):
+        return max(0, self.count - self.capacity)
+
+    def free(self):
+        """Writable view of the slots up to the wrap point, for writing in place before commit()"""
+        pos = self.count % self.capacity
+        return self.data[pos:self.capacity]
+
+    def commit(self, n, stamps):
+        """Publishes n samples written into free()"""
+        pos = self.count % self.capacity
+        self.data[pos + self.capacity:pos + self.capacity + n] = self.data[pos:pos + n]
+        self.stamps[pos:pos + n] = stamps
+        self.count += n
+
+    def extend(self, samples, stamps):
+        if len(samples) > self.capacity:
+            skipped = len(samples) - self.capacity
+            samples, stamps = samples[skipped:], stamps[skipped:]
+            self.count += skipped
+        done = 0
+        while done < len(samples):
+            slots = self.free()
+            n = min(len(samples) - done, len(slots))
+            slots[:n] = samples[done:done + n]
+            self.commit(n, stamps[done:done + n])
+            done += n
+
+    def stamp(self, index):
+        return self.stamps[index % self.capacity]
+
+    def index_at(self, t):
+        """Absolute index of the first buffered sample at or after time t (count if none yet)"""
+        lo, hi = self.oldest, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.stamp(mid) < t:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def window(self, start, length):
+        """Samples [start, start+length) as a (length, channels) view (valid until overwritten)"""
+        pos = start % self.capacity
+        return self.data[pos:pos + length]
+
+
+class LinearClassifier:
+    def __init__(self, weights, bias=0.0, score_stats=None):
+        self.weights = np.asarray(weights, dtype=np.float64).ravel()
+        self.bias = float(bias)
+        self.score_stats = score_stats  # (target mean, non-target mean, sd) of scores, if calibrated
+
+    def score(self, features):
+        return float(features.ravel() @ self.weights + self.bias)
+
+    @classmethod
+    def template(cls, times, channels, window=(0.25, 0.5)):
+        """Mean amplitude over all channels in the usual P300 window (no calibration needed)"""
+        inside = (times >= window[0]) & (times <= window[1])
+        weights = np.repeat(inside[:, None], channels, axis=1).astype(float)
+        return cls(weights / max(1.0, weights.sum()))
+
+    @classmethod
+    def fit(cls, features, targets):
+        """Shrinkage LDA (Ledoit-Wolf) on (n, d) features and boolean targets"""
+        X = np.asarray(features, dtype=np.float64)
+        y = np.asarray(targets, dtype=bool)
+        mean1, mean0 = X[y].mean(axis=0), X[~y].mean(axis=0)
+        centered = np.concatenate((X[y] - mean1, X[~y] - mean0))
+        n, d = centered.shape
+        cov = centered.T @ centered / n
+        mu = np.trace(cov) / d
+        # Ledoit-Wolf shrinkage intensity towards mu * I
+        delta = np.sum((cov - mu * np.eye(d)) ** 2)
+        beta = (np.sum(np.sum(centered ** 2, axis=1) ** 2) - n * np.sum(cov ** 2)) / n ** 2
+        shrinkage = min(1.0, max(0.0, beta / delta)) if delta > 0 else 1.0
+        cov = (1 - shrinkage) * cov + shrinkage * mu * np.eye(d)
+        weights = np.linalg.solve(cov, mean1 - mean0)
+        bias = -weights @ (mean1 + mean0) / 2
+        scores = X @ weights + bias
+        sd = np.sqrt((np.var(scores[y]) * y.sum() + np.var(scores[~y]) * (~y).sum()) / len(y))
+        return cls(weights, bias, (float(scores[y].mean()), float(scores[~y].mean()), float(sd)))
+
+
+class Calibration:
+    """Copy-spelling calibration: each target in turn is attended for `repetitions` rounds of flashes"""
+
+    def __init__(self, options, targets=10, repetitions=10, seed=None):
+        rng = random.Random(seed)
+        self.options = list(options)
+        self.targets = [rng.choice(self.options) for _ in range(targets)]
+        self.repetitions = repetitions
+        self.position = 0  # index of the current target
+        self.rounds = 0    # rounds flashed for it
+
+    @property
+    def target(self):
+        return self.targets[self.position] if self.position < len(self.targets) else None
+
+    @property
+    def done(self):
+        return self.position >= len(self.targets)
+
+    def label(self):
+        """Marker label for flashes of the current round: (trial, attended option)"""
+        return (self.position, self.target)
+
+    def next_round(self):
+        """Counts a finished round; returns True when the next target starts"""
+        self.rounds += 1
+        if self.rounds < self.repetitions:
+            return False
+        self.rounds = 0
+        self.position += 1
+        return True
+
+
+class P300Engine:
+    def __init__(self, fs=250, channels=8, band=(1.0, 12.0), epoch=(0.0, 0.8), rate=20,
+                 numtaps=None, classifier=None, buffer_seconds=10, repetitions=10, window=200, buffer=None,
+                 threshold=0.95, min_repetitions=2, separation=1.0):
+        self.fs = fs
+        self.channels = channels
+        self.repetitions = repetitions
+        self.threshold = threshold
+        self.min_repetitions = min_repetitions
+        self.separation = separation  # assumed target shift in score sds when not calibrated
+        self.decimation = max(1, int(round(fs / rate)))
+        self.taps = bandpass_taps(band[0], band[1], fs, numtaps or int(fs * 0.5))
+        self.half = len(self.taps) // 2
+        self.offset = int(round(epoch[0] * fs))
+        self.length = int(round((epoch[1] - epoch[0]) * fs))
+        self.times = epoch[0] + np.arange(0, self.length, self.decimation) / fs
+        self.classifier = classifier or LinearClassifier.template(self.times, channels)
+        # An acquisition stage (acquisition.LslAcquisition) may own and fill the buffer instead of push()
+        self.buffer = buffer if buffer is not None else RingBuffer(channels, int(buffer_seconds * fs))
+        self.epochs = 0
+        self.dropped = 0
+        self.selections = 0
+        self.process_times = deque(maxlen=window)
+        self.selection_rounds = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self._markers = deque()  # (stimulus, time, label) waiting for their samples
+        self._scores = {}        # stimulus -> [score per flash]
+        self._labeled = []       # (features, stimulus, label) of calibration flashes
+
+    # -- input --
+    def push(self, samples, stamp=None):
+        """Appends a (n, channels) chunk; stamp is the time of its last sample (default: continues the stream)"""
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1, self.channels)
+        n = len(samples)
+        if not n:
+            return
+        with self._lock:
+            if stamp is None:
+                last = self.buffer.stamp(self.buffer.count - 1) if self.buffer.count else 0.0
+                stamp = last + n / self.fs
+            stamps = stamp - np.arange(n - 1, -1, -1) / self.fs
+            self.buffer.extend(samples, stamps)
+
+    def mark(self, stimulus, stamp, label=None):
+        """Records a flash of stimulus at time stamp; labeled flashes (calibration) keep their features"""
+        with self._lock:
+            self._markers.append((stimulus, stamp, label))
+
+    # -- processing --
+    def features(self, raw):
+        """Band-passed, decimated epoch: (points, channels) from raw (length + taps - 1, channels)"""
+        windows = np.lib.stride_tricks.sliding_window_view(raw, len(self.taps), axis=0)
+        return windows[:self.length:self.decimation] @ self.taps
+
+    def process(self):
+        """Scores every marker whose epoch is complete; returns how many were scored"""
+        done = 0
+        with self._lock:
+            while self._markers:
+                stimulus, t, label = self._markers[0]
+                onset = self.buffer.index_at(t)
+                start = onset + self.offset - self.half
+                if onset >= self.buffer.count or start + self.length + 2 * self.half > self.buffer.count:
+                    break  # not all samples are in yet
+                self._markers.popleft()
+                if start < self.buffer.oldest or self.buffer.stamp(onset) - t > 1.0 / self.fs:
+                    self.dropped += 1  # overwritten already, or the stream had a gap
+                    continue
+                begin = time.perf_counter()
+                raw = self.buffer.window(start, self.length + 2 * self.half)
+                features = self.features(raw)
+                score = self.classifier.score(features)
+                if start < self.buffer.oldest:
+                    self.dropped += 1  # overwritten by the acquisition thread while scoring
+                    continue
+                if label is not None:
+                    self._labeled.append((features.astype(np.float32).ravel(), stimulus, label))
+                self._scores.setdefault(stimulus, []).append(score)
+                self.process_times.append((time.perf_counter() - begin) * 1000)
+                self.epochs += 1
+                done += 1
+        return done
+
+    def scores(self):
+        """{stimulus: mean score so far}"""
+        with self._lock:
+            return {s: sum(v) / len(v) for s, v in self._scores.items()}
+
+    def posterior(self, candidates):
+        """{candidate: probability it is the attended one} from the flash scores so far"""
+        with self._lock:
+            return dict(zip(candidates, self._posterior(candidates)))
+
+    def _posterior(self, candidates):
+        scores = [np.asarray(self._scores.get(c, ()), dtype=np.float64) for c in candidates]
+        stats = self.classifier.score_stats
+        if stats is None:
+            every = np.concatenate(scores)
+            if len(every) < 2:
+                return np.full(len(candidates), 1.0 / len(candidates))
+            sd = every.std() or 1.0
+            nontarget = np.median(every)
+            target = nontarget + self.separation * sd
+        else:
+            target, nontarget, sd = stats
+        llr = np.array([np.sum((s - nontarget) ** 2 - (s - target) ** 2) for s in scores]) / (2 * sd * sd)
+        llr = np.exp(llr - llr.max())
+        return llr / llr.sum()
+
+    def decide(self, candidates):
+        """The selected candidate once the evidence suffices (then the scores start over), else None"""
+        with self._lock:
+            if not candidates:
+                return None
+            rounds = min(len(self._scores.get(c, ())) for c in candidates)
+            if rounds < min(self.min_repetitions, self.repetitions):
+                return None
+            if self.threshold:
+                posterior = self._posterior(candidates)
+                best = int(np.argmax(posterior))
+                if posterior[best] < self.threshold and rounds < self.repetitions:
+                    return None
+                best = candidates[best]
+            elif rounds < self.repetitions:
+                return None
+            else:
+                best = max(candidates, key=lambda c: sum(self._scores[c]) / len(self._scores[c]))
+            self._scores.clear()
+            self._markers.clear()
+            self.selections += 1
+            self.selection_rounds.append(rounds)
+            return best
+
+    def reset(self):
+        """Forgets scores and pending flashes (new set of candidates)"""
+        with self._lock:
+            self._scores.clear()
+            self._markers.clear()
+
+    def pending(self):
+        """Flashes still waiting for their samples"""
+        with self._lock:
+            return len(self._markers)
+
+    # -- calibration --
+    def labeled(self):
+        """Calibration epochs so far: (features (n, d), stimuli, labels)"""
+        with self._lock:
+            rows = list(self._labeled)
+        if not rows:
+            return np.zeros((0, len(self.classifier.weights)), dtype=np.float32), [], []
+        return np.stack([r[0] for r in rows]), [r[1] for r in rows], [r[2] for r in rows]
+
+    def clear_labeled(self):
+        with self._lock:
+            self._labeled = []
+
+    def train(self):
+        """Fits a classifier on the calibration epochs; returns (classifier, selection accuracy)
+
+        Accuracy is leave-one-trial-out: each trial's attended option is predicted by
+        a classifier trained on the other trials (mean score per option, best wins).
+        The held-out scores also give the score statistics used for dynamic stopping,
+        which in-sample scores would overstate.
+        """
+        X, stimuli, labels = self.labeled()
+        targets = np.array([s == attended for s, (_, attended) in zip(stimuli, labels)])
+        if targets.all() or not targets.any():
+            raise ValueError("calibration needs flashes of attended and unattended options")
+        trials = np.array([trial for trial, _ in labels])
+        held_scores = np.full(len(targets), np.nan)
+        correct = evaluated = 0
+        for trial in np.unique(trials):
+            held = trials == trial
+            if targets[~held].all() or not targets[~held].any():
+                continue
+            classifier = LinearClassifier.fit(X[~held], targets[~held])
+            held_scores[held] = X[held] @ classifier.weights + classifier.bias
+            scores = {}
+            for score, stimulus in zip(held_scores[held], np.array(stimuli, dtype=object)[held]):
+                scores.setdefault(stimulus, []).append(score)
+            best = max(scores, key=lambda s: sum(scores[s]) / len(scores[s]))
+            correct += best == labels[int(np.flatnonzero(held)[0])][1]
+            evaluated += 1
+        accuracy = correct / evaluated if evaluated else float("nan")
+        classifier = LinearClassifier.fit(X, targets)
+        scored = ~np.isnan(held_scores)
+        if targets[scored].any() and not targets[scored].all():
+            on, off = held_scores[scored & targets], held_scores[scored & ~targets]
+            sd = np.sqrt((np.var(on) * len(on) + np.var(off) * len(off)) / (len(on) + len(off)))
+            classifier.score_stats = (float(on.mean()), float(off.mean()), float(sd))
+        return classifier, accuracy
+
+    # -- model store --
+    def save(self, path, epochs=0, accuracy=float("nan")):
+        """Writes the filter and classifier as a P3M2 file"""
+        taps = np.asarray(self.taps, dtype="<f4")
+        weights = np.asarray(self.classifier.weights, dtype="<f4")
+        stats = self.classifier.score_stats or (float("nan"),) * 3
+        header = _MODEL_HEADER.pack(MODEL_MAGIC, self.fs, self.channels, self.decimation, self.offset,
+                                    self.length, len(taps), len(weights), epochs, accuracy, self.classifier.bias,
+                                    *stats)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(taps.tobytes())
+            f.write(weights.tobytes())
+        os.replace(tmp, path)
+        return path
+
+    def load(self, path):
+        """Replaces filter and classifier with a saved model; returns (epochs, accuracy) it was trained with"""
+        with open(path, "rb") as f:
+            data = f.read()
+        header = _MODEL_HEADER if data[:4] == MODEL_MAGIC else _MODEL_HEADER_V1
+        if len(data) < header.size or data[:4] not in (MODEL_MAGIC, b"P3M1"):
+            raise ValueError(f"{path} is not a P300 model")
+        fields = header.unpack_from(data)
+        (magic, fs, channels, decimation, offset, length, ntaps, nweights, epochs, accuracy, bias) = fields[:11]
+        stats = fields[11:] if len(fields) > 11 and not np.isnan(fields[11]) else None
+        if len(data) != header.size + 4 * (ntaps + nweights):
+            raise ValueError(f"{path} is not a P300 model")
+        if abs(fs - self.fs) > 1e-3 or channels != self.channels:
+            raise ValueError(f"{path} was trained for {channels} channels at {fs:g} Hz, "
+                             f"the stream has {self.channels} at {self.fs:g} Hz")
+        values = np.frombuffer(data, dtype="<f4", offset=header.size).astype(np.float64)
+        points = len(range(0, length, decimation))
+        if nweights != points * channels:
+            raise ValueError(f"{path} has {nweights} weights, expected {points * channels}")
+        with self._lock:
+            self.taps = values[:ntaps]
+            self.half = ntaps // 2
+            self.decimation = decimation
+            self.offset = offset
+            self.length = length
+            self.times = offset / fs + np.arange(0, length, decimation) / fs
+            self.classifier = LinearClassifier(values[ntaps:], bias, stats)
+        return epochs, accuracy
+
+    def format_stats(self):
+        times = sorted(self.process_times)
+        if not times:
+            return "P300: no epochs yet"
+        text = (f"P300: {self.epochs} epochs, p50 {percentile(times, 50):.2f} ms, "
+                f"p95 {percentile(times, 95):.2f} ms per epoch, {self.dropped} dropped")
+        if self.selection_rounds:
+            text += (f"; {self.selections} selections, "
+                     f"{sum(self.selection_rounds) / len(self.selection_rounds):.1f} rounds each")
+        return text
@@ -0,0 +1,228 @@
+"""
+Adaptive n-gram predictive text for the speller.
+
+NgramPredictor learns from typed phrases and chat text. It keeps two models:
+
+    chars  context of up to char_order-1 preceding chars -> next-char counts
+    words  up to word_order-1 preceding words -> next-word counts (plus unigrams)
+
+predict_chars() ranks the next letter with stupid backoff: the longest seen
+context counts fully, each shorter one is weighted down by `backoff`.
+predict_words() completes the word being spelled (or proposes the next word
+after a space) the same way over word contexts, filtered by the typed prefix.
+Ranked lists are memoized per context/prefix and the memo is dropped on
+learn(), so repeated lookups while spelling are dict hits. Text is folded to
+upper case like the speller board. The tables hold at most max_ngrams counts:
+past that, the rarest n-grams are pruned down to three quarters of it, so a
+long-lived model (and its JSON file) stops growing. Counts persist as JSON.
+"""
+import bisect
+import json
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+
+_WORD_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]+)?", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+_PARTIAL_RE = re.compile(r"[^\W\d_]+(?:'[^\W\d_]*)?$", re.UNICODE)
+START = "^"  # word context at the start of a phrase
+
+
+def _words(text):
+    return _WORD_RE.findall(text.upper())
+
+
+def partial_word(text):
+    """The unfinished word at the end of text ('' after a space)"""
+    match = _PARTIAL_RE.search(text)
+    return match.group(0) if match else ""
+
+
+def complete_word(text, word):
+    """text with its unfinished last word replaced by word (and a space)"""
+    stem = _PARTIAL_RE.sub("", text)
+    return stem + word + " "
+
+
+class NgramPredictor:
+    def __init__(self, path=None, char_order=5, word_order=3, backoff=0.4, max_ngrams=200000):
+        self.path = path
+        self.char_order = char_order
+        self.word_order = word_order
+        self.backoff = backoff
+        self.max_ngrams = max_ngrams
+        self.learned_chars = 0
+        self.pruned = 0
+        self._lock = threading.Lock()
+        self._chars = defaultdict(Counter)   # context str -> Counter(next char)
+        self._words = defaultdict(Counter)   # context str ("" = unigram) -> Counter(next word)
+        self._vocab = []                      # sorted unigram words, for prefix ranges
+        self._memo = {}
+        self._dirty = False
+        self._ngrams = 0                      # counts held in both tables
+        if path and os.path.exists(path):
+            self.load(path)
+
+    # -- learning --
+    def learn(self, text, weight=1):
+        """Counts every char and word n-gram in text"""
+        text = " ".join(text.upper().split())
+        if not text:
+            return
+        words = _words(text)
+        with self._lock:
+            padded = " " + text
+            for i in range(1, len(padded)):
+                nxt = padded[i]
+                for n in range(0, self.char_order):
+                    if i - n < 0:
+                        break
+                    counts = self._chars[padded[i - n:i]]
+                    if nxt not in counts:
+                        self._ngrams += 1
+                    counts[nxt] += weight
+            history = [START] * (self.word_order - 1)
+            new_words = False
+            for word in words:
+                if word not in self._words[""]:
+                    new_words = True
+                for n in range(0, self.word_order):
+                    context = " ".join(history[len(history) - n:]) if n else ""
+                    counts = self._words[context]
+                    if word not in counts:
+                        self._ngrams += 1
+                    counts[word] += weight
+                history = history[1:] + [word]
+            if self.max_ngrams and self._ngrams > self.max_ngrams:
+                self._prune(self.max_ngrams * 3 // 4)
+            elif new_words:
+                self._vocab = sorted(self._words[""])
+            self._memo.clear()
+            self._dirty = True
+            self.learned_chars += len(text)
+
+    def _prune(self, keep):
+        """Drops the rarest n-grams until exactly keep are left (lock held)"""
+        entries = [(c, -len(context), t, context, key)
+                   for t, table in enumerate((self._chars, self._words))
+                   for context, ctr in table.items() for key, c in ctr.items()]
+        drop = len(entries) - keep
+        if drop <= 0:
+            return
+        # Equal counts are the rule (every learn() adds the same weight): ties go longest context first,
+        # the short contexts are what backoff falls back on
+        entries.sort(key=lambda e: (e[0], e[1]))
+        tables = (self._chars, self._words)
+        for _, _, t, context, key in entries[:drop]:
+            ctr = tables[t][context]
+            del ctr[key]
+            if not ctr:
+                del tables[t][context]
+        self._ngrams = len(entries) - drop
+        self.pruned += drop
+        self._vocab = sorted(self._words.get("", ()))
+
+    def _count_ngrams(self):
+        return sum(len(ctr) for table in (self._chars, self._words) for ctr in table.values())
+
+    # -- prediction --
+    def predict_chars(self, text, k=5):
+        """Most likely next chars after text (space included)"""
+        text = " " + _SPACE_RE.sub(" ", text.upper())
+        key = ("c", text[-(self.char_order - 1):], k)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                return cached
+            scores = Counter()
+            weight = 1.0
+            for n in range(min(self.char_order - 1, len(text)), -1, -1):
+                counts = self._chars.get(text[len(text) - n:])
+                if counts:
+                    total = sum(counts.values())
+                    for ch, count in counts.items():
+                        scores[ch] = max(scores[ch], weight * count / total)
+                    weight *= self.backoff
+            result = [ch for ch, _ in scores.most_common(k)]
+            self._memo[key] = result
+            return result
+
+    def predict_words(self, text, k=5):
+        """Completions for the word being typed in text (next words if text ends with a space)"""
+        upper = text.upper()
+        words = _words(upper)
+        if upper and not upper[-1].isspace() and words and upper.rstrip().endswith(words[-1]):
+            prefix = words[-1]
+            words = words[:-1]
+        else:
+            prefix = ""
+        history = ([START] * (self.word_order - 1) + words)[-(self.word_order - 1):]
+        key = ("w", " ".join(history), prefix, k)
+        with self._lock:
+            cached = self._memo.get(key)
+            if cached is not None:
+                return cached
+            scores = Counter()
+            weight = 1.0
+            for n in range(self.word_order - 1, 0, -1):
+                counts = self._words.get(" ".join(history[len(history) - n:]))
+                if counts:
+                    total = sum(counts.values())
+                    for word, count in counts.items():
+                        if word.startswith(prefix) and word != prefix:
+                            scores[word] = max(scores[word], weight * count / total)
+                    weight *= self.backoff
+            unigrams = self._words.get("")
+            if unigrams and len(scores) < k:
+                total = sum(unigrams.values())
+                lo = bisect.bisect_left(self._vocab, prefix)
+                hi = bisect.bisect_left(self._vocab, prefix + "\uffff") if prefix else len(self._vocab)
+                for word in self._vocab[lo:hi]:
+                    if word != prefix:
+                        scores[word] = max(scores[word], weight * unigrams[word] / total)
+            result = [word for word, _ in scores.most_common(k)]
+            self._memo[key] = result
+            return result
+
+    # -- persistence --
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return None
+        with self._lock:
+            if not self._dirty and os.path.exists(path):
+                return path
+            data = {
+                "version": 1,
+                "char_order": self.char_order,
+                "word_order": self.word_order,
+                "chars": {ctx: dict(c) for ctx, c in self._chars.items()},
+                "words": {ctx: dict(c) for ctx, c in self._words.items()},
+            }
+            self._dirty = False
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp, path)
+        return path
+
+    def load(self, path):
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Could not load predictive text model {path}: {e}")
+            return False
+        if data.get("char_order") != self.char_order or data.get("word_order") != self.word_order:
+            print(f"⚠️ Predictive text model {path} has different n-gram orders, starting fresh")
+            return False
+        with self._lock:
+            self._chars = defaultdict(Counter, {ctx: Counter(c) for ctx, c in data.get("chars", {}).items()})
+            self._words = defaultdict(Counter, {ctx: Counter(c) for ctx, c in data.get("words", {}).items()})
+            self._vocab = sorted(self._words.get("", ()))
+            self._ngrams = self._count_ngrams()
+            if self.max_ngrams and self._ngrams > self.max_ngrams:
+                self._prune(self.max_ngrams * 3 // 4)
+            self._memo.clear()
+        return True
@@ -0,0 +1,184 @@
+"""
+Speculative answer prefetch for the numbered question menu.
+
+While the user spells a digit, start() asks for answers to the top_k menu
+questions (menu order is the ranking; top_k=None means all of them) on a
+small thread pool; add() does the same for one question of a menu that is
+still arriving. Each answer streams into its own Prefetch buffer.
+claim(question) hands back the chosen one and cancels the rest: queued
+requests never start, running streams are closed at once, and the tokens
+they had already used are counted as wasted. attach() replays what has
+arrived so far and then forwards the rest of the stream as it comes in.
+
+fetch(messages, on_piece, cancelled, on_stream=...) does the actual request:
+it hands the response stream to on_stream (so cancel can close it), calls
+on_piece for each streamed piece and should stop once cancelled() is true.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from chatcontext import MESSAGE_OVERHEAD, estimate_tokens
+from generation import close_quietly
+
+
+class Prefetch:
+    def __init__(self, question, messages, revision):
+        self.question = question
+        self.messages = messages
+        self.revision = revision
+        self.prompt_tokens = sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+        self.error = None
+        self.started = False
+        self.done = threading.Event()
+        self.cancelled = threading.Event()
+        self.future = None
+        self._lock = threading.Lock()
+        self._pieces = []
+        self._listener = None
+        self._stream = None
+
+    def attach_stream(self, stream):
+        """The response stream to close on abort(); closed at once if already cancelled"""
+        with self._lock:
+            if not self.cancelled.is_set():
+                self._stream = stream
+                return
+        close_quietly(stream)
+
+    def abort(self):
+        """Cancels it and closes its stream, waking the worker blocked on the socket"""
+        with self._lock:
+            self.cancelled.set()
+            stream, self._stream = self._stream, None
+        if stream is not None:
+            close_quietly(stream)
+
+    def feed(self, piece):
+        """Called by fetch for every streamed piece"""
+        with self._lock:
+            self._pieces.append(piece)
+            if self._listener is not None:
+                self._listener(piece)
+
+    def text(self):
+        with self._lock:
+            return "".join(self._pieces)
+
+    def attach(self, on_piece):
+        """Sends what arrived so far to on_piece, forwards the rest, waits; returns (text, error)"""
+        with self._lock:
+            text = "".join(self._pieces)
+            if text:
+                on_piece(text)
+            self._listener = on_piece
+        self.done.wait()
+        return self.text(), self.error
+
+
+class AnswerPrefetcher:
+    def __init__(self, fetch, top_k=3, max_workers=3):
+        self.fetch = fetch
+        self.top_k = top_k
+        self.requested = 0
+        self.started = 0
+        self.used = 0
+        self.cancelled = 0
+        self.skipped = 0
+        self.wasted_tokens = 0
+        self._lock = threading.Lock()
+        self._batch = {}
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="prefetch")
+
+    def start(self, questions, messages, revision, instruction=""):
+        """Cancels the previous menu's prefetches and starts the top_k of this one"""
+        self.cancel_all()
+        for question in questions:
+            self.add(question, messages, revision, instruction)
+
+    def add(self, question, messages, revision, instruction=""):
+        """Starts one more menu question while the batch has room (menus arrive a question at a time)"""
+        prefetch = Prefetch(question, list(messages) + [{"role": "user", "content": question + instruction}], revision)
+        with self._lock:
+            if question in self._batch or (self.top_k is not None and len(self._batch) >= self.top_k):
+                return None
+            self._batch[question] = prefetch
+            self.requested += 1
+        prefetch.future = self._pool.submit(self._run, prefetch)
+        return prefetch
+
+    def claim(self, question, revision):
+        """The prefetch for the selected question (None if absent or stale); cancels the others"""
+        with self._lock:
+            batch = self._batch
+            self._batch = {}
+        chosen = batch.pop(question, None)
+        for prefetch in batch.values():
+            self._cancel(prefetch)
+        if chosen is not None and (chosen.revision != revision or chosen.cancelled.is_set()):
+            # The conversation moved on since the menu was shown
+            self._cancel(chosen)
+            chosen = None
+        if chosen is not None:
+            with self._lock:
+                self.used += 1
+        return chosen
+
+    def cancel(self, prefetch):
+        """Cancels a claimed prefetch whose answer is no longer wanted"""
+        self._cancel(prefetch)
+
+    def cancel_all(self):
+        with self._lock:
+            batch = self._batch
+            self._batch = {}
+        for prefetch in batch.values():
+            self._cancel(prefetch)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requested": self.requested,
+                "started": self.started,
+                "used": self.used,
+                "cancelled": self.cancelled,
+                "skipped": self.skipped,
+                "wasted_tokens": self.wasted_tokens,
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        return (f"Prefetch: {s['used']} used / {s['started']} started, {s['cancelled']} cancelled, "
+                f"{s['skipped']} skipped, ~{s['wasted_tokens']} tokens wasted")
+
+    def shutdown(self):
+        self.cancel_all()
+        self._pool.shutdown(wait=False)
+
+    def _cancel(self, prefetch):
+        prefetch.abort()
+        if prefetch.future is not None and prefetch.future.cancel():
+            # Never started: no cost
+            prefetch.done.set()
+            with self._lock:
+                self.skipped += 1
+            return
+        with self._lock:
+            self.cancelled += 1
+            self.wasted_tokens += prefetch.prompt_tokens + estimate_tokens(prefetch.text())
+
+    def _run(self, prefetch):
+        if prefetch.cancelled.is_set():
+            prefetch.done.set()
+            return
+        prefetch.started = True
+        with self._lock:
+            self.started += 1
+        try:
+            self.fetch(prefetch.messages, prefetch.feed, prefetch.cancelled.is_set, on_stream=prefetch.attach_stream)
+        except Exception as e:
+            prefetch.error = e
+            print(f"⚠️ Prefetch failed for '{prefetch.question}': {e}")
+        finally:
+            with prefetch._lock:
+                prefetch._stream = None
+            prefetch.done.set()
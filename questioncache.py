@@ -0,0 +1,159 @@
+"""
+Two-tier cache for generated question lists.
+
+Keys are (model, context, normalized keyword): case, accents-as-typed, extra
+spaces and the order of comma-separated topics don't matter, so "AI, health"
+and "health ,ai" share an entry. An in-memory LRU with a TTL sits in front of
+an SQLite file that survives restarts; disk hits are promoted to memory.
+Expired entries are dropped lazily and the disk tier is trimmed to max_disk
+entries by last use.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+
+def normalize_keyword(keyword):
+    """'  Health ,AI ' -> 'ai, health'"""
+    text = unicodedata.normalize("NFKC", keyword or "").casefold()
+    topics = {" ".join(part.split()) for part in text.replace(";", ",").split(",")}
+    return ", ".join(sorted(t for t in topics if t))
+
+
+class QuestionCache:
+    def __init__(self, path=None, capacity=256, ttl=7 * 24 * 3600, max_disk=5000):
+        self.path = path
+        self.capacity = capacity
+        self.ttl = ttl
+        self.max_disk = max_disk
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()  # key -> (expires_at, questions)
+        self._db = None
+        if path:
+            try:
+                directory = os.path.dirname(os.path.abspath(path))
+                os.makedirs(directory, exist_ok=True)
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute("CREATE TABLE IF NOT EXISTS questions ("
+                                 "key TEXT PRIMARY KEY, questions TEXT NOT NULL, "
+                                 "expires REAL NOT NULL, used REAL NOT NULL)")
+                self._db.commit()
+            except sqlite3.Error as e:
+                print(f"⚠️ Question cache on disk disabled ({path}): {e}")
+                self._db = None
+
+    @staticmethod
+    def key(keyword, context, model):
+        return f"{model}|{context}|{normalize_keyword(keyword)}"
+
+    def get(self, keyword, context="initial", model=""):
+        """Cached questions or None"""
+        key = self.key(keyword, context, model)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self.hits += 1
+                    return list(entry[1])
+                del self._memory[key]
+                self.expirations += 1
+
+            questions = self._disk_get(key, now)
+            if questions is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.disk_hits += 1
+            self._remember(key, now + self.ttl, questions)
+            return list(questions)
+
+    def put(self, keyword, questions, context="initial", model=""):
+        key = self.key(keyword, context, model)
+        questions = list(questions)
+        expires = time.time() + self.ttl
+        with self._lock:
+            self._remember(key, expires, questions)
+            self._disk_put(key, expires, questions)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "memory_entries": len(self._memory),
+            }
+
+    def format_stats(self):
+        s = self.stats()
+        lookups = s["hits"] + s["misses"]
+        rate = s["hits"] / lookups * 100 if lookups else 0.0
+        return (f"Question cache: {s['hits']} hits ({s['disk_hits']} disk), {s['misses']} misses "
+                f"({rate:.0f}%), {s['evictions']} evicted, {s['expirations']} expired")
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM questions")
+                self._db.commit()
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    # -- tiers (lock held) --
+    def _remember(self, key, expires, questions):
+        self._memory[key] = (expires, tuple(questions))
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.capacity:
+            self._memory.popitem(last=False)
+            self.evictions += 1
+
+    def _disk_get(self, key, now):
+        if self._db is None:
+            return None
+        try:
+            row = self._db.execute("SELECT questions, expires FROM questions WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            if row[1] <= now:
+                self._db.execute("DELETE FROM questions WHERE key = ?", (key,))
+                self._db.commit()
+                self.expirations += 1
+                return None
+            self._db.execute("UPDATE questions SET used = ? WHERE key = ?", (now, key))
+            self._db.commit()
+            return json.loads(row[0])
+        except (sqlite3.Error, ValueError) as e:
+            print(f"⚠️ Question cache read error: {e}")
+            return None
+
+    def _disk_put(self, key, expires, questions):
+        if self._db is None:
+            return
+        try:
+            self._db.execute("INSERT OR REPLACE INTO questions (key, questions, expires, used) VALUES (?, ?, ?, ?)",
+                             (key, json.dumps(questions, ensure_ascii=False), expires, time.time()))
+            trimmed = self._db.execute(
+                "DELETE FROM questions WHERE key IN (SELECT key FROM questions ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk,)).rowcount
+            self.evictions += max(trimmed, 0)
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"⚠️ Question cache write error: {e}")
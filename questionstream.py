@@ -0,0 +1,76 @@
+"""
+Incremental parsing of a streamed question list.
+
+Question prompts ask for a numbered list, one question per line
+("1. What is ...?"). QuestionStreamParser is fed the streamed pieces as they
+arrive and hands back each question as soon as its line is complete, so the
+menu can show (and the user can select) the first option while the model is
+still writing the others. Lines that are not numbered (a preamble, "Here are
+some questions:") are skipped; if the model ignores the format altogether,
+finish() falls back to the non-empty lines, like the old whole-response
+parsing did.
+"""
+import re
+
+NUMBERED = re.compile(r"^\s*(?:[-*•]\s*)?(?:\*\*)?(\d{1,2})\s*[.):]\s*(.+?)\s*$")
+STRIP = "-*•.\"' \t"
+
+
+def clean_question(text):
+    """The question without list decoration; None if too short to be one"""
+    text = text.strip().strip(STRIP).strip()
+    return text if len(text) > 3 else None
+
+
+class QuestionStreamParser:
+    def __init__(self, limit=9):
+        self.limit = limit
+        self.questions = []
+        self._line = ""
+        self._loose = []  # unnumbered lines, used only if no numbered line ever arrives
+        self._numbered = False
+
+    def done(self):
+        return len(self.questions) >= self.limit
+
+    def feed(self, text):
+        """Consumes a streamed piece; returns the questions its newlines completed"""
+        self._line += text
+        *lines, self._line = self._line.split("\n")
+        found = []
+        for line in lines:
+            question = self._parse(line)
+            if question is not None:
+                found.append(question)
+        return found
+
+    def finish(self):
+        """End of the stream: the questions of the last (unterminated) line, or the unnumbered fallback"""
+        line, self._line = self._line, ""
+        found = []
+        question = self._parse(line)
+        if question is not None:
+            found.append(question)
+        if not self._numbered:
+            for question in self._loose:
+                if self.done():
+                    break
+                self.questions.append(question)
+                found.append(question)
+        return found
+
+    def _parse(self, line):
+        if self.done() or not line.strip():
+            return None
+        match = NUMBERED.match(line)
+        if match is None:
+            question = clean_question(line)
+            if question is not None and not self._numbered:
+                self._loose.append(question)
+            return None
+        self._numbered = True
+        question = clean_question(match.group(2))
+        if question is None or question in self.questions:
+            return None
+        self.questions.append(question)
+        return question
@@ -0,0 +1,140 @@
+"""
+Bounded chat scrollback for the Tk Text chat display.
+
+ChatScrollback stands in front of the widget (insert/see/clear). Once the
+widget holds more than max_lines (+ slack, so trimming is amortized), the
+oldest lines are written with their tags to an append-only JSON-lines archive
+and deleted from the widget. Scrolling to the top pages archived text back in,
+one page at a time. Reloaded pages don't count toward max_lines; they are
+dropped again (without rewriting) once the view is back at the bottom, and
+trimming waits until then (up to twice max_lines) so the text being read stays.
+"""
+import json
+import os
+import time
+
+END = "end"  # tkinter.END
+
+
+class ChatScrollback:
+    def __init__(self, widget, max_lines=2000, slack=200, archive_dir="chat_archive"):
+        self.widget = widget
+        self.max_lines = max_lines
+        self.slack = slack
+        self.archive_dir = archive_dir
+        self.archive_path = None
+        self.archived_lines = 0
+        self._file = None
+        self._pages = []          # (file offset, line count) of every page written this session
+        self._next_reload = 0     # pages[:_next_reload] are not on screen
+        self._reloaded_lines = 0  # lines of reloaded pages at the top of the widget
+
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Prior>", "<Control-Home>"):
+            widget.bind(sequence, self._on_scroll_up, add="+")
+
+    # -- widget facade --
+    def insert(self, index, text, tags=None):
+        # Where the view was before the insert pushed it off the bottom
+        at_bottom = self.at_bottom()
+        self.widget.insert(index, text, tags)
+        self.trim(at_bottom)
+
+    def see(self, index):
+        self.widget.see(index)
+
+    def clear(self):
+        """Empties the display; the archive so far is kept on disk but no longer paged back in"""
+        self.widget.delete("1.0", END)
+        self._pages = []
+        self._next_reload = 0
+        self._reloaded_lines = 0
+
+    def line_count(self):
+        return int(self.widget.index("end-1c").split(".")[0])
+
+    # -- trimming --
+    def trim(self, at_bottom=None):
+        total = self.line_count()
+        live = total - self._reloaded_lines  # reloaded pages don't count toward the window
+        if at_bottom is None:
+            at_bottom = self.at_bottom()
+        if self._reloaded_lines and (at_bottom or live > 2 * self.max_lines + self.slack):
+            # Done reading older pages (or the window grew too long): drop them again, already archived
+            self.widget.delete("1.0", f"{self._reloaded_lines + 1}.0")
+            total = live
+            self._reloaded_lines = 0
+            self._next_reload = len(self._pages)
+        if total - self._reloaded_lines <= self.max_lines + self.slack:
+            return
+        if self._reloaded_lines:
+            # Trimming now would pull lines out from under the user reading older pages
+            return
+        excess = total - self.max_lines
+        cut = f"{excess + 1}.0"
+        segments = self._segments("1.0", cut)
+        self._write_page(segments, excess)
+        self.widget.delete("1.0", cut)
+        self._next_reload = len(self._pages)
+
+    def at_bottom(self):
+        return self.widget.yview()[1] >= 1.0
+
+    def _segments(self, start, stop):
+        """[(text, [tags])] for a range, from Text.dump"""
+        segments = []
+        active = []
+        for key, value, _ in self.widget.dump(start, stop, text=True, tag=True):
+            if key == "tagon":
+                active.append(value)
+            elif key == "tagoff":
+                if value in active:
+                    active.remove(value)
+            elif key == "text":
+                if segments and segments[-1][1] == active:
+                    segments[-1][0] += value
+                else:
+                    segments.append([value, list(active)])
+        return segments
+
+    def _write_page(self, segments, lines):
+        if self._file is None:
+            os.makedirs(self.archive_dir, exist_ok=True)
+            self.archive_path = os.path.join(self.archive_dir, time.strftime("chat-%Y%m%d-%H%M%S.jsonl"))
+            self._file = open(self.archive_path, "a+", encoding="utf-8")
+        self._file.seek(0, os.SEEK_END)
+        offset = self._file.tell()
+        self._file.write(json.dumps({"lines": lines, "segments": segments}, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._pages.append((offset, lines))
+        self.archived_lines += lines
+
+    # -- lazy reload --
+    def _on_scroll_up(self, event=None):
+        self.widget.after_idle(self.load_older)
+
+    def load_older(self):
+        """Pages the newest archived page not on screen back in if the view is at the top"""
+        if self._next_reload == 0 or self.widget.yview()[0] > 0.0:
+            return False
+        offset, lines = self._pages[self._next_reload - 1]
+        self._file.seek(offset)
+        page = json.loads(self._file.readline())
+
+        first_visible = self.widget.index("@0,0")
+        self.widget.mark_set("scrollback_reload", "1.0")
+        self.widget.mark_gravity("scrollback_reload", "right")
+        for text, tags in page["segments"]:
+            self.widget.insert("scrollback_reload", text, tuple(tags))
+        self.widget.mark_unset("scrollback_reload")
+
+        # Keep the line the user was looking at in place
+        line, column = first_visible.split(".")
+        self.widget.yview(f"{int(line) + lines}.{column}")
+        self._next_reload -= 1
+        self._reloaded_lines += lines
+        return True
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
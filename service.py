@@ -0,0 +1,218 @@
+"""
+Multi-session speller service: several headsets on one machine, one event loop.
+
+Each session is a core.BciCore with its own state (phrase buffer, question
+menu, conversation, predictive text) fed by its own Intendix UDP port. One
+asyncio loop receives the datagrams of every port (a datagram endpoint per
+port, no thread per socket) and runs every session's callbacks: the
+sessions' after() schedules onto it, and answer pieces come back to it.
+Blocking API calls (question generation, chat streams) run on one bounded
+thread pool shared by all sessions, through one API client (so its limit on
+requests in flight holds for the whole service), as do the question cache
+and the lexicon. P300 selection is not run here; sessions select by spelling the
+menu digit.
+
+Sessions come from config.ini (name:port, each user's predictive text is
+kept in predictive_text-<name>.json):
+
+    [service]
+    sessions = bed1:1000, bed2:1001, bed3:1002
+    workers = 16
+
+    python service.py [--sessions bed1:1000 bed2:1001]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import core
+from core import BciCore, ConsoleView
+
+SERVICE_SESSIONS = core.config.get("service", "sessions", fallback="").strip()
+SERVICE_WORKERS = core.config.getint("service", "workers", fallback=16)
+
+
+def parse_sessions(items):
+    """["bed1:1000", ...] -> [("bed1", 1000), ...]"""
+    sessions = []
+    for item in items:
+        name, _, port = item.strip().rpartition(":")
+        if not name or not port.isdigit():
+            raise ValueError(f"session {item!r} is not name:port")
+        sessions.append((name, int(port)))
+    check_sessions(sessions)
+    return sessions
+
+
+def check_sessions(sessions):
+    """Raises ValueError if two sessions share a name or a port (port 0 picks a free one)"""
+    names, ports = set(), set()
+    for name, port in sessions:
+        if name in names:
+            raise ValueError(f"session name {name!r} is used twice")
+        if port and port in ports:
+            raise ValueError(f"port {port} is used by two sessions")
+        names.add(name)
+        ports.add(port)
+
+
+def session_predict_path(name):
+    if not core.PREDICT_PATH:
+        return None
+    root, ext = os.path.splitext(core.PREDICT_PATH)
+    return f"{root}-{name}{ext}"
+
+
+class IntendixProtocol(asyncio.DatagramProtocol):
+    """Hands every datagram of one port to its session (loop thread)"""
+
+    def __init__(self, session, port):
+        self.session = session
+        self.port = port
+        self.packets = 0
+
+    def datagram_received(self, data, addr):
+        self.packets += 1
+        self.session.handle_intendix_batch(((data, addr, self.port),))
+
+    def error_received(self, exc):
+        print(f"⚠ UDP error on port {self.port}: {exc}")
+
+
+class SpellerService:
+    def __init__(self, sessions, host=core.INTENDIX_HOST, workers=SERVICE_WORKERS, view=ConsoleView,
+                 client=None, rcvbuf=1 << 20):
+        self.specs = list(sessions)
+        check_sessions(self.specs)
+        self.host = host
+        self.view = view
+        self._own_client = client is None
+        self.client = core.make_api_client(core.GROQ_API_KEY) if client is None else client
+        self.rcvbuf = rcvbuf
+        self.sessions = {}
+        self.ports = {}      # name -> bound port (useful with port 0)
+        self.protocols = {}
+        self.loop = None
+        self.question_cache = core.open_question_cache()
+        self.lexicon = core.open_lexicon()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="service")
+        self._transports = []
+        self._loop_thread = None
+        self._stopped = None
+
+    def after(self, ms, fn, *args):
+        """Tk-style after() onto the service loop, from any thread"""
+        if threading.get_ident() == self._loop_thread:
+            self._schedule(ms, fn, args)
+        else:
+            self.loop.call_soon_threadsafe(self._schedule, ms, fn, args)
+
+    def _schedule(self, ms, fn, args):
+        if ms > 0:
+            self.loop.call_later(ms / 1000.0, fn, *args)
+        else:
+            self.loop.call_soon(fn, *args)
+
+    def spawn(self, fn, *args):
+        self._pool.submit(fn, *args)
+
+    def _bind(self, port):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        try:
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.rcvbuf)
+            except OSError:
+                pass
+            sock.bind((self.host, port))
+        except OSError:
+            sock.close()
+            raise
+        sock.setblocking(False)
+        return sock
+
+    async def start(self):
+        """Creates the sessions and listens on their ports (raises OSError if one can't be bound)"""
+        self.loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._stopped = asyncio.Event()
+        for name, port in self.specs:
+            sock = self._bind(port)
+            port = sock.getsockname()[1]
+            session = BciCore(self.after, self.view(name), host=self.host, ports=[port], spawn=self.spawn,
+                              question_cache=self.question_cache, lexicon=self.lexicon,
+                              predict_path=session_predict_path(name), client=self.client)
+            session.debug_mode = False
+            session.is_running = True
+            protocol = IntendixProtocol(session, port)
+            transport, _ = await self.loop.create_datagram_endpoint(lambda p=protocol: p, sock=sock)
+            self._transports.append(transport)
+            self.sessions[name] = session
+            self.ports[name] = port
+            self.protocols[name] = protocol
+        print(f"✓ {len(self.sessions)} speller session(s) on {self.host}: "
+              + ", ".join(f"{n}:{p}" for n, p in self.ports.items()))
+
+    async def serve(self):
+        try:
+            await self.start()
+            await self._stopped.wait()
+        finally:
+            self.close()
+
+    def stop(self):
+        """Ends serve() (any thread)"""
+        self.loop.call_soon_threadsafe(self._stopped.set)
+
+    def close(self):
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
+        for session in self.sessions.values():
+            session.is_running = False
+            session.close()
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._own_client and self.client is not None:
+            self.client.close()
+        self.question_cache.close()
+        if self.lexicon is not None:
+            self.lexicon.close()
+
+    def format_stats(self):
+        lines = []
+        for name, session in self.sessions.items():
+            total = session.latency_tracer.stats()["total"]
+            lines.append(f"{name}: {self.protocols[name].packets} datagrams, "
+                         f"p50 {total['p50']:.2f} ms, p95 {total['p95']:.2f} ms")
+        return "\n".join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve several Intendix speller sessions from one event loop")
+    parser.add_argument("--sessions", nargs="*", help="name:port for each session (default: [service] sessions)")
+    parser.add_argument("--host", default=core.INTENDIX_HOST)
+    parser.add_argument("--workers", type=int, default=SERVICE_WORKERS, help="threads for API calls")
+    args = parser.parse_args()
+
+    items = args.sessions or [s for s in SERVICE_SESSIONS.replace(";", ",").split(",") if s.strip()]
+    if not items:
+        items = [f"speller:{port}" for port in core.INTENDIX_PORTS]
+    try:
+        sessions = parse_sessions(items)
+    except ValueError as e:
+        raise SystemExit(str(e))
+
+    service = SpellerService(sessions, host=args.host, workers=args.workers)
+    try:
+        asyncio.run(service.serve())
+    except OSError as e:
+        raise SystemExit(f"❌ Could not listen: {e}")
+    except KeyboardInterrupt:
+        print()
+        print(service.format_stats())
+
+
+if __name__ == "__main__":
+    main()
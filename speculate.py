@@ -0,0 +1,161 @@
+"""
+Speculative question generation while a phrase is still being spelled.
+
+update(prefix) is called with the phrase typed so far after every speller
+char. Once the prefix has been stable for debounce_ms, generate(prefix) runs
+through spawn (the app's shared worker pool; a one-thread pool of its own by
+default). Only one request is in flight at a time; a prefix that stabilizes
+meanwhile replaces any older queued one. When '!' completes the phrase,
+take(phrase) returns the Future for that exact (normalized) prefix: already
+done, or still running and worth waiting for. Results for older prefixes are
+dropped from a small LRU, and debounce timers of superseded prefixes just
+find their version outdated and do nothing.
+
+With a GenerationTracker, each request is registered as a "speculation"
+generation and passed to generate(prefix, generation=...), so take() of a
+different phrase and cancel() close its stream straight away.
+"""
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from questioncache import normalize_keyword
+
+
+class SpeculativeGenerator:
+    def __init__(self, generate, after, debounce_ms=800, min_chars=3, keep=8, spawn=None, tracker=None):
+        self.generate = generate
+        self.after = after
+        self._pool = None
+        if spawn is None:
+            self._pool = ThreadPoolExecutor(1, "speculate")
+            spawn = self._pool.submit
+        self.spawn = spawn
+        self.tracker = tracker
+        self.debounce_ms = debounce_ms
+        self.min_chars = min_chars
+        self.keep = keep
+        self.started = 0
+        self.used = 0
+        self.discarded = 0
+        self._lock = threading.Lock()
+        self._version = 0
+        self._futures = OrderedDict()  # normalized prefix -> Future
+        self._running = None  # (key, generation) of the request in flight
+        self._queued = None
+
+    def update(self, prefix):
+        """New prefix typed (Tk thread); generation starts once it stays the same for debounce_ms"""
+        with self._lock:
+            self._version += 1
+            version = self._version
+        if len(prefix.strip()) < self.min_chars:
+            return
+        self.after(self.debounce_ms, lambda: self._fire(version, prefix))
+
+    def take(self, phrase):
+        """Future with questions for phrase, or None if it was never speculated"""
+        key = normalize_keyword(phrase)
+        with self._lock:
+            self._version += 1
+            future = self._futures.pop(key, None)
+            self._queued = None
+            stale = self._running is not None and self._running[0] != key
+            if future is not None:
+                self.used += 1
+        if stale:
+            # The phrase is complete: a request for another prefix is no use any more
+            self._cancel_running()
+        return future
+
+    def cancel(self):
+        """Forgets queued work and results and stops the request in flight"""
+        with self._lock:
+            self._version += 1
+            self.discarded += len(self._futures)
+            self._futures.clear()
+            self._queued = None
+        self._cancel_running()
+
+    def shutdown(self):
+        self.cancel()
+        if self._pool is not None:
+            self._pool.shutdown(wait=False)
+
+    def stats(self):
+        with self._lock:
+            return {"started": self.started, "used": self.used, "discarded": self.discarded}
+
+    def _fire(self, version, prefix):
+        key = normalize_keyword(prefix)
+        with self._lock:
+            if version != self._version or key in self._futures:
+                return
+            if self._running is not None:
+                self._queued = (key, prefix)
+                return
+            future = self._begin(key, prefix)
+        try:
+            self.spawn(self._run, key, prefix, future)
+        except RuntimeError as e:
+            # Pool already shut down (app closing)
+            self._end(key, future, e)
+
+    def _cancel_running(self):
+        # Only one speculation is ever in flight; the tracker counts its tokens as wasted
+        if self.tracker is not None:
+            self.tracker.cancel("speculation")
+
+    def _begin(self, key, prefix):
+        """Registers a Future for key (lock held)"""
+        generation = self.tracker.start("speculation", prefix) if self.tracker is not None else None
+        future = Future()
+        future.set_running_or_notify_cancel()
+        self._futures[key] = future
+        while len(self._futures) > self.keep:
+            self._futures.popitem(last=False)
+            self.discarded += 1
+        self._running = (key, generation)
+        self.started += 1
+        return future
+
+    def _end(self, key, future, error):
+        """Forgets a request that never ran"""
+        with self._lock:
+            _, generation = self._running
+            self._running = None
+            if self._futures.get(key) is future:
+                del self._futures[key]
+        if generation is not None:
+            generation.finish()
+        future.set_exception(error)
+
+    def _run(self, key, prefix, future):
+        while True:
+            with self._lock:
+                generation = self._running[1]
+            try:
+                if generation is None:
+                    result = self.generate(prefix)
+                else:
+                    result = self.generate(prefix, generation=generation)
+                if generation is not None and generation.cancelled():
+                    # Whatever streamed in before the cancel is not a full menu
+                    raise RuntimeError("speculation cancelled")
+                future.set_result(result)
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                if generation is not None:
+                    generation.finish()
+            with self._lock:
+                if generation is not None and generation.cancelled() and self._futures.get(key) is future:
+                    del self._futures[key]
+                self._running = None
+                if self._queued is None:
+                    return
+                key, prefix = self._queued
+                self._queued = None
+                if key in self._futures:
+                    return
+                future = self._begin(key, prefix)
@@ -0,0 +1,85 @@
+"""
+Frame-coalesced rendering of streamed chat tokens into a Tk Text widget.
+
+Worker threads call feed() for every token; the text is buffered and the Tk
+loop is woken at most once per frame to insert everything pending with one
+insert + see. The frame interval adapts: when a flush gets expensive (large
+backlog, long widget) the interval grows so rendering never takes more than
+about a quarter of the Tk loop's time, and shrinks back once it is cheap.
+"""
+import threading
+import time
+
+END = "end"  # tkinter.END
+
+
+class StreamRenderer:
+    def __init__(self, widget, after, tag="ai", frame_ms=16, max_frame_ms=120, budget=0.25):
+        self.widget = widget
+        self.after = after
+        self.tag = tag
+        self.frame_ms = frame_ms
+        self.max_frame_ms = max_frame_ms
+        self.budget = budget
+        self.interval_ms = frame_ms
+        self.tokens = 0
+        self.chars = 0
+        self.flushes = 0
+        self._lock = threading.Lock()
+        self._pending = []
+        self._scheduled = False
+        self._closing = None
+        self._closed = False
+
+    def feed(self, text):
+        """Buffers a token (any thread); schedules a flush if none is pending"""
+        if not text:
+            return
+        with self._lock:
+            if self._closed:
+                return
+            self._pending.append(text)
+            self.tokens += 1
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.after(self.interval_ms, self._flush)
+
+    def close(self, on_done=None):
+        """Flushes what is left, then runs on_done on the Tk loop (after the last insert)"""
+        with self._lock:
+            self._closing = on_done or (lambda: None)
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self.after(0, self._flush)
+
+    def cancel(self):
+        """Drops everything not yet on screen; later feeds are ignored"""
+        with self._lock:
+            self._pending.clear()
+            self._closed = True
+            self._closing = None
+
+    def _flush(self):
+        with self._lock:
+            text = "".join(self._pending)
+            self._pending.clear()
+            self._scheduled = False
+            on_done = self._closing
+            if on_done is not None:
+                self._closing = None
+                self._closed = True
+
+        if text:
+            start = time.perf_counter()
+            self.widget.insert(END, text, self.tag)
+            self.widget.see(END)
+            cost_ms = (time.perf_counter() - start) * 1000
+            self.chars += len(text)
+            self.flushes += 1
+            # Keep rendering under `budget` of the loop: slower flushes -> longer frames
+            self.interval_ms = int(min(self.max_frame_ms, max(self.frame_ms, cost_ms / self.budget)))
+
+        if on_done is not None:
+            on_done()
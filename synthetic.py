@@ -0,0 +1,97 @@
+"""
+Synthetic multichannel EEG with P300 responses, generated block-wise.
+
+SyntheticEEG.block(n) returns the next n samples (n x channels, microvolts)
+of a continuous stream:
+
+    background  white noise shaped to a 1/f spectrum with an alpha peak
+                (one FIR kernel, applied as sliding windows @ kernel, the
+                noise history carried over so blocks join seamlessly),
+                mixed across channels for a common component
+    line noise  line_hz sinusoid and its 3rd harmonic, phase continuous
+    P300        N200/P300 template with latency jitter, added at every
+                target flash given with erp(); amplitude = snr * background
+                RMS, weighted per channel (parietal strongest)
+
+Everything is numpy over whole blocks, so generating runs far faster than
+real time for soak tests and classifier benchmarks. The default channel
+weights follow the Unicorn layout (Fz C3 Cz C4 Pz PO7 Oz PO8).
+"""
+import numpy as np
+
+UNICORN_P300_WEIGHTS = (0.5, 0.6, 0.8, 0.6, 1.0, 0.8, 0.7, 0.8)
+
+
+def erp_template(fs, jitter=0.0, length_s=0.8):
+    """N200 + P300 waveform (peak 1.0) sampled at fs; jitter shifts the P300 in seconds"""
+    t = np.arange(int(length_s * fs)) / fs
+    n200 = -0.35 * np.exp(-((t - 0.2) / 0.03) ** 2)
+    p300 = np.exp(-((t - 0.32 - jitter) / 0.07) ** 2)
+    return n200 + p300
+
+
+def _shaping_kernel(fs, length, alpha_hz, alpha_gain):
+    freqs = np.fft.rfftfreq(length, 1.0 / fs)
+    magnitude = 1.0 / np.sqrt(np.maximum(freqs, 0.5))
+    magnitude *= 1.0 + alpha_gain * np.exp(-((freqs - alpha_hz) / 1.5) ** 2)
+    kernel = np.roll(np.fft.irfft(magnitude, length), length // 2) * np.hanning(length)
+    return kernel / np.sqrt(np.sum(kernel ** 2))
+
+
+class SyntheticEEG:
+    def __init__(self, fs=250, channels=8, rms=10.0, snr=0.5, line_hz=50.0, line_uv=3.0,
+                 alpha_hz=10.0, alpha_gain=3.0, jitter_s=0.03, weights=None, seed=None):
+        self.fs = fs
+        self.channels = channels
+        self.rms = rms
+        self.snr = snr
+        self.line_hz = line_hz
+        self.jitter_s = jitter_s
+        self.index = 0  # samples generated so far
+        self._rng = np.random.default_rng(seed)
+        self._kernel = _shaping_kernel(fs, int(fs), alpha_hz, alpha_gain)[::-1].copy()
+        self._history = self._rng.standard_normal((len(self._kernel) - 1, channels))
+        mixing = 0.8 * np.eye(channels) + 0.2 / channels * np.ones((channels, channels))
+        self._mixing = mixing * (rms / np.sqrt(np.mean(np.sum(mixing ** 2, axis=0))))
+        self._line = line_uv * self._rng.uniform(0.5, 1.5, channels)
+        if weights is None:
+            weights = UNICORN_P300_WEIGHTS if channels == len(UNICORN_P300_WEIGHTS) else np.ones(channels)
+        self._weights = np.asarray(weights, dtype=float)
+        self._erps = []  # (start index, (samples, channels) response)
+
+    def erp(self, index):
+        """Adds a P300 response to a target flash at sample index"""
+        jitter = self._rng.normal(0, self.jitter_s) if self.jitter_s else 0.0
+        wave = erp_template(self.fs, jitter) * (self.snr * self.rms)
+        self._erps.append((int(index), wave[:, None] * self._weights))
+
+    def skip(self, n):
+        """Advances the stream by n samples without generating them"""
+        self.index += n
+        self._erps = [(s, w) for s, w in self._erps if s + len(w) > self.index]
+
+    def block(self, n):
+        """The next n samples as a (n, channels) float32 array"""
+        if n <= 0:
+            return np.zeros((0, self.channels), dtype=np.float32)
+        white = self._rng.standard_normal((n, self.channels))
+        padded = np.concatenate((self._history, white))
+        self._history = padded[n:]
+        windows = np.lib.stride_tricks.sliding_window_view(padded, len(self._kernel), axis=0)
+        data = (windows @ self._kernel) @ self._mixing
+
+        t = (self.index + np.arange(n)) / self.fs
+        phase = 2 * np.pi * self.line_hz * t
+        data += np.outer(np.sin(phase) + 0.2 * np.sin(3 * phase), self._line)
+
+        start, end = self.index, self.index + n
+        remaining = []
+        for s, wave in self._erps:
+            lo, hi = max(s, start), min(s + len(wave), end)
+            if lo < hi:
+                data[lo - start:hi - start] += wave[lo - s:hi - s]
+            if s + len(wave) > end:
+                remaining.append((s, wave))
+        self._erps = remaining
+        self.index = end
+        return data.astype(np.float32)
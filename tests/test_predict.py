@@ -0,0 +1,37 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from predict import NgramPredictor  # noqa: E402
+
+
+def random_phrase(rng):
+    return " ".join("".join(rng.choice("ABCDEFGHIJKLMNOPQRSTUVWXYZ") for _ in range(5)) for _ in range(4))
+
+
+def test_prune_keeps_three_quarters_with_tied_counts():
+    predictor = NgramPredictor(max_ngrams=2000)
+    keep = predictor.max_ngrams * 3 // 4
+    rng = random.Random(1)
+    after_prune = []
+    for _ in range(300):
+        before = predictor.pruned
+        predictor.learn(random_phrase(rng), weight=3)  # every count ties at 3
+        if predictor.pruned != before:
+            after_prune.append(predictor._ngrams)
+        assert predictor._ngrams <= predictor.max_ngrams
+    assert after_prune
+    assert all(n == keep for n in after_prune)
+    assert predictor._ngrams == predictor._count_ngrams()
+
+
+def test_prune_drops_the_rarest_first():
+    predictor = NgramPredictor(max_ngrams=400)
+    predictor.learn("I WANT WATER", weight=50)
+    rng = random.Random(2)
+    for _ in range(100):
+        predictor.learn(random_phrase(rng))
+    assert predictor.pruned > 0
+    assert predictor.predict_words("I WANT WA")[0] == "WATER"
@@ -0,0 +1,142 @@
+"""
+Retained widgets for panels that are redrawn from state.
+
+Instead of destroying a frame's children and building them again, the
+caller describes what should be on screen as a list of specs (see spec())
+and WidgetPool.update() reconciles it with what is there:
+
+    same key, kind and parent   only the options that changed are configured
+    new key                     the widget is created
+    key no longer wanted        the widget is unpacked and kept for later
+
+Children of a parent are only re-packed when the visible sequence or the
+pack options change. Commands are given as (function, args) tuples so they
+compare equal across updates and are not re-registered with Tcl every time.
+Every update is timed; format_stats() gives rolling percentiles.
+"""
+import time
+from collections import deque
+
+from latency import percentile
+
+
+def spec(key, kind, parent=None, pack=None, **options):
+    """One widget: unique key, kind (a factory name), parent key (None = root) and pack options"""
+    return {"key": key, "kind": kind, "parent": parent, "pack": pack or {}, "options": options}
+
+
+class _Entry:
+    __slots__ = ("widget", "kind", "parent", "options", "pack", "visible")
+
+    def __init__(self, widget, kind, parent, options, pack):
+        self.widget = widget
+        self.kind = kind
+        self.parent = parent
+        self.options = options
+        self.pack = pack
+        self.visible = False
+
+
+def _callback(command):
+    if isinstance(command, tuple):
+        func, args = command
+        return lambda: func(*args)
+    return command
+
+
+class WidgetPool:
+    def __init__(self, root, factories, window=200):
+        self.root = root
+        self.factories = factories
+        self.updates = 0
+        self.created = 0
+        self.configured = 0
+        self.repacked = 0
+        self.last = {}
+        self.times = deque(maxlen=window)
+        self._entries = {}
+        self._sequences = {}  # parent key -> visible child keys in pack order
+
+    def widget(self, key):
+        entry = self._entries.get(key)
+        return entry.widget if entry is not None else None
+
+    def option(self, key, name):
+        """The option value the pool last set on widget key"""
+        entry = self._entries.get(key)
+        return entry.options.get(name) if entry is not None else None
+
+    def update(self, specs):
+        """Makes the panel match specs; returns the number of widgets touched"""
+        start = time.perf_counter()
+        created = configured = repacked = 0
+        wanted = {}
+        sequences = {}
+        for s in specs:
+            key, kind, parent = s["key"], s["kind"], s["parent"]
+            entry = self._entries.get(key)
+            if entry is not None and (entry.kind != kind or entry.parent != parent):
+                self._destroy(key)
+                entry = None
+            if entry is None:
+                options = {k: (_callback(v) if k == "command" else v) for k, v in s["options"].items()}
+                master = self.root if parent is None else self._entries[parent].widget
+                entry = _Entry(self.factories[kind](master, **options), kind, parent, dict(s["options"]), s["pack"])
+                self._entries[key] = entry
+                created += 1
+            else:
+                changed = {k: v for k, v in s["options"].items() if entry.options.get(k) != v}
+                if changed:
+                    entry.widget.configure(**{k: (_callback(v) if k == "command" else v) for k, v in changed.items()})
+                    entry.options.update(changed)
+                    configured += 1
+            wanted[key] = s
+            sequences.setdefault(parent, []).append(key)
+
+        for key, entry in self._entries.items():
+            if key not in wanted and entry.visible:
+                entry.widget.pack_forget()
+                entry.visible = False
+
+        for parent, keys in sequences.items():
+            unchanged = (self._sequences.get(parent) == keys
+                         and all(self._entries[k].visible and self._entries[k].pack == wanted[k]["pack"] for k in keys))
+            if unchanged:
+                continue
+            for key in keys:
+                entry = self._entries[key]
+                if entry.visible:
+                    entry.widget.pack_forget()
+            for key in keys:
+                entry = self._entries[key]
+                entry.pack = wanted[key]["pack"]
+                entry.widget.pack(**entry.pack)
+                entry.visible = True
+                repacked += 1
+        self._sequences = sequences
+
+        self.updates += 1
+        self.created += created
+        self.configured += configured
+        self.repacked += repacked
+        self.last = {"created": created, "configured": configured, "repacked": repacked,
+                     "ms": (time.perf_counter() - start) * 1000}
+        return created + configured + repacked
+
+    def record(self, ms):
+        """Adds a full update time (reconcile + redraw) to the rolling window"""
+        self.times.append(ms)
+
+    def format_stats(self):
+        times = sorted(self.times)
+        if not times:
+            return "Panel: no updates yet"
+        return (f"Panel: p50 {percentile(times, 50):.1f} ms, p95 {percentile(times, 95):.1f} ms, "
+                f"max {times[-1]:.1f} ms; last +{self.last['created']} ~{self.last['configured']} "
+                f"↻{self.last['repacked']}")
+
+    def _destroy(self, key):
+        entry = self._entries.pop(key)
+        for child in [k for k, e in self._entries.items() if e.parent == key]:
+            self._entries.pop(child)
+        entry.widget.destroy()